@@ -0,0 +1,122 @@
+"""
+Benchmark: cold start of quiz.loader from JSON vs. the compiled bank.
+
+Writes a synthetic quiz_data/ (pretty-printed legacy JSON, like the
+export) plus its compiled bank to a temp directory, then measures in a
+fresh interpreter per run: the time to load every subject and read one
+block of each, and the RSS growth this causes (after django.setup(), so
+both paths start from the same baseline).
+
+Usage (from the repository root):
+
+    python benchmarks/bank_startup.py [--questions 100000] [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gr2quiz.settings')
+
+CHILD = r'''
+import json, sys, time
+import django
+django.setup()
+
+def rss_kib():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+
+from quiz.loader import QuestionCatalog
+from quiz.subjects import get_subject_registry
+
+quiz_data_dir, bank_path = sys.argv[1], sys.argv[2] or None
+before = rss_kib()
+start = time.perf_counter()
+catalog = QuestionCatalog(quiz_data_dir, bank_path=bank_path)
+for subject in get_subject_registry():
+    loaded = catalog.subject(subject.id)
+    loaded.block_questions(loaded.block_numbers[len(loaded.block_numbers) // 2])
+print(json.dumps({'seconds': time.perf_counter() - start, 'rss_kib': rss_kib() - before,
+                  'type': type(loaded).__name__}))
+'''
+
+
+def write_quiz_data(directory, total):
+    from quiz.subjects import get_subject_registry
+
+    subjects = list(get_subject_registry())
+    per_subject = total // len(subjects)
+    for subject in subjects:
+        questions = [
+            {
+                'id': qid,
+                'question': f'Care este valoarea rezistenței echivalente în circuitul {qid}?',
+                'options': {
+                    'a': 'Rezistența crește proporțional cu lungimea conductorului.',
+                    'b': 'Rezistența scade odată cu creșterea secțiunii.',
+                    'c': 'Ambele variante de mai sus sunt corecte.',
+                },
+                'correct': 'abc'[qid % 3],
+                'explanation': 'Rezistența unui conductor este R = ρ·l/S.' if qid % 2 else '',
+                'block': (qid - 1) // 20 + 1,
+                'image_base': None,
+            }
+            for qid in range(1, per_subject + 1)
+        ]
+        data = {'title': subject.title, 'subject': subject.id, 'blockSize': 20,
+                'questionCount': len(questions), 'questions': questions}
+        (directory / subject.data_file).write_text(
+            json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8',
+        )
+
+
+def run(quiz_data_dir, bank_path, runs):
+    results = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, '-c', CHILD, str(quiz_data_dir), str(bank_path or '')],
+            cwd=ROOT, env=os.environ, check=True, capture_output=True, text=True,
+        ).stdout
+        results.append(json.loads(out.strip().splitlines()[-1]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--questions', type=int, default=100_000, help='questions across all subjects')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    import django
+
+    django.setup()
+    from django.core.management import call_command
+    from django.test.utils import override_settings
+
+    workdir = Path(tempfile.mkdtemp(prefix='bank-bench-'))
+    write_quiz_data(workdir, args.questions)
+    bank_path = workdir / 'questions.bank'
+    with override_settings(QUIZ_DATA_DIR=workdir):
+        call_command('compile_question_bank', '--output', str(bank_path))
+    json_size = sum(p.stat().st_size for p in workdir.glob('*.json'))
+    print(f'{args.questions} questions: JSON {json_size / 2**20:.1f} MiB, '
+          f'bank {bank_path.stat().st_size / 2**20:.1f} MiB\n')
+
+    for label, path in (('JSON', None), ('bank', bank_path)):
+        results = run(workdir, path, args.runs)
+        seconds = statistics.median(r['seconds'] for r in results)
+        rss = statistics.median(r['rss_kib'] for r in results)
+        print(f'{label:<5} ({results[0]["type"]:<14}) {seconds * 1000:9.1f} ms  {rss / 1024:8.1f} MiB RSS')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark: JSON export of a large synthetic question bank.
+
+Compares the pre-streaming export (every Question materialized in a list,
+then one json.dumps(..., indent=2) string written in one go) with the
+streamed export of quiz.exporter (legacy indented, legacy compact and
+sharded), reporting wall time and peak Python memory (tracemalloc) for
+one subject, then serial vs. process-pool export of all subjects (the
+pool only helps with more than one CPU).
+
+The bank lives in a throwaway SQLite database and the files in a temp
+directory; nothing in the project is touched.
+
+Usage (from the repository root):
+
+    python benchmarks/export_stream.py [--questions 100000] [--jobs 3]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gr2quiz.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connections  # noqa: E402
+
+from quiz.exporter import export_subject, export_subjects, serialize_export_question  # noqa: E402
+from quiz.models import Question  # noqa: E402
+from quiz.subjects import get_subject_registry  # noqa: E402
+
+
+def materialized_export(subject_id, out_path):
+    """The export as it was before streaming."""
+    questions = [
+        serialize_export_question(q)
+        for q in Question.objects.filter(subject=subject_id).order_by('qid')
+    ]
+    export_data = {
+        'title': subject_id,
+        'subject': subject_id,
+        'blockSize': 20,
+        'questionCount': len(questions),
+        'questions': questions,
+    }
+    out_path.write_text(json.dumps(export_data, ensure_ascii=False, indent=2), encoding='utf-8')
+
+
+def populate(subject_ids, count):
+    """Insert count synthetic questions per subject."""
+    for subject_id in subject_ids:
+        Question.objects.bulk_create(
+            (
+                Question(
+                    subject=subject_id,
+                    qid=qid,
+                    block_number=(qid - 1) // 20 + 1,
+                    text=f'Care este valoarea rezistenței echivalente în circuitul {qid}?',
+                    option_a='Rezistența crește proporțional cu lungimea conductorului.',
+                    option_b='Rezistența scade odată cu creșterea secțiunii.',
+                    option_c='Ambele variante de mai sus sunt corecte.',
+                    correct='abc'[qid % 3],
+                    explanation='Rezistența unui conductor este R = ρ·l/S.' if qid % 2 else '',
+                )
+                for qid in range(1, count + 1)
+            ),
+            batch_size=2000,
+        )
+
+
+def measure(label, func):
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{label:<28} {seconds:8.2f} s  {peak / 2**20:9.1f} MiB peak')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--questions', type=int, default=100_000, help='questions in the large subject')
+    parser.add_argument('--jobs', type=int, default=3, help='worker processes for the pool run')
+    args = parser.parse_args()
+
+    settings.DEBUG = False  # no query log
+    workdir = Path(tempfile.mkdtemp(prefix='export-bench-'))
+    connections['default'].settings_dict['NAME'] = str(workdir / 'bench.sqlite3')
+    settings.QUIZ_DATA_DIR = workdir / 'quiz_data'
+    settings.QUIZ_DATA_DIR.mkdir()
+    call_command('migrate', verbosity=0)
+
+    subject_ids = [subject.id for subject in get_subject_registry()]
+    large = subject_ids[0]
+    print(f'Populating {args.questions} questions in {large} ...')
+    populate([large], args.questions)
+
+    print(f'\nOne subject, {args.questions} questions')
+    measure('materialized (indent=2)', lambda: materialized_export(large, workdir / 'materialized.json'))
+    measure('streamed legacy (indent=2)', lambda: export_subject(large, export_format='legacy'))
+    measure('streamed legacy (compact)', lambda: export_subject(large, export_format='legacy', compact=True))
+    shards = settings.QUIZ_DATA_DIR / large
+    measure('streamed sharded (fresh)', lambda: (
+        [p.unlink() for p in shards.glob('*')] if shards.exists() else None,
+        export_subject(large, export_format='sharded'),
+    ))
+    measure('streamed sharded (no-op)', lambda: export_subject(large, export_format='sharded'))
+
+    per_subject = args.questions // len(subject_ids)
+    with connections['default'].cursor() as cursor:
+        # Not .delete(): that would send a post_delete signal per row
+        cursor.execute(f'DELETE FROM {Question._meta.db_table}')
+    populate(subject_ids, per_subject)
+    print(f'\nAll {len(subject_ids)} subjects, {per_subject} questions each (legacy, indent=2)')
+    for jobs in (1, args.jobs):
+        start = time.perf_counter()
+        export_subjects(subject_ids, export_format='legacy', jobs=jobs)
+        print(f'jobs={jobs:<23} {time.perf_counter() - start:8.2f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark: per-request overhead of anonymous public requests with the full
+middleware stack vs. the sessionless fast path (QUIZ_PUBLIC_FAST_PATH).
+
+Runs the requests through Django's request handler (django.test.Client,
+in-memory test database) for /robots.txt (a trivial view, so the time is
+mostly middleware) and a cached /learn/ page, and prints the headers that
+decide whether a shared proxy may cache the response.
+
+Usage (from the repository root):
+
+    python benchmarks/public_fast_path.py [--number 5000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gr2quiz.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import override_settings, setup_test_environment  # noqa: E402
+
+PATHS = ('/robots.txt', '/learn/')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--number', type=int, default=5000)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    # Keep the (background) JSON export of the sample question out of the real quiz_data/
+    override_settings(QUIZ_DATA_DIR=Path(tempfile.mkdtemp(prefix='fast-path-bench-'))).enable()
+    connection.creation.create_test_db(verbosity=0)
+    from quiz.models import Question
+
+    Question.objects.create(subject='electrotehnica', qid=1, block_number=1, text='Q?',
+                            correct='a', explanation='E.')
+
+    print(f'{"path":<12} {"stack":<10} {"us/request":>10}  headers')
+    for path in PATHS:
+        results = {}
+        for label, enabled in (('full', False), ('fast path', True)):
+            with override_settings(QUIZ_PUBLIC_FAST_PATH=enabled, DEBUG=False):
+                client = Client()
+                response = client.get(path)  # warm the page cache
+                seconds = min(timeit.repeat(lambda: client.get(path), number=args.number, repeat=3))
+            results[label] = seconds / args.number * 1e6
+            headers = f"Vary: {response.get('Vary', '-')}; Set-Cookie: {'yes' if response.cookies else 'no'}"
+            print(f'{path:<12} {label:<10} {results[label]:10.1f}  {headers}')
+        print(f'{"":<12} {"saved":<10} {results["full"] - results["fast path"]:10.1f}'
+              f'  ({1 - results["fast path"] / results["full"]:.0%})')
+
+
+if __name__ == '__main__':
+    main()
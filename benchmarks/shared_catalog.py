@@ -0,0 +1,117 @@
+"""
+Benchmark: per-worker memory of the question catalog, per-process JSON vs.
+the shared, memory-mapped bank.
+
+Writes a synthetic quiz_data/ and its bank to a temp directory, then for
+each worker count forks that many "workers" from one master (like
+gunicorn), lets every worker read every block of every subject through
+quiz.loader, and reads /proc/<pid>/smaps_rollup while they are all alive:
+
+    RSS   resident pages, shared ones counted in full by every worker
+    PSS   shared pages divided among the processes mapping them
+    USS   pages private to the worker (what each extra worker costs)
+
+Values are deltas against workers that load nothing. Parsing JSON also
+un-shares pages the workers inherited from the master (copy-on-write on
+refcount and GC writes), which is why its PSS can grow more than its RSS.
+
+This measures the quiz.loader catalog on its own. The web views serve
+pages from the database and the quiz cache and never read quiz.loader, so
+the numbers are no estimate of what a gunicorn worker of the site saves.
+
+Usage (from the repository root):
+
+    python benchmarks/shared_catalog.py [--questions 100000] [--workers 4 8]
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gr2quiz.settings')
+
+from bank_startup import write_quiz_data  # noqa: E402
+
+
+def memory_kib(pid):
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            key, _, rest = line.partition(':')
+            if rest.strip().endswith('kB'):
+                values[key] = int(rest.split()[0])
+    return {
+        'rss': values['Rss'],
+        'pss': values['Pss'],
+        'uss': values['Private_Clean'] + values['Private_Dirty'],
+    }
+
+
+def worker(quiz_data_dir, bank_path, ready, done):
+    if quiz_data_dir is not None:
+        from quiz.loader import QuestionCatalog
+        from quiz.subjects import get_subject_registry
+
+        catalog = QuestionCatalog(quiz_data_dir, bank_path=bank_path, shared=bank_path is not None)
+        for subject in get_subject_registry():
+            loaded = catalog.subject(subject.id)
+            for block_number in loaded.block_numbers:
+                loaded.block_questions(block_number)
+    ready.wait()
+    done.wait()
+
+
+def measure(workers, quiz_data_dir=None, bank_path=None):
+    context = multiprocessing.get_context('fork')
+    ready = context.Barrier(workers + 1)
+    done = context.Event()
+    processes = [
+        context.Process(target=worker, args=(quiz_data_dir, bank_path, ready, done))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    ready.wait()
+    samples = [memory_kib(process.pid) for process in processes]
+    done.set()
+    for process in processes:
+        process.join()
+    return {key: statistics.mean(sample[key] for sample in samples) for key in ('rss', 'pss', 'uss')}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--questions', type=int, default=100_000, help='questions across all subjects')
+    parser.add_argument('--workers', type=int, nargs='+', default=[4, 8])
+    args = parser.parse_args()
+
+    import django
+
+    django.setup()
+    from django.core.management import call_command
+    from django.test.utils import override_settings
+
+    workdir = Path(tempfile.mkdtemp(prefix='shared-catalog-bench-'))
+    write_quiz_data(workdir, args.questions)
+    bank_path = workdir / 'questions.bank'
+    with override_settings(QUIZ_DATA_DIR=workdir):
+        call_command('compile_question_bank', '--output', str(bank_path))
+    print(f'{args.questions} questions; MiB per worker (mean), delta vs. an idle worker\n')
+    print(f'{"workers":>7}  {"catalog":<11} {"RSS":>8} {"PSS":>8} {"USS":>8} {"total PSS":>10}')
+
+    for workers in args.workers:
+        baseline = measure(workers)
+        for label, path in (('JSON', None), ('shared bank', bank_path)):
+            result = measure(workers, workdir, path)
+            delta = {key: (result[key] - baseline[key]) / 1024 for key in result}
+            print(f'{workers:>7}  {label:<11} {delta["rss"]:8.1f} {delta["pss"]:8.1f} {delta["uss"]:8.1f} '
+                  f'{delta["pss"] * workers:10.1f}')
+
+
+if __name__ == '__main__':
+    main()
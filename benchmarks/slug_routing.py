@@ -0,0 +1,117 @@
+"""
+Micro-benchmark: learn URL slug resolution, legacy vs routing table.
+
+The legacy functions are a verbatim copy of the pre-routing-table
+quiz.utils.parse_subject_slug / parse_block_slug (a slug map rebuilt from
+list_subjects() and get_subject_slug on every call, and an endswith() scan per
+subject for blocks).
+
+Usage (from the repository root):
+
+    python benchmarks/slug_routing.py [--number 20000]
+"""
+import argparse
+import os
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gr2quiz.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.urls import resolve  # noqa: E402
+
+from quiz.routing import get_routing_table  # noqa: E402
+from quiz.subjects import list_subjects  # noqa: E402
+from quiz.utils import get_subject_slug  # noqa: E402
+
+
+def legacy_parse_subject_slug(slug):
+    subjects = list_subjects()
+    slug_map = {}
+    for subj in subjects:
+        expected_slug = get_subject_slug(subj['id'], subj['title'])
+        slug_map[expected_slug] = subj['id']
+        slug_map[subj['id']] = subj['id']
+    if slug in slug_map:
+        return slug_map[slug]
+    for subj in subjects:
+        subject_id = subj['id']
+        if slug.endswith(f'-{subject_id}') or slug == subject_id:
+            return subject_id
+    return None
+
+
+def legacy_parse_block_slug(slug):
+    if not slug.startswith('bloc-'):
+        return None, None
+    valid_subjects = [s['id'] for s in list_subjects()]
+    remaining = slug[5:]
+    for subject_id in valid_subjects:
+        if remaining.endswith(f'-{subject_id}'):
+            block_part = remaining[:-len(f'-{subject_id}')]
+            try:
+                block_number = int(block_part)
+                return subject_id, block_number
+            except ValueError:
+                continue
+    return None, None
+
+
+SUBJECT_SLUGS = ['electrotehnica', 'legislatie-gr-2', 'legislatie-gr-2-legislatie-gr-2', 'unknown']
+BLOCK_SLUGS = ['bloc-1-electrotehnica', 'bloc-12-norme-tehnice-gr-2', 'bloc-x-unknown']
+
+
+def legacy_request():
+    """Old learn block view: parse, then two list_subjects() title scans."""
+    legacy_parse_subject_slug(SUBJECT_SLUGS[1])
+    subject_id, _ = legacy_parse_block_slug('bloc-3-legislatie-gr-2')
+    get_subject_slug(subject_id, next(s['title'] for s in list_subjects() if s['id'] == subject_id))
+    next(s for s in list_subjects() if s['id'] == subject_id)
+
+
+def table_request():
+    """New learn block view: both refs resolved by the table, title lookup by id."""
+    table = get_routing_table()
+    table.subject_for_slug(SUBJECT_SLUGS[1])
+    subject_id, _ = table.parse_block_slug('bloc-3-legislatie-gr-2')
+    table.canonical_slugs[subject_id]
+    table.subjects[subject_id]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--number', type=int, default=20000, help='Calls per measurement')
+    number = parser.parse_args().number
+
+    table = get_routing_table()
+    for slug in SUBJECT_SLUGS:
+        assert legacy_parse_subject_slug(slug) == getattr(table.subject_for_slug(slug), 'id', None), slug
+    for slug in BLOCK_SLUGS:
+        assert legacy_parse_block_slug(slug) == table.parse_block_slug(slug), slug
+
+    cases = [
+        ('subject slug', lambda: [legacy_parse_subject_slug(s) for s in SUBJECT_SLUGS],
+         lambda: [table.subject_for_slug(s) for s in SUBJECT_SLUGS]),
+        ('block slug', lambda: [legacy_parse_block_slug(s) for s in BLOCK_SLUGS],
+         lambda: [table.parse_block_slug(s) for s in BLOCK_SLUGS]),
+        ('block view lookups', legacy_request, table_request),
+    ]
+    print(f'{"case":<22}{"legacy (us)":>14}{"table (us)":>14}{"speedup":>10}')
+    for name, legacy, new in cases:
+        old_us = min(timeit.repeat(legacy, number=number, repeat=5)) / number * 1e6
+        new_us = min(timeit.repeat(new, number=number, repeat=5)) / number * 1e6
+        print(f'{name:<22}{old_us:>14.2f}{new_us:>14.2f}{old_us / new_us:>9.1f}x')
+
+    # End to end URL resolution (converters run inside resolve())
+    path = '/learn/legislatie-gr-2/bloc-3-legislatie-gr-2/7/'
+    resolve_us = min(timeit.repeat(lambda: resolve(path), number=number, repeat=5)) / number * 1e6
+    print(f'{"resolve() with refs":<22}{"":>14}{resolve_us:>14.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -68,17 +68,27 @@ INSTALLED_APPS = [
 # Sites framework configuration for sitemap
 SITE_ID = 1
 
+# Session, CSRF, auth and messages middleware are the quiz.middleware
+# subclasses: they skip the anonymous public requests flagged by
+# PublicFastPathMiddleware (no session load, no cookies).
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'quiz.middleware.PublicFastPathMiddleware',
+    'quiz.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'quiz.middleware.CsrfViewMiddleware',
+    'quiz.middleware.AuthenticationMiddleware',
     'quiz.middleware.AuthenticationRequiredMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'quiz.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Sessionless fast path for anonymous GET/HEAD requests to public routes
+# (/learn/, sitemaps, robots.txt, static). QUIZ_PUBLIC_MAX_AGE > 0 also marks
+# those responses "Cache-Control: public" for shared proxies.
+QUIZ_PUBLIC_FAST_PATH = env_bool('DJANGO_QUIZ_PUBLIC_FAST_PATH', default=True)
+QUIZ_PUBLIC_MAX_AGE = int(os.getenv('DJANGO_QUIZ_PUBLIC_MAX_AGE', '0'))
+
 ROOT_URLCONF = 'gr2quiz.urls'
 
 TEMPLATES = [
@@ -111,6 +121,79 @@ DATABASES = {
 }
 
 
+# Cache
+# The quiz caches (block bundles, answer keys, learn pages, sitemaps, catalog
+# stats and their versions) must be shared by all workers and by the
+# management commands: they are kept for up to a day and invalidated by
+# bumping versions in this cache, so with a per-process cache an import,
+# rescan_images or an edit served by another worker would never reach the
+# other processes.
+# Production: set DJANGO_QUIZ_REDIS_URL (e.g. redis://127.0.0.1:6379/1, needs
+# the redis package). Otherwise a file-based cache in DJANGO_QUIZ_CACHE_DIR
+# (default: quiz_cache/ in the project) is used; it is shared too, but lists
+# its directory on every write to cull, so it keeps Django's default size and
+# suits development and small sites. Tests run on a LocMem cache
+# (quiz/test_runner.py), so they never touch either.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+_quiz_redis_url = os.getenv('DJANGO_QUIZ_REDIS_URL')
+if _quiz_redis_url:
+    CACHES['quiz'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': _quiz_redis_url,
+    }
+else:
+    CACHES['quiz'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('DJANGO_QUIZ_CACHE_DIR') or str(BASE_DIR / 'quiz_cache'),
+    }
+QUIZ_CACHE_ALIAS = 'quiz'
+
+TEST_RUNNER = 'quiz.test_runner.QuizTestRunner'
+
+
+# Login/registration rate limits: token buckets in a SQLite file shared by all
+# workers on the host (quiz/rate_limit.py).
+QUIZ_RATE_LIMIT_DB = os.getenv('DJANGO_QUIZ_RATE_LIMIT_DB') or str(BASE_DIR / 'ratelimit.sqlite3')
+
+
+# Write-behind quiz attempts
+# Set DJANGO_QUIZ_ATTEMPT_JOURNAL_DIR to append BlockAttempt rows to a per-worker
+# journal file there and insert them in batches from a background thread
+# (see quiz/attempt_journal.py). Unset: attempts are inserted synchronously.
+# Read-your-writes across workers relies on the shared quiz cache (see Cache above).
+
+QUIZ_ATTEMPT_JOURNAL_DIR = os.getenv('DJANGO_QUIZ_ATTEMPT_JOURNAL_DIR') or None
+QUIZ_ATTEMPT_FLUSH_INTERVAL = float(os.getenv('DJANGO_QUIZ_ATTEMPT_FLUSH_INTERVAL', '1.0'))
+QUIZ_ATTEMPT_FLUSH_BATCH_SIZE = 500
+QUIZ_ATTEMPT_JOURNAL_FSYNC = env_bool('DJANGO_QUIZ_ATTEMPT_JOURNAL_FSYNC', default=True)
+
+
+# JSON export of the question bank (quiz_data/). Edits are exported by a
+# background worker once no new edit arrived for QUIZ_EXPORT_QUIET_PERIOD
+# seconds, at the latest QUIZ_EXPORT_MAX_DELAY seconds after the first one.
+
+QUIZ_DATA_DIR = BASE_DIR / 'quiz_data'
+# 'sharded' (quiz_data/<subject>/block-NNN.json + manifest.json), 'legacy'
+# (quiz_data/<subject>.json) or 'both'
+QUIZ_EXPORT_FORMAT = os.getenv('DJANGO_QUIZ_EXPORT_FORMAT', 'sharded')
+QUIZ_EXPORT_QUIET_PERIOD = float(os.getenv('DJANGO_QUIZ_EXPORT_QUIET_PERIOD', '2.0'))
+QUIZ_EXPORT_MAX_DELAY = float(os.getenv('DJANGO_QUIZ_EXPORT_MAX_DELAY', '30.0'))
+
+# Precompiled question bank (manage.py compile_question_bank) that quiz.loader
+# memory-maps instead of parsing quiz_data/ JSON. Unset: JSON only.
+QUIZ_BANK_PATH = os.getenv('DJANGO_QUIZ_BANK_PATH', '')
+# Shared catalog: quiz.loader reads questions only through the bank mapping
+# (one copy in the page cache for all processes); a stale bank is recompiled
+# instead of parsed per process. Needs QUIZ_BANK_PATH. The views serve pages
+# from the database, not from quiz.loader, so web workers gain nothing from it.
+QUIZ_SHARED_CATALOG = env_bool('DJANGO_QUIZ_SHARED_CATALOG', default=False)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -2,21 +2,14 @@
 URL configuration for gr2quiz project.
 """
 from django.contrib import admin
-from django.contrib.sitemaps.views import sitemap
 from django.urls import path, include
-from quiz.sitemaps import SubjectListSitemap, SubjectSitemap, BlockSitemap, QuestionSitemap
-
-# Sitemap configuration
-sitemaps = {
-    'subject-list': SubjectListSitemap,
-    'subjects': SubjectSitemap,
-    'blocks': BlockSitemap,
-    'questions': QuestionSitemap,
-}
+from quiz.sitemap_views import sitemap, sitemap_index, sitemap_section
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='django.contrib.sitemaps.views.sitemap'),
+    path('sitemap.xml', sitemap, name='django.contrib.sitemaps.views.sitemap'),
+    path('sitemap-index.xml', sitemap_index, name='sitemap-index'),
+    path('sitemap-<slug:section>.xml', sitemap_section, name='sitemap-section'),
     path('', include('quiz.urls')),
     path('accounts/', include('quiz.auth_urls')),
 ]
@@ -15,3 +15,8 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gr2quiz.settings')
 
 application = get_wsgi_application()
 
+# Write-behind quiz attempts: open this worker's journal and replay the
+# journals of workers that died with unflushed attempts (no-op when disabled).
+from quiz.attempt_journal import start_attempt_journal  # noqa: E402
+
+start_attempt_journal()
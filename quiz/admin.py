@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Question, BlockAttempt
+from .models import Question, BlockAttempt, BlockProgress, BlockStats
 
 
 @admin.register(Question)
@@ -17,6 +17,12 @@ class QuestionAdmin(admin.ModelAdmin):
         return '-'
     short_explanation.short_description = 'Explanation'
 
+    def save_model(self, request, obj, form, change):
+        # Keep the denormalized image metadata in sync with image_base
+        if not change or 'image_base' in form.changed_data:
+            obj.refresh_image_metadata()
+        super().save_model(request, obj, form, change)
+
 
 @admin.register(BlockAttempt)
 class BlockAttemptAdmin(admin.ModelAdmin):
@@ -25,3 +31,21 @@ class BlockAttemptAdmin(admin.ModelAdmin):
     search_fields = ('user__username', 'subject')
     readonly_fields = ('taken_at',)
 
+
+
+@admin.register(BlockStats)
+class BlockStatsAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'block_number', 'question_count', 'answered_count', 'explained_count', 'last_modified')
+    list_filter = ('subject',)
+    readonly_fields = ('subject', 'block_number', 'question_count', 'answered_count', 'explained_count', 'last_modified')
+
+
+@admin.register(BlockProgress)
+class BlockProgressAdmin(admin.ModelAdmin):
+    list_display = ('user', 'subject', 'block_number', 'last_score', 'last_total', 'best_score', 'attempt_count', 'last_taken_at')
+    list_filter = ('subject', 'color_class')
+    search_fields = ('user__username',)
+    readonly_fields = (
+        'user', 'subject', 'block_number', 'last_score', 'last_total', 'last_percentage',
+        'last_taken_at', 'best_score', 'attempt_count', 'color_class',
+    )
@@ -6,6 +6,8 @@ class QuizConfig(AppConfig):
     name = 'quiz'
     
     def ready(self):
-        """Import signals when app is ready."""
+        """Import signals and build the slug routing table when app is ready."""
         import quiz.signals  # noqa
+        from quiz.routing import get_routing_table
+        get_routing_table()
 
@@ -0,0 +1,388 @@
+"""
+Write-behind buffer for BlockAttempt inserts.
+
+Enabled by settings.QUIZ_ATTEMPT_JOURNAL_DIR. Each worker process appends
+its attempts (one JSON line each) to its own journal file in that
+directory and a background flusher thread inserts them with batched
+bulk_create() transactions, so gunicorn workers stop queueing behind the
+SQLite write lock on every submission. When the setting is unset,
+record_attempt() inserts synchronously as before.
+
+Durability and recovery:
+    - a journal line is written (and by default fsync'ed) before the
+      submission response is rendered;
+    - every journal file is flock'ed by the worker that owns it, so any
+      unlocked file in the directory belongs to a dead worker;
+    - replay_journals() inserts such orphaned journals. It runs when a
+      worker starts the journal (gr2quiz/wsgi.py) and from
+      ``manage.py replay_attempt_journals``;
+    - rows carry a unique journal_id and are inserted with
+      ignore_conflicts, so replaying a journal twice is harmless.
+
+Inserts also update the users' BlockProgress rows in the same transaction
+(quiz/progress.py).
+
+Read-your-writes: attempts not yet flushed are also kept in the quiz cache
+per user (see pending_attempts()), and the dashboard overlays them on the
+BlockProgress rows. The quiz cache is shared by all workers (settings.CACHES), so
+the user's next request sees them on any worker. Each pending list is
+updated read-modify-write under an exclusive flock on the journal
+directory, so workers journaling and flushing the same user at once never
+drop each other's entries.
+"""
+import atexit
+import fcntl
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils.dateparse import parse_datetime
+
+from .block_cache import get_quiz_cache
+from .models import BlockAttempt
+from .progress import overlay_attempts, record_progress
+
+logger = logging.getLogger('quiz.attempt_journal')
+
+JOURNAL_SUFFIX = '.jsonl'
+PENDING_KEY = 'quiz:pending-attempts:{user_id}'
+PENDING_TIMEOUT = 60 * 60
+
+
+def _attempt_to_record(attempt):
+    return {
+        'journal_id': str(attempt.journal_id),
+        'user_id': attempt.user_id,
+        'subject': attempt.subject,
+        'block_number': attempt.block_number,
+        'score': attempt.score,
+        'total': attempt.total,
+        'percentage': attempt.percentage,
+        'taken_at': attempt.taken_at.isoformat(),
+    }
+
+
+def _record_to_attempt(record):
+    return BlockAttempt(
+        journal_id=uuid.UUID(record['journal_id']),
+        user_id=record['user_id'],
+        subject=record['subject'],
+        block_number=record['block_number'],
+        score=record['score'],
+        total=record['total'],
+        percentage=record['percentage'],
+        taken_at=parse_datetime(record['taken_at']),
+    )
+
+
+def _read_records(fd):
+    """Read all complete journal lines from an open journal file descriptor."""
+    os.lseek(fd, 0, os.SEEK_SET)
+    chunks = []
+    while True:
+        chunk = os.read(fd, 1 << 16)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    records = []
+    for line in b''.join(chunks).splitlines():
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            # Torn last line of a crashed writer: the attempt was never acknowledged
+            logger.warning('Skipping unreadable attempt journal line: %r', line[:200])
+    return records
+
+
+def insert_records(records, batch_size=None):
+    """
+    Insert journal records with bulk_create and fold them into BlockProgress,
+    in one transaction. Idempotent: records already inserted are skipped.
+    Returns the number of new rows.
+    """
+    batch_size = batch_size or settings.QUIZ_ATTEMPT_FLUSH_BATCH_SIZE
+    attempts = [_record_to_attempt(record) for record in records]
+    with transaction.atomic():
+        existing = set()
+        for start in range(0, len(attempts), batch_size):
+            existing.update(BlockAttempt.objects.filter(
+                journal_id__in=[a.journal_id for a in attempts[start:start + batch_size]]
+            ).values_list('journal_id', flat=True))
+        attempts = [a for a in attempts if a.journal_id not in existing]
+        BlockAttempt.objects.bulk_create(attempts, batch_size=batch_size, ignore_conflicts=True)
+        record_progress(attempts)
+    return len(attempts)
+
+
+@contextmanager
+def _pending_lock(directory):
+    """
+    Hold an exclusive flock on the journal directory. Opened per call, so
+    it also excludes the other threads of this process.
+    """
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def _add_pending(directory, attempt):
+    cache = get_quiz_cache()
+    key = PENDING_KEY.format(user_id=attempt.user_id)
+    with _pending_lock(directory):
+        pending = cache.get(key) or []
+        pending.append(_attempt_to_record(attempt))
+        cache.set(key, pending, PENDING_TIMEOUT)
+
+
+def _clear_pending(directory, records):
+    cache = get_quiz_cache()
+    flushed = {}
+    for record in records:
+        flushed.setdefault(record['user_id'], set()).add(record['journal_id'])
+    with _pending_lock(directory):
+        for user_id, journal_ids in flushed.items():
+            key = PENDING_KEY.format(user_id=user_id)
+            pending = [r for r in cache.get(key) or [] if r['journal_id'] not in journal_ids]
+            if pending:
+                cache.set(key, pending, PENDING_TIMEOUT)
+            else:
+                cache.delete(key)
+
+
+def pending_attempts(user, subject=None):
+    """Return the user's not yet flushed attempts as unsaved BlockAttempt objects."""
+    if not settings.QUIZ_ATTEMPT_JOURNAL_DIR:
+        return []
+    records = get_quiz_cache().get(PENDING_KEY.format(user_id=user.pk)) or []
+    return [
+        _record_to_attempt(record) for record in records
+        if subject is None or record['subject'] == subject
+    ]
+
+
+def merge_pending_progress(progress_by_block, user):
+    """Overlay the user's pending attempts on a {(subject, block_number): BlockProgress} dict."""
+    return overlay_attempts(progress_by_block, user, pending_attempts(user))
+
+
+class AttemptJournal:
+    """Per-process journal file plus its flusher thread."""
+
+    def __init__(self, directory, interval, fsync=True):
+        self.directory = Path(directory)
+        self.interval = interval
+        self.fsync = fsync
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._seq = 0
+        self._fd = None
+        self._path = None
+        self._unflushed = 0
+        self._sealed = []  # [(fd, path)] rotated journals waiting to be inserted
+        self.flushed = 0
+        self.last_flush_at = None
+        self.last_error = None
+        self._thread = threading.Thread(target=self._run, name='quiz-attempt-flusher', daemon=True)
+
+    def _open_journal(self):
+        self._seq += 1
+        name = f'attempts-{socket.gethostname()}-{self.pid}-{int(time.time())}-{self._seq}{JOURNAL_SUFFIX}'
+        self._path = self.directory / name
+        # Create and lock under a temporary name so replay_journals() never
+        # sees the file unlocked. The lock is held for the life of the file:
+        # an unlocked journal belongs to a dead worker.
+        tmp_path = self._path.with_name(f'.{name}.new')
+        self._fd = os.open(tmp_path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o640)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        os.rename(tmp_path, self._path)
+        self._unflushed = 0
+
+    def start(self, background=True):
+        """Open the journal file; background=False leaves flushing to the caller."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self._open_journal()
+        if background:
+            self._thread.start()
+
+    def append(self, attempt):
+        """Durably append one attempt to this worker's journal."""
+        line = json.dumps(_attempt_to_record(attempt), separators=(',', ':')).encode('utf-8') + b'\n'
+        with self._lock:
+            os.write(self._fd, line)
+            if self.fsync:
+                os.fsync(self._fd)
+            self._unflushed += 1
+
+    def _rotate(self):
+        """Seal the current journal (if it has lines) and start a new one."""
+        with self._lock:
+            if self._unflushed:
+                self._sealed.append((self._fd, self._path))
+                self._open_journal()
+
+    def flush(self):
+        """Insert every sealed journal. Returns the number of rows handed to the database."""
+        self._rotate()
+        inserted = 0
+        while self._sealed:
+            fd, path = self._sealed[0]
+            records = _read_records(fd)
+            if records:
+                insert_records(records)
+                _clear_pending(self.directory, records)
+            os.unlink(path)
+            os.close(fd)
+            self._sealed.pop(0)
+            inserted += len(records)
+        if inserted:
+            self.flushed += inserted
+            self.last_flush_at = time.time()
+        return inserted
+
+    def _run(self):
+        try:
+            replay_journals(self.directory)
+        except Exception as exc:
+            logger.exception('Attempt journal replay failed')
+            self.last_error = repr(exc)
+        while not self._stopped:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+                self.last_error = None
+            except Exception as exc:
+                # Journals stay sealed on disk and are retried on the next tick
+                logger.exception('Attempt journal flush failed')
+                self.last_error = repr(exc)
+            finally:
+                close_old_connections()
+
+    def stop(self):
+        """Stop the flusher and insert what is left (called at exit)."""
+        self._stopped = True
+        self._wakeup.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=self.interval + 5)
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Final attempt journal flush failed; it will be replayed on next start')
+
+    def status(self):
+        with self._lock:
+            unflushed = self._unflushed
+        return {
+            'enabled': True,
+            'pid': self.pid,
+            'journal': self._path.name if self._path else None,
+            'unflushed': unflushed,
+            'sealed': len(self._sealed),
+            'flushed': self.flushed,
+            'last_flush_at': self.last_flush_at,
+            'last_error': self.last_error,
+        }
+
+
+def replay_journals(directory=None):
+    """
+    Insert the journals of dead workers found in directory (default
+    QUIZ_ATTEMPT_JOURNAL_DIR). Journals still locked by a live worker are
+    skipped. Returns the number of rows handed to the database.
+    """
+    directory = Path(directory or settings.QUIZ_ATTEMPT_JOURNAL_DIR)
+    if not directory.is_dir():
+        return 0
+    replayed = 0
+    for path in sorted(directory.glob(f'*{JOURNAL_SUFFIX}')):
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            continue
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue  # owned by a live worker
+            if not path.exists():
+                continue  # flushed and unlinked by its owner meanwhile
+            records = _read_records(fd)
+            if records:
+                insert_records(records)
+                _clear_pending(directory, records)
+            os.unlink(path)
+            replayed += len(records)
+            logger.info('Replayed %d attempts from %s', len(records), path.name)
+        finally:
+            os.close(fd)
+    return replayed
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_attempt_journal():
+    """Return this process's AttemptJournal (started on first use), or None when disabled."""
+    global _journal
+    directory = settings.QUIZ_ATTEMPT_JOURNAL_DIR
+    if not directory:
+        return None
+    if _journal is not None and _journal.pid == os.getpid():
+        return _journal
+    with _journal_lock:
+        if _journal is None or _journal.pid != os.getpid():
+            # New process (or forked after the journal was started)
+            journal = AttemptJournal(
+                directory,
+                interval=settings.QUIZ_ATTEMPT_FLUSH_INTERVAL,
+                fsync=settings.QUIZ_ATTEMPT_JOURNAL_FSYNC,
+            )
+            journal.start()
+            atexit.register(journal.stop)
+            _journal = journal
+    return _journal
+
+
+def start_attempt_journal():
+    """Start the journal of this worker (replaying orphaned journals); no-op when disabled."""
+    get_attempt_journal()
+
+
+def record_attempt(**fields):
+    """
+    Record a BlockAttempt. Inserted synchronously when write-behind is
+    disabled; otherwise journaled and returned unsaved (pk is None).
+    """
+    journal = get_attempt_journal()
+    if journal is None:
+        with transaction.atomic():
+            attempt = BlockAttempt.objects.create(**fields)
+            record_progress([attempt])
+        return attempt
+    attempt = BlockAttempt(journal_id=uuid.uuid4(), **fields)
+    # Pending entry first, so a flush racing the append always finds it to clear
+    _add_pending(journal.directory, attempt)
+    journal.append(attempt)
+    return attempt
+
+
+def get_attempt_journal_status():
+    """Journal counters of this worker for /ops/status/."""
+    if _journal is None or _journal.pid != os.getpid():
+        return {'enabled': bool(settings.QUIZ_ATTEMPT_JOURNAL_DIR), 'started': False}
+    return _journal.status()
@@ -0,0 +1,250 @@
+"""
+Precompiled binary question bank.
+
+``manage.py compile_question_bank`` turns quiz_data/ into one read-only
+file that quiz.loader memory-maps instead of parsing JSON at startup:
+
+    header    MAGIC, index offset (u64), index length (u64)
+    records   per question: length (u32) + compact JSON, grouped by block
+    index     compact JSON: per subject its title, blockSize, the stamp of
+              the source file it was compiled from, and per block the
+              [offset, end] range of its records; followed by two packed
+              arrays per subject (qids as u32, record offsets as u64,
+              sorted by qid) for qid lookups without decoding anything
+
+Opening a bank reads only the header and the small JSON index; blocks and
+questions are decoded from memoryview slices of the mapping on demand.
+A subject whose source file changed after compiling (stamp mismatch) is
+ignored, so the loader falls back to its JSON until the next compile.
+
+Shared catalog mode (settings.QUIZ_SHARED_CATALOG): every process using
+quiz.loader maps the same file, so the question text lives once in the
+page cache instead of once per process. A process that finds a subject
+stale recompiles it through compile_shared_bank(), which serializes
+concurrent compiles with a lock file next to the bank.
+"""
+import fcntl
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+
+from .shards import atomic_writer
+
+MAGIC = b'GR2BANK1'
+_HEADER = struct.Struct('<8sQQ')
+_LENGTH = struct.Struct('<I')
+
+
+class BankError(Exception):
+    """The file is not a question bank this code can read."""
+
+
+def _encode(record):
+    return json.dumps(record.as_dict(), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def compile_bank(path, subjects, quiz_data_dir):
+    """
+    Write the SubjectCatalogs in subjects to a bank file at path
+    (atomically). Returns the number of questions written.
+    """
+    path = Path(path)
+    quiz_data_dir = Path(quiz_data_dir)
+    index = {'byteorder': sys.byteorder, 'subjects': {}}
+    tables = []
+    count = 0
+    with atomic_writer(path) as f:
+        f.write(_HEADER.pack(MAGIC, 0, 0))
+        offset = _HEADER.size
+        for subject in subjects:
+            blocks = {}
+            qid_offsets = []
+            for block_number in subject.block_numbers:
+                start = offset
+                for record in subject.block_questions(block_number):
+                    data = _encode(record)
+                    f.write(_LENGTH.pack(len(data)))
+                    f.write(data)
+                    qid_offsets.append((record.id, offset))
+                    offset += _LENGTH.size + len(data)
+                    count += 1
+                blocks[str(block_number)] = [start, offset]
+            qid_offsets.sort()
+            stamp = subject.stamp
+            index['subjects'][subject.subject] = {
+                'title': subject.title,
+                'blockSize': subject.block_size,
+                'stamp': [str(Path(stamp[0]).relative_to(quiz_data_dir)), stamp[1], stamp[2]] if stamp else None,
+                'blocks': blocks,
+                'questions': len(qid_offsets),
+            }
+            tables.append((array('I', [q for q, _ in qid_offsets]), array('Q', [o for _, o in qid_offsets])))
+
+        # Packed qid tables after the JSON index, 8-byte aligned
+        index_data = json.dumps(index, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        index_offset = offset
+        f.write(index_data)
+        offset += len(index_data)
+        for qids, offsets in tables:
+            padding = -offset % 8
+            f.write(b'\0' * padding)
+            offset += padding
+            for table in (qids, offsets):
+                data = table.tobytes()
+                f.write(data)
+                offset += len(data)
+                padding = -offset % 8
+                f.write(b'\0' * padding)
+                offset += padding
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, index_offset, len(index_data)))
+    return count
+
+
+def compile_quiz_data(path, quiz_data_dir):
+    """
+    Parse every subject in quiz_data_dir and compile them into a bank at
+    path. Returns (questions written, subjects compiled, missing source
+    FileNotFoundErrors).
+    """
+    from .loader import parse_subject
+    from .subjects import get_subject_registry
+
+    quiz_data_dir = Path(quiz_data_dir)
+    subjects = []
+    missing = []
+    for subject in get_subject_registry():
+        try:
+            subjects.append(parse_subject(quiz_data_dir, subject))
+        except FileNotFoundError as exc:
+            missing.append(exc)
+    return compile_bank(path, subjects, quiz_data_dir), len(subjects), missing
+
+
+def compile_shared_bank(path, quiz_data_dir, is_current=None):
+    """
+    compile_quiz_data() under an exclusive lock on <path>.lock, so workers
+    that find the bank stale at the same time compile it once: the others
+    wait, then see is_current() return True and skip. Returns the result
+    of compile_quiz_data(), or None when skipped.
+    """
+    with open(f'{path}.lock', 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            if is_current is not None and is_current():
+                return None
+            return compile_quiz_data(path, quiz_data_dir)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class BankSubject:
+    """
+    One subject of an open bank, with the SubjectCatalog reading interface
+    of quiz.loader. Blocks and questions are decoded on every access;
+    nothing but the index is kept in memory.
+    """
+    __slots__ = ('subject', 'title', 'block_size', 'block_numbers', 'stamp', 'shard_hashes',
+                 '_view', '_ranges', '_starts', '_qids', '_offsets')
+
+    def __init__(self, subject, meta, view, qids, offsets, stamp):
+        self.subject = subject
+        self.title = meta['title']
+        self.block_size = meta['blockSize']
+        self._ranges = {int(block): tuple(span) for block, span in meta['blocks'].items()}
+        self.block_numbers = tuple(sorted(self._ranges))
+        # Blocks are stored in block order, so their start offsets are sorted too
+        self._starts = [self._ranges[block][0] for block in self.block_numbers]
+        self.stamp = stamp
+        self.shard_hashes = {}
+        self._view = view
+        self._qids = qids
+        self._offsets = offsets
+
+    def _decode(self, offset, block_number):
+        from .loader import QuestionRecord
+
+        (length,) = _LENGTH.unpack_from(self._view, offset)
+        start = offset + _LENGTH.size
+        # str() decodes straight from the mapping, without an intermediate bytes copy
+        return QuestionRecord(json.loads(str(self._view[start:start + length], 'utf-8')), block_number)
+
+    def _block_of(self, offset):
+        return self.block_numbers[bisect_right(self._starts, offset) - 1]
+
+    def block_questions(self, block_number):
+        span = self._ranges.get(block_number)
+        if span is None:
+            return ()
+        offset, end = span
+        records = []
+        while offset < end:
+            records.append(self._decode(offset, block_number))
+            (length,) = _LENGTH.unpack_from(self._view, offset)
+            offset += _LENGTH.size + length
+        return tuple(records)
+
+    def question(self, qid):
+        position = bisect_left(self._qids, qid)
+        if position == len(self._qids) or self._qids[position] != qid:
+            return None
+        offset = self._offsets[position]
+        return self._decode(offset, self._block_of(offset))
+
+    @property
+    def questions(self):
+        return tuple(q for block_number in self.block_numbers for q in self.block_questions(block_number))
+
+
+class QuestionBank:
+    """A memory-mapped bank file. Subjects are read through memoryview slices."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            stat = os.fstat(f.fileno())
+        self.stamp = (stat.st_mtime_ns, stat.st_size)
+        self._view = memoryview(self._mmap)
+        magic, index_offset, index_length = _HEADER.unpack_from(self._view, 0)
+        if magic != MAGIC:
+            raise BankError(f'{self.path} is not a question bank')
+        self.index = json.loads(self._view[index_offset:index_offset + index_length].tobytes())
+        if self.index['byteorder'] != sys.byteorder:
+            raise BankError(f'{self.path} was compiled on a {self.index["byteorder"]}-endian machine')
+
+        self._tables = {}
+        offset = index_offset + index_length
+        for subject, meta in self.index['subjects'].items():
+            count = meta['questions']
+            offset += -offset % 8
+            qids = self._view[offset:offset + 4 * count].cast('I')
+            offset += 4 * count
+            offset += -offset % 8
+            offsets = self._view[offset:offset + 8 * count].cast('Q')
+            offset += 8 * count
+            self._tables[subject] = (qids, offsets)
+
+    def subject(self, subject_id, quiz_data_dir):
+        """
+        Return the BankSubject of a subject, or None if the bank has no
+        copy of it or its source changed since the bank was compiled.
+        """
+        from .loader import _source_stamp
+        from .subjects import get_subject_registry
+
+        meta = self.index['subjects'].get(subject_id)
+        subject = get_subject_registry().get(subject_id)
+        if meta is None or subject is None or meta['stamp'] is None:
+            return None
+        relpath, mtime_ns, size = meta['stamp']
+        stamp = (str(Path(quiz_data_dir) / relpath), mtime_ns, size)
+        if _source_stamp(quiz_data_dir, subject) != stamp:
+            return None
+        qids, offsets = self._tables[subject_id]
+        return BankSubject(subject_id, meta, self._view, qids, offsets, stamp)
@@ -0,0 +1,142 @@
+"""
+Versioned per-block question bundle cache.
+Shared by the quiz views (block_take, block_submit) and the public learn
+views so a warm block page is served without any SQL queries.
+
+Each subject has a content version stored in the cache. Bundle keys embed
+that version, so bumping it (from the Question signals in quiz/signals.py)
+makes every cached bundle of the subject unreachable at once.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+BUNDLE_TIMEOUT = 60 * 60 * 24
+VERSION_KEY = 'quiz:content-version:{subject}'
+BUNDLE_KEY = 'quiz:block-bundle:{subject}:{block_number}:v{version}'
+
+
+def get_quiz_cache():
+    """Return the cache used for quiz content (QUIZ_CACHE_ALIAS, default 'default')."""
+    return caches[getattr(settings, 'QUIZ_CACHE_ALIAS', 'default')]
+
+
+def _new_version():
+    # Time-based so a version lost to eviction never collides with an older one
+    return int(time.time() * 1000)
+
+
+def get_version(key):
+    """Return the version stored under key, initializing it if missing."""
+    cache = get_quiz_cache()
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    """Move the version stored under key forward and return the new value."""
+    cache = get_quiz_cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _new_version()
+        cache.set(key, version, None)
+        return version
+
+
+def get_content_version(subject):
+    """Return the current content version for a subject."""
+    return get_version(VERSION_KEY.format(subject=subject))
+
+
+def bump_content_version(subject):
+    """Invalidate every cached bundle of a subject by moving to a new version."""
+    return bump_version(VERSION_KEY.format(subject=subject))
+
+
+def serialize_question(question):
+    """Flatten a Question into the plain dict stored in a block bundle."""
+    return {
+        'pk': question.pk,
+        'qid': question.qid,
+        'subject': question.subject,
+        'block_number': question.block_number,
+        'text': question.text,
+        'option_a': question.option_a,
+        'option_b': question.option_b,
+        'option_c': question.option_c,
+        'correct': question.correct,
+        'explanation': question.explanation,
+        'image_base': question.image_base,
+        'edited_at': question.edited_at,
+        'has_answer': bool(question.correct),
+        'has_explanation': bool(question.explanation and question.explanation.strip()),
+        'images': question.image_context(),
+    }
+
+
+def build_block_bundle(subject, block_number):
+    """
+    Build the bundle for one block straight from the database.
+
+    Returns a dict with:
+        questions: list of serialized questions ordered by qid
+        positions: {qid: index into questions}
+        answer_key: {qid: correct letter or None}
+    """
+    from .models import Question
+
+    questions = [
+        serialize_question(question)
+        for question in Question.objects.filter(
+            subject=subject,
+            block_number=block_number,
+        ).order_by('qid')
+    ]
+    return {
+        'subject': subject,
+        'block_number': block_number,
+        'questions': questions,
+        'positions': {q['qid']: idx for idx, q in enumerate(questions)},
+        'answer_key': {q['qid']: q['correct'] for q in questions},
+    }
+
+
+def _bundle_key(subject, block_number):
+    return BUNDLE_KEY.format(
+        subject=subject,
+        block_number=block_number,
+        version=get_content_version(subject),
+    )
+
+
+def get_block_bundle(subject, block_number):
+    """
+    Return the cached bundle for (subject, block_number), building it on a miss.
+    Returns None if the block has no questions.
+    """
+    cache = get_quiz_cache()
+    key = _bundle_key(subject, block_number)
+    bundle = cache.get(key)
+    if bundle is None:
+        bundle = build_block_bundle(subject, block_number)
+        cache.set(key, bundle, BUNDLE_TIMEOUT)
+    return bundle if bundle['questions'] else None
+
+
+def get_cached_block_bundle(subject, block_number):
+    """Return the bundle only if it is already cached (never builds), else None."""
+    bundle = get_quiz_cache().get(_bundle_key(subject, block_number))
+    return bundle if bundle and bundle['questions'] else None
+
+
+def get_bundle_question(bundle, qid):
+    """Return the serialized question with the given qid from a bundle, or None."""
+    position = bundle['positions'].get(qid)
+    if position is None:
+        return None
+    return bundle['questions'][position]
@@ -0,0 +1,138 @@
+"""
+Catalog statistics for subjects and blocks.
+
+Per-block question counts, answered/explained counts and last-modified
+times live in the BlockStats table, kept up to date from the Question
+signals (see quiz/signals.py). Readers get the whole catalog from
+get_catalog_stats(): one query on a cold cache, none when cached.
+"""
+from collections import namedtuple
+
+from django.db import transaction
+from django.db.models import Count, Max, Q
+
+from .block_cache import bump_version, get_quiz_cache, get_version
+from .models import BlockStats, Question
+
+CATALOG_TIMEOUT = 60 * 60 * 24
+CATALOG_VERSION_KEY = 'quiz:catalog-version'
+CATALOG_KEY = 'quiz:catalog:v{version}'
+
+BlockSummary = namedtuple(
+    'BlockSummary',
+    'subject block_number question_count answered_count explained_count last_modified',
+)
+SubjectSummary = namedtuple(
+    'SubjectSummary',
+    'subject block_count question_count answered_count explained_count last_modified',
+)
+
+
+class CatalogStats:
+    """Immutable snapshot of the catalog statistics."""
+
+    def __init__(self, blocks):
+        self._blocks = {}
+        for block in blocks:
+            self._blocks.setdefault(block.subject, []).append(block)
+        self._subjects = {
+            subject: _summarize(subject, subject_blocks)
+            for subject, subject_blocks in self._blocks.items()
+        }
+
+    def blocks(self, subject):
+        """Return the BlockSummary list of a subject, ordered by block number."""
+        return self._blocks.get(subject, [])
+
+    def block(self, subject, block_number):
+        """Return the BlockSummary of one block, or None."""
+        for block in self._blocks.get(subject, ()):
+            if block.block_number == block_number:
+                return block
+        return None
+
+    def subject(self, subject):
+        """Return the SubjectSummary of a subject (zeros if it has no questions)."""
+        return self._subjects.get(subject) or _summarize(subject, [])
+
+    def total(self):
+        """Return a SubjectSummary across all subjects (subject=None)."""
+        return _summarize(None, [b for blocks in self._blocks.values() for b in blocks])
+
+
+def _summarize(subject, blocks):
+    modified = [b.last_modified for b in blocks if b.last_modified]
+    return SubjectSummary(
+        subject=subject,
+        block_count=len(blocks),
+        question_count=sum(b.question_count for b in blocks),
+        answered_count=sum(b.answered_count for b in blocks),
+        explained_count=sum(b.explained_count for b in blocks),
+        last_modified=max(modified) if modified else None,
+    )
+
+
+def _block_aggregates(queryset):
+    return queryset.order_by().values('subject', 'block_number').annotate(
+        question_count=Count('id'),
+        answered_count=Count('id', filter=Q(correct__isnull=False) & ~Q(correct='')),
+        explained_count=Count('id', filter=~Q(explanation='')),
+        last_modified=Max('edited_at'),
+    )
+
+
+def get_catalog_stats():
+    """Return the cached CatalogStats snapshot, loading it on a miss."""
+    cache = get_quiz_cache()
+    key = CATALOG_KEY.format(version=get_version(CATALOG_VERSION_KEY))
+    catalog = cache.get(key)
+    if catalog is None:
+        catalog = CatalogStats([
+            BlockSummary(*row)
+            for row in BlockStats.objects.order_by('subject', 'block_number').values_list(
+                'subject', 'block_number', 'question_count',
+                'answered_count', 'explained_count', 'last_modified',
+            )
+        ])
+        cache.set(key, catalog, CATALOG_TIMEOUT)
+    return catalog
+
+
+def invalidate_catalog_stats():
+    """Drop the cached snapshot, now and again after commit."""
+    bump_version(CATALOG_VERSION_KEY)
+    transaction.on_commit(lambda: bump_version(CATALOG_VERSION_KEY))
+
+
+def refresh_block_stats(subject, block_number):
+    """Recompute the BlockStats row of one block from its questions."""
+    rows = list(_block_aggregates(Question.objects.filter(subject=subject, block_number=block_number)))
+    if rows:
+        row = rows[0]
+        BlockStats.objects.update_or_create(
+            subject=subject,
+            block_number=block_number,
+            defaults={
+                'question_count': row['question_count'],
+                'answered_count': row['answered_count'],
+                'explained_count': row['explained_count'],
+                'last_modified': row['last_modified'],
+            },
+        )
+    else:
+        BlockStats.objects.filter(subject=subject, block_number=block_number).delete()
+    invalidate_catalog_stats()
+
+
+@transaction.atomic
+def rebuild_catalog_stats(subject=None):
+    """Rebuild BlockStats from scratch (all subjects, or one). Returns row count."""
+    questions = Question.objects.all()
+    stats = BlockStats.objects.all()
+    if subject:
+        questions = questions.filter(subject=subject)
+        stats = stats.filter(subject=subject)
+    stats.delete()
+    created = BlockStats.objects.bulk_create([BlockStats(**row) for row in _block_aggregates(questions)])
+    invalidate_catalog_stats()
+    return len(created)
@@ -0,0 +1,61 @@
+"""
+Conditional GET support (ETag / 304) for block pages.
+
+Validators come from a cheap fingerprint of the block or subject: the
+latest ``edited_at``, the question count and TEMPLATE_VERSION, read from
+the cached block bundle or the catalog stats, plus the subject's content
+version (block_cache) or the catalog stats version. The versions are
+bumped by every save, import and rescan_images, so bulk writes that leave
+``edited_at`` alone still change the ETag. The fingerprint is computed
+once per request and checked by Django's ``condition`` decorator before
+the view runs, so a 304 never renders a template or builds JSON-LD.
+
+No Last-Modified is sent: imports, rescan_images and deletions change
+pages without moving any ``edited_at`` forward, so a date validator would
+answer If-Modified-Since with 304s over changed content.
+"""
+import hashlib
+
+from django.views.decorators.http import condition
+
+from .block_cache import get_block_bundle, get_content_version
+
+# Bump whenever a learn/quiz template changes so clients drop cached HTML
+TEMPLATE_VERSION = '1'
+
+
+def make_fingerprint(*parts):
+    """Hash the given parts (plus TEMPLATE_VERSION) into an ETag."""
+    raw = '|'.join(str(part) for part in (TEMPLATE_VERSION, *parts))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def block_stats(subject, block_number):
+    """
+    Return (question_count, latest edited_at, content version) for a block,
+    read from the cached block bundle so a warm block needs no SQL. Count
+    is 0 if missing.
+    """
+    version = get_content_version(subject)
+    bundle = get_block_bundle(subject, block_number)
+    if bundle is None:
+        return 0, None, version
+    edited = [q['edited_at'] for q in bundle['questions'] if q['edited_at']]
+    return len(bundle['questions']), max(edited) if edited else None, version
+
+
+def conditional_page(fingerprint_func):
+    """
+    Decorator emitting an ETag and answering 304s.
+
+    fingerprint_func(request, *args, **kwargs) returns the ETag (see
+    make_fingerprint), or None to skip conditional handling (e.g. unknown
+    slug, pending messages).
+    """
+    def etag_func(request, *args, **kwargs):
+        # condition() asks once for the check and once for the response header
+        if not hasattr(request, '_quiz_fingerprint'):
+            request._quiz_fingerprint = fingerprint_func(request, *args, **kwargs)
+        return request._quiz_fingerprint
+
+    return condition(etag_func=etag_func)
@@ -0,0 +1,362 @@
+"""
+JSON export of the question bank to quiz_data/.
+
+export_subject() writes one subject as block shards plus manifest.json
+(quiz/shards.py; only changed shards are rewritten), as the legacy single
+file quiz_data/<subject>.json, or both (settings.QUIZ_EXPORT_FORMAT).
+Rows are streamed from the database with .iterator() and written
+incrementally; every file is written atomically (temp file plus rename),
+so readers never see a half-written file. The export_questions command
+calls it directly (through export_subjects(), which can fan subjects out
+to a process pool); Question saves and deletes go through the coalescing
+ExportWorker instead (see quiz/signals.py):
+
+    - schedule_export(subject) marks the subject dirty and returns at once;
+    - a background thread exports the dirty subjects once no new edit has
+      arrived for QUIZ_EXPORT_QUIET_PERIOD seconds (or QUIZ_EXPORT_MAX_DELAY
+      after the first pending edit, whichever comes first);
+    - whatever is still pending is exported when the process exits.
+
+Twenty edits in a row therefore cost one rewrite, off the request thread.
+get_export_status() reports pending subjects and the last exports on
+/ops/status/.
+"""
+import atexit
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+
+from .models import Question
+from .shards import EXPORT_FORMATS, atomic_writer, read_current_manifest, subject_dir, write_block_shards
+from .subjects import get_subject_registry
+
+logger = logging.getLogger('quiz.exporter')
+
+# paths: files/directories written; written/unchanged: files rewritten or skipped
+ExportResult = namedtuple('ExportResult', 'paths questions written unchanged')
+
+# Rows fetched per database round trip while streaming an export
+EXPORT_CHUNK_SIZE = 2000
+
+# Columns serialize_export_question() reads
+EXPORT_FIELDS = (
+    "qid", "text", "option_a", "option_b", "option_c",
+    "correct", "explanation", "block_number", "image_base",
+)
+
+
+def get_quiz_data_dir():
+    """Directory holding the exported JSON files (settings.QUIZ_DATA_DIR)."""
+    return Path(getattr(settings, 'QUIZ_DATA_DIR', Path(settings.BASE_DIR) / 'quiz_data'))
+
+
+def serialize_export_question(question):
+    """Return the JSON export representation of a Question."""
+    return {
+        "id": question.qid,
+        "question": question.text,
+        "options": {
+            "a": question.option_a,
+            "b": question.option_b,
+            "c": question.option_c,
+        },
+        "correct": question.correct,
+        "explanation": question.explanation or "",
+        "block": question.block_number,
+        # image_base lets external tools derive image filenames
+        "image_base": question.image_base or None,
+    }
+
+
+# Bytes read from the start of a legacy file to find its title and blockSize
+_METADATA_HEAD = 64 * 1024
+_TITLE_RE = re.compile(r'"title"\s*:\s*("(?:[^"\\]|\\.)*")')
+_BLOCK_SIZE_RE = re.compile(r'"blockSize"\s*:\s*(\d+)')
+
+
+def _existing_metadata(subject, quiz_data_dir):
+    """Top-level metadata (title, blockSize) of the current shards or legacy file."""
+    manifest = read_current_manifest(quiz_data_dir, subject)
+    if manifest is not None:
+        return manifest
+    legacy_path = quiz_data_dir / subject.data_file
+    if legacy_path.exists():
+        try:
+            # Exported files start with their metadata: avoid parsing the
+            # whole bank just for two fields
+            with open(legacy_path, encoding="utf-8") as f:
+                head = f.read(_METADATA_HEAD)
+            title = _TITLE_RE.search(head)
+            block_size = _BLOCK_SIZE_RE.search(head)
+            if title and block_size:
+                return {"title": json.loads(title.group(1)), "blockSize": int(block_size.group(1))}
+            return json.loads(legacy_path.read_text(encoding="utf-8"))
+        except Exception:
+            pass
+    return {}
+
+
+def _iter_questions(subject_id, order_by, chunk_size):
+    """Stream a subject's questions as export dicts, chunk_size rows per fetch."""
+    queryset = (
+        Question.objects.filter(subject=subject_id)
+        .order_by(*order_by)
+        .only(*EXPORT_FIELDS)
+    )
+    for question in queryset.iterator(chunk_size=chunk_size):
+        yield serialize_export_question(question)
+
+
+def write_legacy_file(out_path, header, questions, compact=False):
+    """
+    Stream the legacy single-file document (header dict plus a "questions"
+    list) to out_path atomically, one question at a time. The indented
+    output is byte-identical to json.dumps(..., indent=2).
+    """
+    with atomic_writer(out_path, "w", encoding="utf-8") as f:
+        if compact:
+            f.write(json.dumps(header, ensure_ascii=False, separators=(",", ":"))[:-1])
+            f.write(',"questions":[')
+            for i, question in enumerate(questions):
+                if i:
+                    f.write(",")
+                f.write(json.dumps(question, ensure_ascii=False, separators=(",", ":")))
+            f.write("]}")
+            return
+        f.write(json.dumps(header, ensure_ascii=False, indent=2)[:-2])
+        f.write(',\n  "questions": [')
+        empty = True
+        for question in questions:
+            f.write("\n    " if empty else ",\n    ")
+            f.write(json.dumps(question, ensure_ascii=False, indent=2).replace("\n", "\n    "))
+            empty = False
+        f.write("]\n}" if empty else "\n  ]\n}")
+
+
+def export_subject(subject_id, quiz_data_dir=None, export_format=None, compact=False,
+                   chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Export one subject's questions in export_format ('sharded', 'legacy' or
+    'both'; default settings.QUIZ_EXPORT_FORMAT). Rows are streamed from
+    the database chunk_size at a time and written incrementally, so memory
+    stays flat whatever the size of the bank; compact drops the
+    indentation of the legacy file (shards are always compact).
+    Returns an ExportResult, or None for an unknown subject.
+    """
+    subject = get_subject_registry().get(subject_id)
+    if subject is None:
+        return None
+    export_format = export_format or settings.QUIZ_EXPORT_FORMAT
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+    quiz_data_dir = Path(quiz_data_dir or get_quiz_data_dir())
+
+    # Preserve existing top-level metadata (title, blockSize, etc.)
+    base_data = _existing_metadata(subject, quiz_data_dir)
+    title = base_data.get("title") or subject.title
+    block_size = base_data.get("blockSize", 20)
+
+    written = unchanged = 0
+    paths = []
+    # One read transaction: the count and the streamed rows see the same snapshot
+    with transaction.atomic():
+        question_count = Question.objects.filter(subject=subject_id).count()
+        if export_format in ('sharded', 'both'):
+            directory = subject_dir(quiz_data_dir, subject_id)
+            blocks = (
+                (block_number, list(questions))
+                for block_number, questions in groupby(
+                    _iter_questions(subject_id, ("block_number", "qid"), chunk_size),
+                    key=itemgetter("block"),
+                )
+            )
+            written, unchanged, _ = write_block_shards(directory, subject_id, title, block_size, blocks)
+            paths.append(directory)
+        if export_format in ('legacy', 'both'):
+            header = {
+                "title": title,
+                "subject": subject_id,
+                "blockSize": block_size,
+                "questionCount": question_count,
+            }
+            out_path = quiz_data_dir / subject.data_file
+            write_legacy_file(out_path, header, _iter_questions(subject_id, ("qid",), chunk_size), compact)
+            written += 1
+            paths.append(out_path)
+    return ExportResult(paths, question_count, written, unchanged)
+
+
+def _init_export_process():
+    # Forked workers inherit the configured project; spawned ones set it up
+    if not apps.ready:
+        django.setup()
+
+
+def export_subjects(subject_ids, quiz_data_dir=None, export_format=None, compact=False,
+                    chunk_size=EXPORT_CHUNK_SIZE, jobs=1):
+    """
+    Export several subjects, concurrently in a pool of up to jobs worker
+    processes when jobs > 1. Returns {subject: ExportResult} in input order.
+    """
+    subject_ids = list(subject_ids)
+    quiz_data_dir = Path(quiz_data_dir or get_quiz_data_dir())
+    export_format = export_format or settings.QUIZ_EXPORT_FORMAT
+    args = (quiz_data_dir, export_format, compact, chunk_size)
+    if jobs <= 1 or len(subject_ids) <= 1:
+        return {subject_id: export_subject(subject_id, *args) for subject_id in subject_ids}
+
+    # Workers must open their own connections, not share the parent's
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=min(jobs, len(subject_ids)),
+                             initializer=_init_export_process) as pool:
+        futures = {subject_id: pool.submit(export_subject, subject_id, *args) for subject_id in subject_ids}
+        return {subject_id: future.result() for subject_id, future in futures.items()}
+
+
+class ExportWorker:
+    """Coalescing, debounced exporter of dirty subjects."""
+
+    def __init__(self, quiet_period, max_delay, quiz_data_dir=None):
+        self.quiet_period = quiet_period
+        self.max_delay = max_delay
+        self.quiz_data_dir = quiz_data_dir
+        self.pid = os.getpid()
+        self._cond = threading.Condition()
+        self._dirty = {}  # subject -> monotonic time of its first pending edit
+        self._last_change = 0.0
+        self._stopped = False
+        self._thread = None
+        self.scheduled = 0
+        self.exported = 0
+        self.last_exports = {}  # subject -> {'at', 'questions', 'seconds'}
+        self.last_error = None
+
+    def schedule(self, subject_id, background=True):
+        """Mark a subject dirty; background=False leaves flushing to the caller."""
+        with self._cond:
+            now = time.monotonic()
+            self._dirty.setdefault(subject_id, now)
+            self._last_change = now
+            self.scheduled += 1
+            self._cond.notify()
+            if background and self._thread is None and not self._stopped:
+                self._thread = threading.Thread(target=self._run, name='quiz-json-export', daemon=True)
+                self._thread.start()
+
+    def _due_in(self):
+        """Seconds until the pending subjects should be exported (<= 0: now)."""
+        now = time.monotonic()
+        quiet_due = self._last_change + self.quiet_period
+        max_due = min(self._dirty.values()) + self.max_delay
+        return min(quiet_due, max_due) - now
+
+    def _take_dirty(self):
+        subjects = list(self._dirty)
+        self._dirty.clear()
+        return subjects
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._dirty and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return  # stop() exports what is left
+                while not self._stopped and self._due_in() > 0:
+                    self._cond.wait(self._due_in())
+                subjects = self._take_dirty()
+            self._export(subjects)
+            close_old_connections()
+
+    def _export(self, subjects):
+        for subject_id in subjects:
+            start = time.monotonic()
+            try:
+                result = export_subject(subject_id, self.quiz_data_dir)
+            except Exception as exc:
+                # Logged, never raised: a failed export must not affect requests.
+                # The next edit of the subject retries it.
+                logger.error(f"Failed to auto-export {subject_id} to JSON: {exc}", exc_info=True)
+                self.last_error = {'subject': subject_id, 'error': repr(exc), 'at': time.time()}
+                continue
+            self.exported += 1
+            self.last_exports[subject_id] = {
+                'at': time.time(),
+                'questions': result.questions if result else 0,
+                'files_written': result.written if result else 0,
+                'seconds': round(time.monotonic() - start, 3),
+            }
+
+    def flush(self):
+        """Export every pending subject now, in the calling thread."""
+        with self._cond:
+            subjects = self._take_dirty()
+        self._export(subjects)
+        return subjects
+
+    def stop(self):
+        """Stop the thread and export what is still pending (called at exit)."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+        self.flush()
+
+    def status(self):
+        with self._cond:
+            pending = sorted(self._dirty)
+            due_in = max(self._due_in(), 0.0) if self._dirty else None
+        return {
+            'pending': pending,
+            'due_in': round(due_in, 3) if due_in is not None else None,
+            'scheduled': self.scheduled,
+            'exported': self.exported,
+            'last_exports': self.last_exports,
+            'last_error': self.last_error,
+        }
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_export_worker():
+    """Return this process's ExportWorker, creating it on first use (and after fork)."""
+    global _worker
+    if _worker is not None and _worker.pid == os.getpid():
+        return _worker
+    with _worker_lock:
+        if _worker is None or _worker.pid != os.getpid():
+            worker = ExportWorker(
+                quiet_period=settings.QUIZ_EXPORT_QUIET_PERIOD,
+                max_delay=settings.QUIZ_EXPORT_MAX_DELAY,
+            )
+            atexit.register(worker.stop)
+            _worker = worker
+    return _worker
+
+
+def schedule_export(subject_id):
+    """Queue a debounced background export of one subject."""
+    get_export_worker().schedule(subject_id)
+
+
+def get_export_status():
+    """Export worker status of this process for /ops/status/."""
+    if _worker is None or _worker.pid != os.getpid():
+        return {'pending': [], 'scheduled': 0, 'exported': 0}
+    return _worker.status()
@@ -0,0 +1,172 @@
+"""
+Grading engine over compact per-block answer keys.
+
+An AnswerKey holds the block's qids in order, one byte per question with
+the correct letter (0 for ungradable questions, whose answer is None) and a bitmask of gradable
+positions. Keys are cached next to the block bundles and share the
+subject content version (quiz/block_cache.py), so question edits
+invalidate them too. Grading a submission is a single pass over the key
+with no ORM access; the result page then hydrates question text from the
+cached block bundle, or from one only() query when the bundle is cold.
+"""
+from collections import namedtuple
+
+from .block_cache import (
+    BUNDLE_TIMEOUT, get_cached_block_bundle, get_content_version, get_quiz_cache
+)
+
+ANSWER_KEY = 'quiz:answer-key:{subject}:{block_number}:v{version}'
+
+# Byte of a blank correct answer (''): gradable, like any other letter, and
+# only matched by a blank answer; None alone marks a question ungradable
+_BLANK = 1
+# byte value -> answer letter, so grading compares str to str
+_LETTERS = tuple('' if i == _BLANK else chr(i) for i in range(256))
+
+# correct: tuple of True/False per question, None for ungradable questions
+GradeResult = namedtuple('GradeResult', 'score total percentage answers correct')
+
+
+class AnswerKey:
+    """Immutable answer key of one block."""
+    __slots__ = ('subject', 'block_number', 'qids', 'fields', 'letters', 'gradable', 'total')
+
+    def __init__(self, subject, block_number, rows):
+        """rows: (qid, correct letter, '' or None) pairs ordered by qid."""
+        self.subject = subject
+        self.block_number = block_number
+        self.qids = tuple(qid for qid, _ in rows)
+        self.fields = tuple(f'question_{qid}' for qid in self.qids)
+        self.letters = bytes(
+            0 if correct is None else _BLANK if correct == '' else ord(correct) for _, correct in rows
+        )
+        self.gradable = sum(1 << i for i, byte in enumerate(self.letters) if byte)
+        self.total = bin(self.gradable).count('1')
+
+    def __len__(self):
+        return len(self.qids)
+
+    def correct_answer(self, position):
+        """Return the correct letter at position, or None if ungradable."""
+        byte = self.letters[position]
+        return _LETTERS[byte] if byte else None
+
+    def grade(self, answers):
+        """
+        Grade one submission. answers maps 'question_<qid>' to the chosen
+        letter (a QueryDict or a plain dict). Returns a GradeResult.
+        """
+        letters = self.letters
+        score = 0
+        user_answers = []
+        correct = []
+        for position, field in enumerate(self.fields):
+            answer = answers.get(field)
+            user_answers.append(answer)
+            byte = letters[position]
+            if not byte:
+                correct.append(None)
+                continue
+            is_correct = answer == _LETTERS[byte]
+            score += is_correct
+            correct.append(is_correct)
+        percentage = (score / self.total * 100) if self.total > 0 else 0.0
+        return GradeResult(score, self.total, percentage, tuple(user_answers), tuple(correct))
+
+
+def build_answer_key(subject, block_number):
+    """Build the answer key from the cached bundle, or from (qid, correct) rows."""
+    bundle = get_cached_block_bundle(subject, block_number)
+    if bundle is not None:
+        rows = [(q['qid'], q['correct']) for q in bundle['questions']]
+    else:
+        from .models import Question
+
+        rows = list(
+            Question.objects.filter(subject=subject, block_number=block_number)
+            .order_by('qid')
+            .values_list('qid', 'correct')
+        )
+    return AnswerKey(subject, block_number, rows)
+
+
+def get_answer_key(subject, block_number):
+    """
+    Return the cached AnswerKey for a block, building it on a miss.
+    Returns None if the block has no questions.
+    """
+    cache = get_quiz_cache()
+    key = ANSWER_KEY.format(
+        subject=subject,
+        block_number=block_number,
+        version=get_content_version(subject),
+    )
+    answer_key = cache.get(key)
+    if answer_key is None:
+        answer_key = build_answer_key(subject, block_number)
+        cache.set(key, answer_key, BUNDLE_TIMEOUT)
+    return answer_key if len(answer_key) else None
+
+
+def grade_submission(subject, block_number, answers):
+    """Grade one submission. Returns (AnswerKey, GradeResult), or (None, None) for an empty block."""
+    answer_key = get_answer_key(subject, block_number)
+    if answer_key is None:
+        return None, None
+    return answer_key, answer_key.grade(answers)
+
+
+def grade_many(submissions):
+    """
+    Grade many submissions at once (load tests, offline sync).
+
+    submissions: iterable of (subject, block_number, answers).
+    Returns a list of GradeResult (None for empty blocks) in input order;
+    each block's answer key is fetched once.
+    """
+    keys = {}
+    results = []
+    for subject, block_number, answers in submissions:
+        block = (subject, block_number)
+        if block not in keys:
+            keys[block] = get_answer_key(subject, block_number)
+        answer_key = keys[block]
+        results.append(answer_key.grade(answers) if answer_key is not None else None)
+    return results
+
+
+def hydrate_results(answer_key, result):
+    """
+    Return the per-question result dicts for the result page.
+
+    Question text and explanation come from the cached block bundle, or
+    from a single only() query when the bundle is not cached.
+    """
+    bundle = get_cached_block_bundle(answer_key.subject, answer_key.block_number)
+    if bundle is not None:
+        questions = {q['qid']: q for q in bundle['questions']}
+    else:
+        from .models import Question
+
+        questions = {
+            q.qid: {'qid': q.qid, 'text': q.text, 'explanation': q.explanation}
+            for q in Question.objects.filter(
+                subject=answer_key.subject,
+                block_number=answer_key.block_number,
+            ).only('qid', 'text', 'explanation')
+        }
+
+    results = []
+    for position, qid in enumerate(answer_key.qids):
+        question = questions.get(qid)
+        if question is None:
+            # Deleted between grading and hydration
+            continue
+        results.append({
+            'question': question,
+            'user_answer': result.answers[position],
+            'correct_answer': answer_key.correct_answer(position),
+            'is_correct': result.correct[position],
+            'explanation': question['explanation'],
+        })
+    return results
@@ -0,0 +1,146 @@
+"""
+In-memory manifest of question images.
+Indexes static/img/<subject>/ once per process so image lookups are a
+dict access instead of a staticfiles finder walk plus filesystem stats.
+"""
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+IMAGE_ROOT = 'img'
+IMAGE_EXTENSION = '.png'
+
+
+class ImageEntry:
+    """A single indexed image file."""
+    __slots__ = ('relative_path', 'path', 'url')
+
+    def __init__(self, relative_path, path, url):
+        self.relative_path = relative_path
+        self.path = path
+        self.url = url
+
+
+class ImageManifest:
+    """
+    Index of the PNG files under static/img/<subject>/.
+
+    Entries are keyed by (subject, base, option_number). A file named
+    ``qe23_1.png`` is reachable both as ('electrotehnica', 'qe23', 1) and as
+    ('electrotehnica', 'qe23_1', None), so custom ``image_base`` values that
+    themselves end in ``_<n>`` still resolve.
+    """
+
+    def __init__(self, entries, files_by_subject):
+        self._entries = entries
+        self._files_by_subject = files_by_subject
+
+    @classmethod
+    def build(cls):
+        """Walk the static image directories once and return a new manifest."""
+        entries = {}
+        files_by_subject = {}
+
+        def add(relative_path, path, url):
+            parts = relative_path.split('/', 2)
+            if len(parts) < 3 or parts[0] != IMAGE_ROOT:
+                return
+            subject, name = parts[1], parts[2]
+            if not name.endswith(IMAGE_EXTENSION):
+                return
+            stem = name[:-len(IMAGE_EXTENSION)]
+            key = (subject, stem, None)
+            if key in entries:
+                # First location wins, same as the staticfiles finders
+                return
+            entry = ImageEntry(relative_path, path, url)
+            entries[key] = entry
+            files_by_subject.setdefault(subject, []).append(entry)
+
+            base, sep, option = stem.rpartition('_')
+            if sep and option.isdigit():
+                entries.setdefault((subject, base, int(option)), entry)
+
+        # Staticfiles finders first (same precedence as check_static_file_exists)
+        from django.contrib.staticfiles import finders
+        from django.contrib.staticfiles.storage import staticfiles_storage
+        for finder in finders.get_finders():
+            for relative_path, storage in finder.list([]):
+                relative_path = relative_path.replace('\\', '/')
+                if not relative_path.startswith(f'{IMAGE_ROOT}/'):
+                    continue
+                add(relative_path, storage.path(relative_path), staticfiles_storage.url(relative_path))
+
+        # Fallbacks: STATICFILES_DIRS and BASE_DIR/static
+        static_dirs = []
+        for static_dir in settings.STATICFILES_DIRS:
+            if isinstance(static_dir, (list, tuple)):
+                static_dir = static_dir[1]
+            static_dirs.append(Path(static_dir))
+        static_dirs.append(Path(settings.BASE_DIR) / 'static')
+
+        for static_dir in static_dirs:
+            image_dir = static_dir / IMAGE_ROOT
+            if not image_dir.is_dir():
+                continue
+            for path in image_dir.rglob(f'*{IMAGE_EXTENSION}'):
+                relative_path = path.relative_to(static_dir).as_posix()
+                add(relative_path, str(path), f"{settings.STATIC_URL}{relative_path}")
+
+        for files in files_by_subject.values():
+            files.sort(key=lambda entry: entry.relative_path)
+
+        return cls(entries, files_by_subject)
+
+    def get(self, subject, base, option_number=None):
+        """Return the ImageEntry for (subject, base, option_number) or None."""
+        return self._entries.get((subject, base, option_number))
+
+    def lookup(self, subject, base, option_number=None):
+        """Return the static URL for (subject, base, option_number) or None."""
+        entry = self._entries.get((subject, base, option_number))
+        return entry.url if entry else None
+
+    def files(self, subject):
+        """Return all indexed image entries for a subject, sorted by path."""
+        return list(self._files_by_subject.get(subject, ()))
+
+    def __len__(self):
+        return sum(len(files) for files in self._files_by_subject.values())
+
+
+_manifest = None
+_manifest_lock = threading.Lock()
+
+
+def get_image_manifest():
+    """Return the process-wide image manifest, building it on first use."""
+    global _manifest
+    manifest = _manifest
+    if manifest is None:
+        with _manifest_lock:
+            if _manifest is None:
+                _manifest = ImageManifest.build()
+            manifest = _manifest
+    return manifest
+
+
+def rebuild_image_manifest():
+    """Re-scan the static image directories and swap in a fresh manifest."""
+    global _manifest
+    manifest = ImageManifest.build()
+    with _manifest_lock:
+        _manifest = manifest
+    return manifest
+
+
+@receiver(setting_changed)
+def _reset_image_manifest(setting, **kwargs):
+    """Drop the cached manifest when static settings change (tests)."""
+    global _manifest
+    if setting in {'STATICFILES_DIRS', 'STATIC_URL', 'STATIC_ROOT', 'STATICFILES_FINDERS', 'STORAGES'}:
+        with _manifest_lock:
+            _manifest = None
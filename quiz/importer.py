@@ -0,0 +1,207 @@
+"""
+Bulk, diff-based question import (used by ``manage.py import_questions``).
+
+import_subject() loads a subject's existing questions in one query, diffs
+the source records against them in memory and applies the result with
+batched bulk_create()/bulk_update() statements. The rules match the old
+per-row import: text, options and block always follow the JSON, while the
+correct answer and the explanation only fill empty fields, so edits made
+in the admin or the UI are kept.
+
+Work is skipped at two levels unless forced: source files whose size and
+mtime (or, failing that, SHA-256) match their ImportFingerprint are not
+parsed at all (read_source()), and rows whose stored content_hash matches
+the hash of their source record are not compared field by field. Image
+metadata is refreshed on compared rows only; use rescan_images after
+adding images.
+
+Bulk writes send no model signals, so apply_diff() does their work once
+per subject instead: it bumps the subject's content version and purges
+its learn pages. BlockStats and the JSON export are refreshed by the
+caller once the whole import is done.
+"""
+import hashlib
+import time
+from collections import namedtuple
+
+from django.db import transaction
+
+from .block_cache import bump_content_version
+from .models import Question
+from .page_cache import purge_question_pages, purge_subject_pages
+
+BATCH_SIZE = 500
+
+# Fields that always follow the source
+SOURCE_FIELDS = ('text', 'option_a', 'option_b', 'option_c', 'block_number')
+# Fields only filled from the source when empty in the database
+FILL_FIELDS = ('correct', 'explanation')
+
+# unchanged includes hash_skipped: rows skipped by content hash alone
+ImportStats = namedtuple('ImportStats', 'subject created updated unchanged hash_skipped seconds')
+
+# path: relative to QUIZ_DATA_DIR; data: file bytes, None when not read
+SourceFile = namedtuple('SourceFile', 'path size mtime_ns sha256 data')
+
+
+def read_source(path, relpath, fingerprint=None, force=False):
+    """
+    Check one source file against its ImportFingerprint (or None).
+
+    Returns (SourceFile, changed). A file whose size and mtime match the
+    fingerprint is not read at all; otherwise it is read and hashed, and is
+    unchanged if its SHA-256 still matches (e.g. after a touch or a
+    checkout). With force every file is read and reported changed.
+    """
+    stat = path.stat()
+    if (not force and fingerprint is not None
+            and (fingerprint.size, fingerprint.mtime_ns) == (stat.st_size, stat.st_mtime_ns)):
+        return SourceFile(relpath, stat.st_size, stat.st_mtime_ns, fingerprint.sha256, None), False
+    data = path.read_bytes()
+    sha256 = hashlib.sha256(data).hexdigest()
+    changed = force or fingerprint is None or fingerprint.sha256 != sha256
+    return SourceFile(relpath, stat.st_size, stat.st_mtime_ns, sha256, data), changed
+
+
+def source_values(record):
+    """Map one source question dict onto Question field values."""
+    options = record.get('options') or {}
+    return {
+        'block_number': record.get('block', 1),
+        'text': record.get('question', ''),
+        'option_a': options.get('a', ''),
+        'option_b': options.get('b', ''),
+        'option_c': options.get('c', ''),
+        'correct': record.get('correct'),
+        'explanation': record.get('explanation') or '',
+    }
+
+
+class SubjectDiff:
+    """Pending changes of one subject: new rows and changed rows with their fields."""
+
+    def __init__(self, subject):
+        self.subject = subject
+        self.created = []
+        self.updated = []  # [(question, [changed source/fill fields])]
+        self.images = []   # rows whose only change is their image metadata
+        self.rehashed = []  # rows whose only change is a stale content_hash
+        self.unchanged = 0
+        self.hash_skipped = 0
+
+    def __bool__(self):
+        return bool(self.created or self.updated or self.images or self.rehashed)
+
+    def describe(self):
+        """Yield one human-readable line per pending change (for --dry-run)."""
+        for question in self.created:
+            yield f'  + Q{question.qid} (block {question.block_number})'
+        for question, fields in self.updated:
+            yield f"  ~ Q{question.qid}: {', '.join(fields)}"
+
+
+def diff_subject(subject, records, existing, manifest, force=False):
+    """
+    Diff source records of one subject against its existing questions.
+
+    records: source question dicts; records without an id are ignored and
+    the last record wins for duplicate ids.
+    existing: {qid: Question} of the subject's rows.
+    manifest: the ImageManifest used to resolve image metadata.
+    force: compare rows even when their content hash matches.
+    """
+    diff = SubjectDiff(subject)
+    by_qid = {record['id']: record for record in records if record.get('id')}
+    for qid, record in by_qid.items():
+        values = source_values(record)
+        source_hash = Question.content_hash_of(values)
+        question = existing.get(qid)
+        if question is None:
+            question = Question(subject=subject, qid=qid, content_hash=source_hash, **values)
+            question.refresh_image_metadata(manifest)
+            diff.created.append(question)
+            continue
+        if not force and question.content_hash == source_hash:
+            # The row already holds exactly this record
+            diff.unchanged += 1
+            diff.hash_skipped += 1
+            continue
+
+        changed = []
+        for field in SOURCE_FIELDS:
+            if getattr(question, field) != values[field]:
+                setattr(question, field, values[field])
+                changed.append(field)
+        for field in FILL_FIELDS:
+            if not getattr(question, field) and values[field]:
+                setattr(question, field, values[field])
+                changed.append(field)
+        images_changed = question.refresh_image_metadata(manifest)
+        row_hash = question.compute_content_hash()
+        hash_changed = question.content_hash != row_hash
+        question.content_hash = row_hash
+        if changed:
+            diff.updated.append((question, changed))
+        elif images_changed:
+            diff.images.append(question)
+        elif hash_changed:
+            # Edited outside save() or imported before content hashes existed
+            diff.rehashed.append(question)
+            diff.unchanged += 1
+        else:
+            diff.unchanged += 1
+    return diff
+
+
+def apply_diff(diff, batch_size=BATCH_SIZE):
+    """Write a SubjectDiff with batched bulk statements and invalidate the subject's caches."""
+    if not diff:
+        return
+    Question.objects.bulk_create(diff.created, batch_size=batch_size)
+    changed_rows = [question for question, _ in diff.updated]
+    if changed_rows:
+        Question.objects.bulk_update(
+            changed_rows,
+            list(SOURCE_FIELDS + FILL_FIELDS) + Question.IMAGE_FIELDS + ['content_hash'],
+            batch_size=batch_size,
+        )
+    if diff.images:
+        Question.objects.bulk_update(diff.images, Question.IMAGE_FIELDS + ['content_hash'], batch_size=batch_size)
+    if diff.rehashed:
+        Question.objects.bulk_update(diff.rehashed, ['content_hash'], batch_size=batch_size)
+
+    # Questions that changed block also leave stale pages under their old block
+    moved = [
+        (question.block_number, question.qid, question._loaded_block_number)
+        for question, fields in diff.updated if 'block_number' in fields
+    ]
+    _invalidate_subject(diff.subject, moved)
+    transaction.on_commit(lambda: _invalidate_subject(diff.subject, moved))
+
+
+def _invalidate_subject(subject, moved):
+    bump_content_version(subject)
+    purge_subject_pages(subject)
+    for block_number, qid, previous_block_number in moved:
+        purge_question_pages(subject, block_number, qid, previous_block_number)
+
+
+def import_subject(subject, records, manifest, dry_run=False, force=False, batch_size=BATCH_SIZE):
+    """
+    Import one subject's source records. Returns (SubjectDiff, ImportStats);
+    with dry_run nothing is written.
+    """
+    start = time.monotonic()
+    existing = {q.qid: q for q in Question.objects.filter(subject=subject)}
+    diff = diff_subject(subject, records, existing, manifest, force)
+    if not dry_run:
+        apply_diff(diff, batch_size)
+    stats = ImportStats(
+        subject=subject,
+        created=len(diff.created),
+        updated=len(diff.updated),
+        unchanged=diff.unchanged + len(diff.images),
+        hash_skipped=diff.hash_skipped,
+        seconds=round(time.monotonic() - start, 3),
+    )
+    return diff, stats
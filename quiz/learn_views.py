@@ -5,37 +5,93 @@ These views are accessible without authentication and are optimized for search e
 from django.shortcuts import render, get_object_or_404, Http404
 import json
 
-from .models import Question
-from .subjects import list_subjects
-from .utils import (
-    get_subject_slug, get_block_slug, parse_subject_slug, parse_block_slug,
-    get_question_image_url, get_option_image_url, build_absolute_https_url
+from .block_cache import get_block_bundle, get_bundle_question, get_content_version, get_version
+from .catalog import CATALOG_VERSION_KEY, get_catalog_stats
+from .conditional import block_stats, conditional_page, make_fingerprint
+from .page_cache import (
+    cache_learn_page, subject_list_page, subject_page, block_page, question_page
 )
+from .routing import get_routing_table
+from .utils import get_block_slug, build_absolute_https_url
 
 
+def _block_subject(subject_ref, block_ref):
+    """
+    Return the subject of a block URL, or None when the subject slug in the
+    URL is not the canonical slug of the block's subject.
+    """
+    table = get_routing_table()
+    if subject_ref.slug != table.canonical_slugs.get(block_ref.subject_id):
+        return None
+    return table.subjects[block_ref.subject_id]
+
+
+def _subject_list_page(request):
+    return subject_list_page()
+
+
+def _subject_page(request, subject_ref):
+    return subject_page(subject_ref.subject.id)
+
+
+def _block_page(request, subject_ref, block_ref):
+    if _block_subject(subject_ref, block_ref) is None:
+        return None
+    return block_page(block_ref.subject_id, block_ref.block_number)
+
+
+def _question_page(request, subject_ref, block_ref, question_id):
+    if _block_subject(subject_ref, block_ref) is None:
+        return None
+    return question_page(block_ref.subject_id, block_ref.block_number, question_id)
+
+
+def _subject_list_fingerprint(request):
+    total = get_catalog_stats().total()
+    count, last_modified = total.question_count, total.last_modified
+    return make_fingerprint(request.path, count, last_modified, get_version(CATALOG_VERSION_KEY))
+
+
+def _subject_fingerprint(request, subject_ref):
+    subject_id = subject_ref.subject.id
+    subject_stats = get_catalog_stats().subject(subject_id)
+    count, last_modified = subject_stats.question_count, subject_stats.last_modified
+    return make_fingerprint(
+        request.path, count, last_modified, get_version(CATALOG_VERSION_KEY), get_content_version(subject_id),
+    )
+
+
+def _block_fingerprint(request, subject_ref, block_ref, question_id=None):
+    if _block_subject(subject_ref, block_ref) is None:
+        return None
+    count, last_modified, version = block_stats(block_ref.subject_id, block_ref.block_number)
+    if not count:
+        return None
+    return make_fingerprint(request.path, count, last_modified, version)
+
+
+@conditional_page(_subject_list_fingerprint)
+@cache_learn_page(_subject_list_page)
 def learn_subject_list(request):
     """
     Public subject list page - shows all available subjects.
     URL: /learn/
     """
     subjects_data = []
+    catalog = get_catalog_stats()
     
-    for subject_info in list_subjects():
-        subject_id = subject_info['id']
-        subject_title = subject_info['title']
-        
-        # Get block count for this subject
-        block_count = Question.objects.filter(subject=subject_id).values_list('block_number', flat=True).distinct().count()
-        
-        # Get question count
-        question_count = Question.objects.filter(subject=subject_id).count()
+    table = get_routing_table()
+    
+    for subject_id, subject_info in table.subjects.items():
+        # Block and question counts from the catalog stats
+        subject_stats = catalog.subject(subject_id)
         
         subjects_data.append({
             'id': subject_id,
-            'title': subject_title,
-            'slug': get_subject_slug(subject_id, subject_title),
-            'block_count': block_count,
-            'question_count': question_count,
+            'title': subject_info.title,
+            'slug': table.canonical_slugs[subject_id],
+            'block_count': subject_stats.block_count,
+            'question_count': subject_stats.question_count,
         })
     
     # Breadcrumb data
@@ -71,32 +127,27 @@ def learn_subject_list(request):
     })
 
 
-def learn_subject_detail(request, subject_slug):
+@conditional_page(_subject_fingerprint)
+@cache_learn_page(_subject_page)
+def learn_subject_detail(request, subject_ref):
     """
     Public subject detail page - shows all blocks for a subject.
     URL: /learn/<subject-slug>/
-    """
-    subject_id = parse_subject_slug(subject_slug)
-    if not subject_id:
-        raise Http404("Subject not found")
-    
-    # Get subject info
-    subject_info = next((s for s in list_subjects() if s['id'] == subject_id), None)
-    if not subject_info:
-        raise Http404("Subject not found")
-    
-    subject_title = subject_info['title']
     
-    # Get all blocks for this subject
-    blocks = Question.objects.filter(subject=subject_id).values_list('block_number', flat=True).distinct().order_by('block_number')
+    subject_ref is resolved by SubjectSlugConverter (unknown slugs 404).
+    """
+    subject_info = subject_ref.subject
+    subject_id = subject_info.id
+    subject_slug = subject_ref.slug
+    subject_title = subject_info.title
     
+    # Get all blocks for this subject from the catalog stats
     blocks_data = []
-    for block_num in blocks:
-        question_count = Question.objects.filter(subject=subject_id, block_number=block_num).count()
+    for block in get_catalog_stats().blocks(subject_id):
         blocks_data.append({
-            'number': block_num,
-            'slug': get_block_slug(subject_id, block_num),
-            'question_count': question_count,
+            'number': block.block_number,
+            'slug': get_block_slug(subject_id, block.block_number),
+            'question_count': block.question_count,
         })
     
     # Breadcrumb data
@@ -141,52 +192,32 @@ def learn_subject_detail(request, subject_slug):
     })
 
 
-def learn_block_detail(request, subject_slug, block_slug):
+@conditional_page(_block_fingerprint)
+@cache_learn_page(_block_page)
+def learn_block_detail(request, subject_ref, block_ref):
     """
     Public block detail page - shows all questions with answers and explanations.
     URL: /learn/<subject-slug>/<block-slug>/
     """
-    subject_id, block_number = parse_block_slug(block_slug)
-    if not subject_id or not block_number:
-        raise Http404("Block not found")
-    
-    # Verify subject slug matches
-    expected_subject_slug = get_subject_slug(subject_id, next((s['title'] for s in list_subjects() if s['id'] == subject_id), ''))
-    if subject_slug != expected_subject_slug:
+    # Verify subject slug matches the block's subject
+    subject_info = _block_subject(subject_ref, block_ref)
+    if subject_info is None:
         raise Http404("Subject slug mismatch")
     
-    # Get subject info
-    subject_info = next((s for s in list_subjects() if s['id'] == subject_id), None)
-    if not subject_info:
-        raise Http404("Subject not found")
-    
-    # Get all questions for this block
-    questions = Question.objects.filter(
-        subject=subject_id,
-        block_number=block_number
-    ).order_by('qid')
+    subject_id, block_number = block_ref.subject_id, block_ref.block_number
+    subject_slug, block_slug = subject_ref.slug, block_ref.slug
     
-    if not questions.exists():
+    # Get all questions for this block from the cached block bundle
+    bundle = get_block_bundle(subject_id, block_number)
+    if bundle is None:
         raise Http404("Block not found")
     
     # Prepare questions data with images
     questions_data = []
-    for question in questions:
-        question_img_exists, question_img_url = get_question_image_url(question, subject_id)
-        option_a_exists, option_a_url = get_option_image_url(question, subject_id, 1)
-        option_b_exists, option_b_url = get_option_image_url(question, subject_id, 2)
-        option_c_exists, option_c_url = get_option_image_url(question, subject_id, 3)
-        
+    for question in bundle['questions']:
         questions_data.append({
             'question': question,
-            'question_img_exists': question_img_exists,
-            'question_img_url': question_img_url,
-            'option_a_exists': option_a_exists,
-            'option_a_url': option_a_url,
-            'option_b_exists': option_b_exists,
-            'option_b_url': option_b_url,
-            'option_c_exists': option_c_exists,
-            'option_c_url': option_c_url,
+            **question['images'],
         })
     
     # Build absolute HTTPS URLs (must be before breadcrumbs)
@@ -200,7 +231,7 @@ def learn_block_detail(request, subject_slug, block_slug):
     breadcrumbs = [
         {'name': 'Acasă', 'url': home_url},
         {'name': 'Învață', 'url': learn_url},
-        {'name': subject_info['title'], 'url': subject_url},
+        {'name': subject_info.title, 'url': subject_url},
         {'name': f'Bloc {block_number}', 'url': block_url},
     ]
     
@@ -224,7 +255,7 @@ def learn_block_detail(request, subject_slug, block_slug):
             {
                 "@type": "ListItem",
                 "position": 3,
-                "name": subject_info['title'],
+                "name": subject_info.title,
                 "item": subject_url
             },
             {
@@ -240,13 +271,13 @@ def learn_block_detail(request, subject_slug, block_slug):
     item_list_items = []
     for idx, item in enumerate(questions_data, 1):
         question = item['question']
-        question_url = build_absolute_https_url(request, f'/learn/{subject_slug}/{block_slug}/{question.qid}/')
+        question_url = build_absolute_https_url(request, f'/learn/{subject_slug}/{block_slug}/{question["qid"]}/')
         item_list_items.append({
             "@type": "ListItem",
             "position": idx,
             "item": {
                 "@type": "Question",
-                "name": question.text[:100] + "..." if len(question.text) > 100 else question.text,
+                "name": question['text'][:100] + "..." if len(question['text']) > 100 else question['text'],
                 "url": question_url
             }
         })
@@ -254,7 +285,7 @@ def learn_block_detail(request, subject_slug, block_slug):
     item_list_data = json.dumps({
         "@context": "https://schema.org",
         "@type": "ItemList",
-        "name": f"{subject_info['title']} - Bloc {block_number}",
+        "name": f"{subject_info.title} - Bloc {block_number}",
         "numberOfItems": len(item_list_items),
         "itemListElement": item_list_items
     }, ensure_ascii=False)
@@ -276,46 +307,32 @@ def learn_block_detail(request, subject_slug, block_slug):
     })
 
 
-def learn_question_detail(request, subject_slug, block_slug, question_id):
+@conditional_page(_block_fingerprint)
+@cache_learn_page(_question_page)
+def learn_question_detail(request, subject_ref, block_ref, question_id):
     """
     Public question detail page - shows a single question with answer and explanation.
     URL: /learn/<subject-slug>/<block-slug>/<question-id>/
     """
-    subject_id, block_number = parse_block_slug(block_slug)
-    if not subject_id or not block_number:
-        raise Http404("Block not found")
-    
-    # Verify subject slug matches
-    expected_subject_slug = get_subject_slug(subject_id, next((s['title'] for s in list_subjects() if s['id'] == subject_id), ''))
-    if subject_slug != expected_subject_slug:
+    # Verify subject slug matches the block's subject
+    subject_info = _block_subject(subject_ref, block_ref)
+    if subject_info is None:
         raise Http404("Subject slug mismatch")
     
-    # Get subject info
-    subject_info = next((s for s in list_subjects() if s['id'] == subject_id), None)
-    if not subject_info:
-        raise Http404("Subject not found")
+    subject_id, block_number = block_ref.subject_id, block_ref.block_number
+    subject_slug, block_slug = subject_ref.slug, block_ref.slug
     
-    # Get the question
-    try:
-        question = Question.objects.get(
-            subject=subject_id,
-            block_number=block_number,
-            qid=question_id
-        )
-    except Question.DoesNotExist:
+    # Get the question from the cached block bundle
+    bundle = get_block_bundle(subject_id, block_number)
+    question = get_bundle_question(bundle, question_id) if bundle else None
+    if question is None:
         raise Http404("Question not found")
     
-    # Get images
-    question_img_exists, question_img_url = get_question_image_url(question, subject_id)
-    option_a_exists, option_a_url = get_option_image_url(question, subject_id, 1)
-    option_b_exists, option_b_url = get_option_image_url(question, subject_id, 2)
-    option_c_exists, option_c_url = get_option_image_url(question, subject_id, 3)
-    
     # Breadcrumb data
     breadcrumbs = [
         {'name': 'Acasă', 'url': '/'},
         {'name': 'Învață', 'url': '/learn/'},
-        {'name': subject_info['title'], 'url': f'/learn/{subject_slug}/'},
+        {'name': subject_info.title, 'url': f'/learn/{subject_slug}/'},
         {'name': f'Bloc {block_number}', 'url': f'/learn/{subject_slug}/{block_slug}/'},
         {'name': f'Întrebarea {question_id}', 'url': f'/learn/{subject_slug}/{block_slug}/{question_id}/'},
     ]
@@ -340,7 +357,7 @@ def learn_question_detail(request, subject_slug, block_slug, question_id):
             {
                 "@type": "ListItem",
                 "position": 3,
-                "name": subject_info['title'],
+                "name": subject_info.title,
                 "item": build_absolute_https_url(request, f'/learn/{subject_slug}/')
             },
             {
@@ -365,14 +382,7 @@ def learn_question_detail(request, subject_slug, block_slug, question_id):
         'block_slug': block_slug,
         'question': question,
         'question_id': question_id,
-        'question_img_exists': question_img_exists,
-        'question_img_url': question_img_url,
-        'option_a_exists': option_a_exists,
-        'option_a_url': option_a_url,
-        'option_b_exists': option_b_exists,
-        'option_b_url': option_b_url,
-        'option_c_exists': option_c_exists,
-        'option_c_url': option_c_url,
+        **question['images'],
         'breadcrumbs': breadcrumbs,
         'structured_data': structured_data,
     })
@@ -1,60 +1,295 @@
 """
 Quiz data loader utility.
-Loads JSON files and provides cached access to quiz questions.
+Loads the quiz_data/ JSON files into an indexed, reloadable catalog.
+
+Each subject is parsed into an immutable SubjectCatalog: compact slotted
+QuestionRecord objects, a block -> questions index and a qid -> question
+index. The QuestionCatalog holds one SubjectCatalog per subject and
+replaces it whole when the subject's source file changes (checked by
+mtime/size at most every MTIME_CHECK_INTERVAL seconds), so a request
+always works on one consistent snapshot and a reload never blocks readers
+of the other subjects.
+
+Reads the sharded layout (quiz_data/<subject>/manifest.json, see
+quiz/shards.py) or the legacy single file, whichever was modified last; on a
+reload, shards whose SHA-256 did not change are reused without parsing.
+When settings.QUIZ_BANK_PATH points to a compiled bank (quiz/bank.py),
+subjects whose source is unchanged since compiling are served from the
+memory-mapped bank instead, decoded lazily per block or question. In
+shared mode (settings.QUIZ_SHARED_CATALOG) a stale or missing bank is
+recompiled rather than parsed into this process, so workers keep no
+private copy of the questions.
 """
 import json
-import os
+import logging
+import threading
+import time
 from pathlib import Path
 from typing import List, Dict, Optional
 
-# Cache for loaded quiz data
-_quiz_cache = {}
+from django.conf import settings
+
+from .shards import current_source, load_shard, read_current_manifest, shard_entries, subject_dir
+from .subjects import get_subject_registry
+
+logger = logging.getLogger('quiz.loader')
+
+# Seconds between two mtime checks of a subject's source file
+MTIME_CHECK_INTERVAL = 1.0
 
 
 def _get_quiz_data_path():
     """Get the path to quiz_data directory."""
     base_dir = Path(__file__).resolve().parent.parent
-    return base_dir / 'quiz_data'
-
-
-def _load_subject(subject_id: str) -> Dict:
-    """Load a subject's JSON file and cache it."""
-    if subject_id in _quiz_cache:
-        return _quiz_cache[subject_id]
-    
-    quiz_data_dir = _get_quiz_data_path()
-    
-    # Map subject IDs to file names
-    file_map = {
-        'electrotehnica': 'electrotehnica.json',
-        'legislatie-gr-2': 'legislatie-gr-2.json',
-        'norme-tehnice-gr-2': 'norme-tehnice-gr-2.json',
-    }
-    
-    filename = file_map.get(subject_id)
-    if not filename:
-        raise ValueError(f"Unknown subject: {subject_id}")
-    
-    filepath = quiz_data_dir / filename
+    return Path(getattr(settings, 'QUIZ_DATA_DIR', base_dir / 'quiz_data'))
+
+
+class QuestionRecord:
+    """
+    One question of the JSON bank. Read-only; supports the dict-style
+    access (record['question'], record.get('block')) of the old loader.
+    """
+    __slots__ = ('id', 'block', 'question', 'option_a', 'option_b', 'option_c',
+                 'correct', 'explanation', 'image_base')
+
+    def __init__(self, data, block):
+        options = data.get('options') or {}
+        self.id = data.get('id')
+        self.block = block
+        self.question = data.get('question', '')
+        self.option_a = options.get('a', '')
+        self.option_b = options.get('b', '')
+        self.option_c = options.get('c', '')
+        self.correct = data.get('correct')
+        self.explanation = data.get('explanation') or ''
+        self.image_base = data.get('image_base')
+
+    @property
+    def options(self):
+        return {'a': self.option_a, 'b': self.option_b, 'c': self.option_c}
+
+    def __getitem__(self, key):
+        if key == 'options':
+            return self.options
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def as_dict(self):
+        """The question in its JSON export shape."""
+        return {
+            'id': self.id,
+            'question': self.question,
+            'options': self.options,
+            'correct': self.correct,
+            'explanation': self.explanation,
+            'block': self.block,
+            'image_base': self.image_base,
+        }
+
+    def __repr__(self):
+        return f'<QuestionRecord {self.id} block {self.block}>'
+
+
+class SubjectCatalog:
+    """Immutable, indexed snapshot of one subject's questions."""
+    __slots__ = ('subject', 'title', 'block_size', 'questions', 'blocks',
+                 'block_numbers', 'by_qid', 'stamp', 'shard_hashes')
+
+    def __init__(self, subject, title, block_size, blocks, stamp, shard_hashes=None):
+        """blocks: {block_number: tuple of QuestionRecord}."""
+        self.subject = subject
+        self.title = title
+        self.block_size = block_size
+        self.block_numbers = tuple(sorted(blocks))
+        self.blocks = {number: blocks[number] for number in self.block_numbers}
+        self.questions = tuple(q for number in self.block_numbers for q in self.blocks[number])
+        self.by_qid = {q.id: q for q in self.questions}
+        self.stamp = stamp
+        self.shard_hashes = shard_hashes or {}
+
+    def block_questions(self, block_number):
+        return self.blocks.get(block_number, ())
+
+    def question(self, qid):
+        return self.by_qid.get(qid)
+
+
+def _source_stamp(quiz_data_dir, subject):
+    """(path, mtime_ns, size) of the file whose change means a reload, or None."""
+    source = current_source(quiz_data_dir, subject)
+    if source is None:
+        return None
+    path, stat = source
+    return (str(path), stat.st_mtime_ns, stat.st_size)
+
+
+def _group_blocks(questions):
+    """Return {block: tuple of QuestionRecord}, assigning blocks of 20 when none is set."""
+    has_blocks = any(q.get('block') is not None for q in questions)
+    blocks = {}
+    for i, data in enumerate(questions):
+        block = data.get('block') if has_blocks else (i // 20) + 1
+        if block is None:
+            continue
+        blocks.setdefault(block, []).append(QuestionRecord(data, block))
+    return {block: tuple(records) for block, records in blocks.items()}
+
+
+def parse_subject(quiz_data_dir, subject, previous=None):
+    """
+    Parse one subject's source file(s) into a SubjectCatalog. Shards whose
+    hash matches previous (a SubjectCatalog) are reused without parsing.
+    """
+    stamp = _source_stamp(quiz_data_dir, subject)
+    directory = subject_dir(quiz_data_dir, subject.id)
+    manifest = read_current_manifest(quiz_data_dir, subject)
+    if manifest is not None:
+        blocks = {}
+        shard_hashes = {}
+        for block_number, entry in shard_entries(manifest):
+            shard_hashes[block_number] = entry['sha256']
+            if previous is not None and previous.shard_hashes.get(block_number) == entry['sha256']:
+                blocks[block_number] = previous.blocks[block_number]
+            else:
+                blocks[block_number] = tuple(
+                    QuestionRecord(data, block_number) for data in load_shard(directory, entry)
+                )
+        return SubjectCatalog(
+            subject.id, manifest.get('title', subject.title), manifest.get('blockSize', 20),
+            blocks, stamp, shard_hashes,
+        )
+
+    filepath = quiz_data_dir / subject.data_file
     if not filepath.exists():
         raise FileNotFoundError(f"Quiz data file not found: {filepath}")
-    
     with open(filepath, 'r', encoding='utf-8') as f:
         data = json.load(f)
-    
-    # Assign blocks sequentially if not present (20 questions per block)
-    questions = data.get('questions', [])
-    if questions:
-        # Check if any question has a block field
-        has_blocks = any('block' in q and q.get('block') is not None for q in questions)
-        
-        if not has_blocks:
-            # Assign blocks: first 20 -> block 1, next 20 -> block 2, etc.
-            for i, question in enumerate(questions):
-                question['block'] = (i // 20) + 1
-    
-    _quiz_cache[subject_id] = data
-    return data
+    return SubjectCatalog(
+        subject.id, data.get('title', subject.title), data.get('blockSize', 20),
+        _group_blocks(data.get('questions', [])), stamp,
+    )
+
+
+class QuestionCatalog:
+    """
+    Per-subject SubjectCatalog (or bank.BankSubject) snapshots, reloaded
+    when their source changes.
+    """
+
+    def __init__(self, quiz_data_dir=None, check_interval=MTIME_CHECK_INTERVAL, bank_path=None, shared=False):
+        self.quiz_data_dir = Path(quiz_data_dir or _get_quiz_data_path())
+        self.check_interval = check_interval
+        self.bank_path = Path(bank_path) if bank_path else None
+        self.shared = shared and self.bank_path is not None
+        self._bank = None
+        self._bank_lock = threading.Lock()
+        self._subjects = {}  # subject -> SubjectCatalog; replaced, never mutated
+        self._checked_at = {}
+        self._locks = {subject.id: threading.Lock() for subject in get_subject_registry()}
+        self.reloads = 0
+
+    def subject(self, subject_id):
+        """Return the current SubjectCatalog of a subject, (re)loading it if needed."""
+        subject = get_subject_registry().get(subject_id)
+        if subject is None:
+            raise ValueError(f"Unknown subject: {subject_id}")
+        current = self._subjects.get(subject_id)
+        if current is not None:
+            now = time.monotonic()
+            if now - self._checked_at.get(subject_id, 0.0) < self.check_interval:
+                return current
+            self._checked_at[subject_id] = now
+            if _source_stamp(self.quiz_data_dir, subject) == current.stamp:
+                return current
+        return self.reload(subject_id)
+
+    def reload(self, subject_id):
+        """Re-parse one subject and swap it in. Readers of the old snapshot are unaffected."""
+        subject = get_subject_registry().get(subject_id)
+        if subject is None:
+            raise ValueError(f"Unknown subject: {subject_id}")
+        with self._locks[subject_id]:
+            previous = self._subjects.get(subject_id)
+            stamp = _source_stamp(self.quiz_data_dir, subject)
+            if previous is not None and stamp == previous.stamp:
+                return previous  # reloaded by another thread meanwhile
+            catalog = self._from_bank(subject_id)
+            if catalog is None and self.shared and stamp is not None:
+                catalog = self._compile_bank(subject_id)
+            if catalog is None:
+                catalog = parse_subject(self.quiz_data_dir, subject, previous)
+            self._subjects = {**self._subjects, subject_id: catalog}
+            self._checked_at[subject_id] = time.monotonic()
+            self.reloads += 1
+            return catalog
+
+    def get_bank(self):
+        """Return the open QuestionBank (reopened if recompiled), or None."""
+        from .bank import BankError, QuestionBank
+
+        if self.bank_path is None:
+            return None
+        with self._bank_lock:
+            try:
+                stat = self.bank_path.stat()
+            except FileNotFoundError:
+                self._bank = None
+                return None
+            if self._bank is None or self._bank.stamp != (stat.st_mtime_ns, stat.st_size):
+                try:
+                    self._bank = QuestionBank(self.bank_path)
+                except (BankError, OSError, ValueError) as exc:
+                    logger.warning('Ignoring question bank %s: %s', self.bank_path, exc)
+                    self._bank = None
+            return self._bank
+
+    def _from_bank(self, subject_id):
+        bank = self.get_bank()
+        return bank.subject(subject_id, self.quiz_data_dir) if bank is not None else None
+
+    def _compile_bank(self, subject_id):
+        """Recompile the shared bank (once across workers) and return the subject from it."""
+        from .bank import BankError, compile_shared_bank
+
+        try:
+            compile_shared_bank(self.bank_path, self.quiz_data_dir,
+                                is_current=lambda: self._from_bank(subject_id) is not None)
+        except (BankError, OSError, ValueError) as exc:
+            logger.warning('Could not compile question bank %s: %s', self.bank_path, exc)
+            return None
+        return self._from_bank(subject_id)
+
+    def clear(self):
+        self._subjects = {}
+        self._checked_at = {}
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> QuestionCatalog:
+    """Return the process-wide QuestionCatalog, creating it on first use."""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = QuestionCatalog(
+                    bank_path=settings.QUIZ_BANK_PATH or None, shared=settings.QUIZ_SHARED_CATALOG,
+                )
+    return _catalog
+
+
+def reload_subject(subject_id: str) -> SubjectCatalog:
+    """Force a re-parse of one subject's source file."""
+    return get_catalog().reload(subject_id)
 
 
 def list_subjects() -> List[Dict[str, str]]:
@@ -62,20 +297,15 @@ def list_subjects() -> List[Dict[str, str]]:
     Returns list of subject IDs and titles.
     Returns: [{'id': 'electrotehnica', 'title': '...'}, ...]
     """
-    subjects = [
-        {'id': 'electrotehnica', 'title': 'Electrotehnică'},
-        {'id': 'legislatie-gr-2', 'title': 'Legislație GR. 2'},
-        {'id': 'norme-tehnice-gr-2', 'title': 'Norme Tehnice GR. 2'},
-    ]
-    
+    subjects = [{'id': s.id, 'title': s.title} for s in get_subject_registry()]
+
     # Load titles from JSON files
     for subject in subjects:
         try:
-            data = _load_subject(subject['id'])
-            subject['title'] = data.get('title', subject['title'])
+            subject['title'] = get_catalog().subject(subject['id']).title
         except Exception:
             pass  # Use default title if loading fails
-    
+
     return subjects
 
 
@@ -83,32 +313,18 @@ def get_blocks(subject: str) -> List[int]:
     """
     Returns sorted list of block numbers present in the subject.
     """
-    data = _load_subject(subject)
-    questions = data.get('questions', [])
-    
-    if not questions:
-        return []
-    
-    blocks = set()
-    for question in questions:
-        block = question.get('block')
-        if block is not None:
-            blocks.add(block)
-    
-    return sorted(blocks)
-
-
-def get_block_questions(subject: str, block_number: int) -> List[Dict]:
+    return list(get_catalog().subject(subject).block_numbers)
+
+
+def get_block_questions(subject: str, block_number: int) -> List[QuestionRecord]:
     """
-    Returns list of question dicts for a specific block.
+    Returns list of questions for a specific block.
     """
-    data = _load_subject(subject)
-    questions = data.get('questions', [])
-    
-    block_questions = [
-        q for q in questions 
-        if q.get('block') == block_number
-    ]
-    
-    return block_questions
+    return list(get_catalog().subject(subject).block_questions(block_number))
 
+
+def get_question(subject: str, qid: int) -> Optional[QuestionRecord]:
+    """
+    Returns one question by id, or None.
+    """
+    return get_catalog().subject(subject).question(qid)
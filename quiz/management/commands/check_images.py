@@ -5,6 +5,8 @@ from django.core.management.base import BaseCommand
 from pathlib import Path
 from django.conf import settings
 from quiz.models import Question
+from quiz.image_manifest import rebuild_image_manifest
+from quiz.subjects import get_subject_registry
 
 
 class Command(BaseCommand):
@@ -20,19 +22,16 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR(f"Directory does not exist: {static_dir}"))
             self.stdout.write("Creating directory structure...")
             static_dir.mkdir(parents=True, exist_ok=True)
-            (static_dir / 'electrotehnica').mkdir(exist_ok=True)
-            (static_dir / 'legislatie-gr-2').mkdir(exist_ok=True)
-            (static_dir / 'norme-tehnice-gr-2').mkdir(exist_ok=True)
+            for subject in get_subject_registry():
+                (static_dir / subject.id).mkdir(exist_ok=True)
             self.stdout.write(self.style.SUCCESS("Directories created!"))
             return
         
-        subjects = {
-            'electrotehnica': 'qe',
-            'legislatie-gr-2': 'ql',
-            'norme-tehnice-gr-2': 'qn',
-        }
+        manifest = rebuild_image_manifest()
+        self.stdout.write(f"Indexed {len(manifest)} image files")
         
-        for subject, prefix in subjects.items():
+        for subject_info in get_subject_registry():
+            subject, prefix = subject_info.id, subject_info.image_prefix
             subject_dir = static_dir / subject
             self.stdout.write(f"\n{'='*60}")
             self.stdout.write(f"Subject: {subject} (prefix: {prefix})")
@@ -43,8 +42,8 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.WARNING(f"  Directory does not exist!"))
                 continue
             
-            # List all PNG files
-            png_files = list(subject_dir.glob("*.png"))
+            # List all PNG files known to the image manifest
+            png_files = manifest.files(subject)
             
             if not png_files:
                 self.stdout.write(self.style.WARNING(f"  No PNG files found!"))
@@ -52,8 +51,8 @@ class Command(BaseCommand):
                 self.stdout.write(f"\n  Found {len(png_files)} PNG files:")
                 
                 # Show first 20 files
-                for png_file in sorted(png_files)[:20]:
-                    name = png_file.name
+                for png_file in png_files[:20]:
+                    name = png_file.relative_path.split('/', 2)[2]
                     # Check if it matches expected format
                     if name.startswith(prefix):
                         self.stdout.write(self.style.SUCCESS(f"    ✓ {name}"))
@@ -76,8 +75,7 @@ class Command(BaseCommand):
                 self.stdout.write(f"\n{subject} (expecting prefix '{prefix}'):")
                 for q in questions:
                     expected_name = f"{prefix}{q.qid}.png"
-                    expected_path = static_dir / subject / expected_name
-                    exists = expected_path.exists()
+                    exists = manifest.lookup(subject, f"{prefix}{q.qid}") is not None
                     status = "✓" if exists else "✗"
                     self.stdout.write(f"  {status} Q{q.qid}: expects {expected_name} -> {exists}")
 
@@ -0,0 +1,38 @@
+"""
+Management command to compile quiz_data/ into the binary question bank
+(see quiz/bank.py) that quiz.loader memory-maps instead of parsing JSON.
+Re-run it after changing quiz_data/; subjects changed since the last
+compile are read from their JSON until then (or recompiled by the first
+worker that needs them, in shared catalog mode).
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from quiz.bank import compile_shared_bank
+from quiz.exporter import get_quiz_data_dir
+
+
+class Command(BaseCommand):
+    help = 'Compile quiz_data/ into a memory-mappable binary question bank'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', type=str, default=None,
+            help='Bank file to write (default: QUIZ_BANK_PATH)',
+        )
+
+    def handle(self, *args, **options):
+        output = options['output'] or settings.QUIZ_BANK_PATH
+        if not output:
+            raise CommandError('No output file: pass --output or set DJANGO_QUIZ_BANK_PATH')
+
+        start = time.monotonic()
+        count, subjects, missing = compile_shared_bank(output, get_quiz_data_dir())
+        for exc in missing:
+            self.stdout.write(self.style.WARNING(str(exc)))
+        self.stdout.write(self.style.SUCCESS(
+            f'Compiled {count} questions from {subjects} subjects into {output} '
+            f'in {time.monotonic() - start:.2f}s'
+        ))
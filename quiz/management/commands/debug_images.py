@@ -3,9 +3,8 @@ Debug command to check if images are being found correctly.
 """
 from django.core.management.base import BaseCommand
 from quiz.models import Question
-from quiz.utils import get_question_image_url, get_option_image_url
-from pathlib import Path
-from django.conf import settings
+from quiz.image_manifest import get_image_manifest, rebuild_image_manifest
+from quiz.utils import get_question_image_url, get_option_image_url, get_image_base
 
 
 class Command(BaseCommand):
@@ -14,11 +13,18 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument('--qid', type=int, help='Check specific question ID')
         parser.add_argument('--subject', type=str, help='Check specific subject')
+        parser.add_argument('--rebuild', action='store_true', help='Re-scan static/img before checking')
 
     def handle(self, *args, **options):
         qid = options.get('qid')
         subject = options.get('subject')
         
+        if options.get('rebuild'):
+            manifest = rebuild_image_manifest()
+        else:
+            manifest = get_image_manifest()
+        self.stdout.write(f"Image manifest: {len(manifest)} files indexed")
+        
         if qid and subject:
             questions = Question.objects.filter(qid=qid, subject=subject)
         elif qid:
@@ -32,7 +38,8 @@ class Command(BaseCommand):
         
         for question in questions:
             self.stdout.write(f"\nQuestion {question.qid} ({question.subject}, Block {question.block_number}):")
-            self.stdout.write(f"  Image base: '{question.image_base or f'q{question.qid}'}'")
+            base = get_image_base(question, question.subject)
+            self.stdout.write(f"  Image base: '{base}'")
             
             # Check question image
             exists, url = get_question_image_url(question, question.subject)
@@ -43,14 +50,7 @@ class Command(BaseCommand):
                 exists, url = get_option_image_url(question, question.subject, opt_num)
                 self.stdout.write(f"  Option {opt_letter} image: {'✓' if exists else '✗'} {url or 'NOT FOUND'}")
             
-            # Show expected paths
-            from quiz.utils import get_image_prefix
-            if question.image_base:
-                base = question.image_base
-            else:
-                prefix = get_image_prefix(question.subject)
-                base = f"{prefix}{question.qid}"
-            expected_path = Path(settings.BASE_DIR) / 'static' / 'img' / question.subject / f"{base}.png"
-            self.stdout.write(f"  Expected path: {expected_path}")
-            self.stdout.write(f"  Path exists: {expected_path.exists()}")
-
+            # Show where the manifest resolved the main image from
+            entry = manifest.get(question.subject, base)
+            self.stdout.write(f"  Expected path: img/{question.subject}/{base}.png")
+            self.stdout.write(f"  Resolved file: {entry.path if entry else 'NOT FOUND'}")
@@ -8,92 +8,78 @@ interface or via the UI (correct answers, explanations, image_base, etc.).
 Usage:
 
     python manage.py export_questions
-
-The command will overwrite:
+    python manage.py export_questions --format legacy
+    python manage.py export_questions --jobs 3 --compact
+
+By default (QUIZ_EXPORT_FORMAT='sharded') every subject in
+``quiz.subjects.SUBJECTS`` is written as one compact JSON shard per block
+plus a manifest.json with each shard's SHA-256, and only shards whose
+content changed are rewritten:
+    quiz_data/electrotehnica/manifest.json
+    quiz_data/electrotehnica/block-001.json
+    ...
+
+``--format legacy`` overwrites the single-file layout instead, ``both``
+writes both:
     quiz_data/electrotehnica.json
     quiz_data/legislatie-gr-2.json
     quiz_data/norme-tehnice-gr-2.json
+
+Questions are streamed from the database and written incrementally, so
+memory use does not grow with the bank. ``--jobs N`` exports subjects in
+N worker processes, ``--compact`` drops the indentation of legacy files.
 """
 
-from pathlib import Path
-import json
+import time
 
+from django.conf import settings
 from django.core.management.base import BaseCommand
 
-from quiz.models import Question
+from quiz.exporter import EXPORT_CHUNK_SIZE, export_subjects, get_quiz_data_dir
+from quiz.shards import EXPORT_FORMATS
+from quiz.subjects import get_subject_registry
 
 
 class Command(BaseCommand):
-    help = "Export questions from the database back into quiz_data/*.json"
+    help = "Export questions from the database back into quiz_data/"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format', choices=EXPORT_FORMATS, default=None,
+            help=f"Output layout (default: QUIZ_EXPORT_FORMAT, currently '{settings.QUIZ_EXPORT_FORMAT}')",
+        )
+        parser.add_argument(
+            '--compact', action='store_true',
+            help='Write the legacy files without indentation',
+        )
+        parser.add_argument(
+            '--jobs', type=int, default=1,
+            help='Export subjects concurrently in this many worker processes (default: 1)',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=EXPORT_CHUNK_SIZE,
+            help=f'Rows fetched per database round trip (default: {EXPORT_CHUNK_SIZE})',
+        )
 
     def handle(self, *args, **options):
-        project_root = Path(__file__).resolve().parent.parent.parent.parent
-        quiz_data_dir = project_root / "quiz_data"
-
-        mapping = {
-            "electrotehnica": "electrotehnica.json",
-            "legislatie-gr-2": "legislatie-gr-2.json",
-            "norme-tehnice-gr-2": "norme-tehnice-gr-2.json",
-        }
-
-        for subject_id, filename in mapping.items():
-            out_path = quiz_data_dir / filename
-            self.stdout.write(f"Exporting subject '{subject_id}' -> {out_path}")
-
-            # Try to preserve existing top‑level metadata (title, blockSize, etc.)
-            base_data = {}
-            if out_path.exists():
-                try:
-                    base_data = json.loads(out_path.read_text(encoding="utf-8"))
-                except Exception:
-                    base_data = {}
-
-            title = base_data.get("title") or subject_id.replace("-", " ").title()
-            block_size = base_data.get("blockSize", 20)
-
-            questions_qs = (
-                Question.objects.filter(subject=subject_id)
-                .order_by("qid")
-            )
-
-            questions = []
-            for q in questions_qs:
-                questions.append(
-                    {
-                        "id": q.qid,
-                        "question": q.text,
-                        "options": {
-                            "a": q.option_a,
-                            "b": q.option_b,
-                            "c": q.option_c,
-                        },
-                        "correct": q.correct,
-                        "explanation": q.explanation or "",
-                        "block": q.block_number,
-                        # keep an ``image`` field only if you are using it;
-                        # otherwise you can ignore it in the JSON.
-                        # we expose image_base so you can derive filenames if needed
-                        "image_base": q.image_base or None,
-                    }
-                )
-
-            export_data = {
-                "title": title,
-                "subject": subject_id,
-                "blockSize": block_size,
-                "questionCount": len(questions),
-                "questions": questions,
-            }
-
-            out_path.write_text(
-                json.dumps(export_data, ensure_ascii=False, indent=2),
-                encoding="utf-8",
-            )
-
+        quiz_data_dir = get_quiz_data_dir()
+        subject_ids = [subject.id for subject in get_subject_registry()]
+        self.stdout.write(f"Exporting {len(subject_ids)} subjects -> {quiz_data_dir}")
+
+        start = time.monotonic()
+        results = export_subjects(
+            subject_ids,
+            quiz_data_dir,
+            export_format=options['format'],
+            compact=options['compact'],
+            chunk_size=options['chunk_size'],
+            jobs=options['jobs'],
+        )
+        for subject_id, result in results.items():
             self.stdout.write(
                 self.style.SUCCESS(
-                    f"  -> wrote {len(questions)} questions to {out_path}"
+                    f"  {subject_id} -> {result.questions} questions: {result.written} files written, "
+                    f"{result.unchanged} unchanged ({', '.join(str(p) for p in result.paths)})"
                 )
             )
-
-
+        self.stdout.write(f"Done in {time.monotonic() - start:.2f}s")
@@ -1,133 +1,176 @@
 """
 Management command to import questions from JSON files into the database.
 Only updates fields that are currently empty/null to preserve user edits.
+
+Existing rows are loaded once per subject and diffed in memory; changes
+are written with batched bulk statements in one transaction (see
+quiz/importer.py). --dry-run prints the diff without writing.
+
+Reads the sharded layout (quiz_data/<subject>/manifest.json plus one file
+per block, see quiz/shards.py) or the legacy quiz_data/<subject>.json,
+whichever was modified last, so a corrected legacy file is imported even
+after a sharded export. Files unchanged since the last import
+(size/mtime, then SHA-256) and questions whose content hash matches are
+skipped; --force re-reads and compares everything. --subject limits the
+import to the given subjects (used by ``watch_quiz_data --import``).
 """
 import json
-from pathlib import Path
-from django.core.management.base import BaseCommand
-from django.utils import timezone
-from quiz.models import Question
-from quiz.signals import set_skip_auto_export, export_subject_to_json
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from quiz.importer import import_subject, read_source
+from quiz.models import ImportFingerprint
+from quiz.shards import read_current_manifest, shard_entries, subject_dir
+from quiz.subjects import get_subject_registry
+from quiz.image_manifest import rebuild_image_manifest
+from quiz.catalog import rebuild_catalog_stats
+from quiz.exporter import get_quiz_data_dir
+from quiz.signals import export_subject_to_json
 
 
 class Command(BaseCommand):
     help = 'Import questions from JSON files in quiz_data/ directory'
 
-    def handle(self, *args, **options):
-        # Disable auto-export during bulk import for performance
-        set_skip_auto_export(True)
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Re-read and compare every file and question, even if unchanged since the last import',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Print the changes the import would make without writing anything',
+        )
+        parser.add_argument(
+            '--subject', action='append', dest='subjects', metavar='SUBJECT',
+            help='Import only this subject (repeatable; default: all subjects)',
+        )
+
+    def collect_sources(self, subject, quiz_data_dir, fingerprints, force):
+        """
+        Check the subject's source files against their fingerprints: its
+        block shards when quiz_data/<subject>/manifest.json is its current
+        source, otherwise (no manifest, or a legacy file modified after it)
+        the legacy single file.
+
+        Returns ([(SourceFile, questions)], skipped). questions is None for
+        unchanged files that had to be read (only their fingerprint is
+        refreshed); skipped counts every unchanged file.
+        """
+        directory = subject_dir(quiz_data_dir, subject.id)
+        shard_manifest = read_current_manifest(quiz_data_dir, subject)
+        if shard_manifest is not None:
+            files = [
+                (directory / entry['file'], f"{subject.id}/{entry['file']}")
+                for _, entry in shard_entries(shard_manifest)
+            ]
+        else:
+            filepath = quiz_data_dir / subject.data_file
+            if not filepath.exists():
+                self.stdout.write(self.style.WARNING(f'File not found: {filepath}'))
+                return [], 0
+            files = [(filepath, subject.data_file)]
         
-        try:
-            base_dir = Path(__file__).resolve().parent.parent.parent.parent
-            quiz_data_dir = base_dir / 'quiz_data'
-            
-            # Map subject IDs to file names
-            file_map = {
-                'electrotehnica': 'electrotehnica.json',
-                'legislatie-gr-2': 'legislatie-gr-2.json',
-                'norme-tehnice-gr-2': 'norme-tehnice-gr-2.json',
-            }
-            
-            total_imported = 0
-            total_updated = 0
-            subjects_updated = set()
-            
-            for subject_id, filename in file_map.items():
-                filepath = quiz_data_dir / filename
-                if not filepath.exists():
-                    self.stdout.write(self.style.WARNING(f'File not found: {filepath}'))
-                    continue
-                
-                self.stdout.write(f'Processing {filename}...')
-                
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                questions = data.get('questions', [])
-                if not questions:
-                    continue
-                
+        sources = []
+        skipped = 0
+        for path, relpath in files:
+            source, changed = read_source(path, relpath, fingerprints.get(relpath), force)
+            if not changed:
+                skipped += 1
+                if source.data is not None:
+                    sources.append((source, None))
+                continue
+            data = json.loads(source.data)
+            questions = data.get('questions', [])
+            if shard_manifest is None:
                 # Assign blocks if not present (20 questions per block)
                 has_blocks = any('block' in q and q.get('block') is not None for q in questions)
                 if not has_blocks:
                     for i, question in enumerate(questions):
                         question['block'] = (i // 20) + 1
+            sources.append((source, questions))
+        return sources, skipped
+
+    def record_fingerprints(self, sources):
+        for source, questions in sources:
+            defaults = {'size': source.size, 'mtime_ns': source.mtime_ns, 'sha256': source.sha256}
+            if questions is not None:
+                defaults['question_count'] = len(questions)
+            ImportFingerprint.objects.update_or_create(path=source.path, defaults=defaults)
+
+    def handle(self, *args, **options):
+        quiz_data_dir = get_quiz_data_dir()
+        force = options['force']
+        dry_run = options['dry_run']
+        registry = get_subject_registry()
+        subject_ids = options.get('subjects') or [subject.id for subject in registry]
+        unknown = [subject_id for subject_id in subject_ids if subject_id not in registry]
+        if unknown:
+            raise CommandError(f"Unknown subject: {', '.join(unknown)}")
+        
+        total_imported = 0
+        total_updated = 0
+        total_skipped_files = 0
+        total_hash_skipped = 0
+        subjects_updated = set()
+        
+        # Index static/img once; image metadata is stored on each question
+        manifest = rebuild_image_manifest()
+        
+        # One transaction for the whole import; rows are written in batches.
+        # Bulk writes send no signals: importer.apply_diff() invalidates the
+        # caches, stats and JSON are refreshed below.
+        with transaction.atomic():
+            fingerprints = {fp.path: fp for fp in ImportFingerprint.objects.all()}
+            for subject in (registry.get(subject_id) for subject_id in subject_ids):
+                sources, skipped = self.collect_sources(subject, quiz_data_dir, fingerprints, force)
+                total_skipped_files += skipped
+                records = [
+                    record for _, questions in sources if questions is not None
+                    for record in questions
+                ]
+                if not records:
+                    if skipped:
+                        self.stdout.write(f'  {subject.id}: {skipped} unchanged files skipped')
+                    if not dry_run:
+                        self.record_fingerprints(sources)
+                    continue
+                diff, stats = import_subject(subject.id, records, manifest, dry_run=dry_run, force=force)
                 
-                for q_data in questions:
-                    qid = q_data.get('id')
-                    if not qid:
-                        continue
-                    
-                    block_number = q_data.get('block', 1)
-                    text = q_data.get('question', '')
-                    options = q_data.get('options', {})
-                    
-                    # Get or create question
-                    question, created = Question.objects.get_or_create(
-                        subject=subject_id,
-                        qid=qid,
-                        defaults={
-                            'block_number': block_number,
-                            'text': text,
-                            'option_a': options.get('a', ''),
-                            'option_b': options.get('b', ''),
-                            'option_c': options.get('c', ''),
-                        }
-                    )
-                    
-                    # Update fields that are currently empty/null (preserve edits)
-                    updated = False
-                    if created:
-                        total_imported += 1
-                        # Set initial values from JSON if provided
-                        if q_data.get('correct') is not None:
-                            question.correct = q_data.get('correct')
-                            updated = True
-                        if q_data.get('explanation'):
-                            question.explanation = q_data.get('explanation', '')
-                            updated = True
-                    else:
-                        # Only update if currently empty/null
-                        if not question.correct and q_data.get('correct') is not None:
-                            question.correct = q_data.get('correct')
-                            updated = True
-                        if not question.explanation and q_data.get('explanation'):
-                            question.explanation = q_data.get('explanation', '')
-                            updated = True
-                        # Always update text/options/block_number from JSON (these are the source)
-                        if question.text != text:
-                            question.text = text
-                            updated = True
-                        if question.option_a != options.get('a', ''):
-                            question.option_a = options.get('a', '')
-                            updated = True
-                        if question.option_b != options.get('b', ''):
-                            question.option_b = options.get('b', '')
-                            updated = True
-                        if question.option_c != options.get('c', ''):
-                            question.option_c = options.get('c', '')
-                            updated = True
-                        if question.block_number != block_number:
-                            question.block_number = block_number
-                            updated = True
-                    
-                    if updated:
-                        question.save()
-                        if not created:
-                            total_updated += 1
-                        subjects_updated.add(subject_id)
-            
-            # Re-enable auto-export
-            set_skip_auto_export(False)
-            
-            # Export all updated subjects once at the end
-            for subject_id in subjects_updated:
-                export_subject_to_json(subject_id)
-            
-            self.stdout.write(self.style.SUCCESS(
-                f'Import complete: {total_imported} new questions, {total_updated} updated'
+                if dry_run:
+                    for line in diff.describe():
+                        self.stdout.write(line)
+                else:
+                    self.record_fingerprints(sources)
+                
+                self.stdout.write(
+                    f'  {subject.id}: {stats.created} created, {stats.updated} updated, '
+                    f'{stats.unchanged} unchanged ({stats.hash_skipped} by content hash), '
+                    f'{skipped} unchanged files skipped in {stats.seconds:.3f}s'
+                )
+                total_hash_skipped += stats.hash_skipped
+                total_imported += stats.created
+                total_updated += stats.updated
+                if stats.created or stats.updated:
+                    subjects_updated.add(subject.id)
+        
+        if dry_run:
+            self.stdout.write(self.style.WARNING(
+                f'Dry run: {total_imported} questions would be created, {total_updated} updated'
             ))
-        finally:
-            # Always re-enable auto-export even if there's an error
-            set_skip_auto_export(False)
-
+            return
+        
+        if subjects_updated:
+            # Per-question stats updates are skipped by bulk writes; rebuild once
+            rebuild_catalog_stats()
+        
+        # Export all updated subjects once at the end. Importing the exported
+        # files again is a no-op, so they are fingerprinted as imported.
+        for subject_id in subjects_updated:
+            export_subject_to_json(subject_id)
+            subject = get_subject_registry().get(subject_id)
+            sources, _ = self.collect_sources(subject, quiz_data_dir, {}, force=True)
+            self.record_fingerprints(sources)
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'Import complete: {total_imported} new questions, {total_updated} updated; '
+            f'skipped {total_skipped_files} unchanged files and {total_hash_skipped} unchanged questions'
+        ))
@@ -0,0 +1,173 @@
+"""
+Pre-render the public /learn/ tree to static files.
+
+Every URL listed by quiz.sitemaps (subject list, subjects, blocks and
+questions) is rendered through the real views and written as
+``<output>/<url path>/index.html`` together with precompressed
+``index.html.gz`` and, when the ``brotli`` package is installed,
+``index.html.br`` siblings. A reverse proxy can then serve the public SEO
+surface straight from disk (e.g. nginx ``gzip_static on``).
+
+``manifest.json`` in the output directory records the SHA-256 of every page,
+so re-runs only rewrite pages whose HTML changed.
+
+Usage:
+
+    python manage.py prerender_learn --output /var/www/gr2quiz-learn
+    python manage.py prerender_learn --output /var/www/gr2quiz-learn --incremental
+
+``--incremental`` re-renders only the subject list plus the subjects and
+blocks containing questions edited (``Question.edited_at``) since the last
+run. Run a full render after ``import_questions``, which does not set
+``edited_at``.
+"""
+import gzip
+import hashlib
+import json
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.urls import resolve
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from quiz.models import Question
+from quiz.shards import write_atomic
+from quiz.sitemaps import BlockSitemap, QuestionSitemap, SubjectListSitemap, SubjectSitemap
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def collect_pages():
+    """
+    Return [(path, scope)] for every sitemap URL.
+    scope is None for the subject list, (subject_id, None) for a subject
+    page and (subject_id, block_number) for block and question pages.
+    """
+    pages = []
+    sitemap = SubjectListSitemap()
+    for item in sitemap.items():
+        pages.append((sitemap.location(item), None))
+
+    sitemap = SubjectSitemap()
+    for item in sitemap.items():
+        pages.append((sitemap.location(item), (item[0], None)))
+
+    sitemap = BlockSitemap()
+    for item in sitemap.items():
+        pages.append((sitemap.location(item), (item[0], item[1])))
+
+    sitemap = QuestionSitemap()
+    for question in sitemap.items():
+        pages.append((sitemap.location(question), (question.subject, question.block_number)))
+
+    return pages
+
+
+class Command(BaseCommand):
+    help = 'Pre-render the public /learn/ pages to static HTML with precompressed siblings'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', type=str,
+            default=str(Path(settings.BASE_DIR) / 'prerendered'),
+            help='Output directory (default: BASE_DIR/prerendered)',
+        )
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='Only re-render subjects/blocks edited since the last run',
+        )
+
+    def handle(self, *args, **options):
+        output_dir = Path(options['output'])
+        output_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = output_dir / MANIFEST_NAME
+
+        manifest = {'generated_at': None, 'pages': {}}
+        if manifest_path.exists():
+            try:
+                manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+            except ValueError:
+                self.stdout.write(self.style.WARNING('Ignoring unreadable manifest.json'))
+
+        started_at = timezone.now()
+        pages = collect_pages()
+
+        if options['incremental']:
+            since = parse_datetime(manifest.get('generated_at') or '')
+            if since is None:
+                raise CommandError('No previous run recorded in manifest.json; run without --incremental first.')
+            touched = set(
+                Question.objects.filter(edited_at__gt=since)
+                .values_list('subject', 'block_number')
+                .distinct()
+            )
+            touched_subjects = {subject for subject, _ in touched}
+            pages = [
+                (path, scope) for path, scope in pages
+                if scope is None
+                or (scope[1] is None and scope[0] in touched_subjects)
+                or scope in touched
+            ]
+            self.stdout.write(f'Incremental run: {len(touched)} blocks edited since {since.isoformat()}')
+
+        if brotli is None:
+            self.stdout.write(self.style.WARNING('brotli is not installed; skipping .br output'))
+
+        factory = RequestFactory()
+        domain = getattr(settings, 'SITE_DOMAIN', None) or 'localhost'
+        written = unchanged = failed = 0
+        start = time.monotonic()
+
+        for path, _ in pages:
+            request = factory.get(path, secure=True, HTTP_HOST=domain)
+            request.user = AnonymousUser()
+            match = resolve(path)
+            response = match.func(request, *match.args, **match.kwargs)
+            if response.status_code != 200:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f'  {path}: HTTP {response.status_code}, skipped'))
+                continue
+
+            html = response.content
+            digest = hashlib.sha256(html).hexdigest()
+            page_dir = output_dir / path.strip('/')
+            index_path = page_dir / 'index.html'
+            if manifest['pages'].get(path, {}).get('sha256') == digest and index_path.exists():
+                unchanged += 1
+                continue
+
+            page_dir.mkdir(parents=True, exist_ok=True)
+            write_atomic(index_path, html)
+            write_atomic(page_dir / 'index.html.gz', gzip.compress(html, compresslevel=9, mtime=0))
+            if brotli is not None:
+                write_atomic(page_dir / 'index.html.br', brotli.compress(html))
+            manifest['pages'][path] = {'sha256': digest, 'bytes': len(html)}
+            written += 1
+
+        if not options['incremental']:
+            # Full run: drop pages that are no longer in the sitemap
+            current = {path for path, _ in pages}
+            for path in sorted(set(manifest['pages']) - current):
+                page_dir = output_dir / path.strip('/')
+                for name in ('index.html', 'index.html.gz', 'index.html.br'):
+                    (page_dir / name).unlink(missing_ok=True)
+                del manifest['pages'][path]
+                self.stdout.write(f'  removed stale page {path}')
+
+        manifest['generated_at'] = started_at.isoformat()
+        write_atomic(manifest_path, json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Pre-render complete in {time.monotonic() - start:.2f}s: '
+            f'{written} written, {unchanged} unchanged, {failed} failed ({len(pages)} pages checked)'
+        ))
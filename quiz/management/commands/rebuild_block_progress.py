@@ -0,0 +1,27 @@
+"""
+Management command to rebuild the per-user block progress summaries
+(latest attempt, best score, attempt count) from the BlockAttempt table.
+The summaries are normally kept current as attempts are recorded; run this
+after deleting or editing attempts outside the application.
+"""
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from quiz.progress import rebuild_block_progress
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-user block progress summaries from BlockAttempt'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', type=str, help='Only rebuild this user')
+
+    def handle(self, *args, **options):
+        user = None
+        if options.get('username'):
+            try:
+                user = User.objects.get(username=options['username'])
+            except User.DoesNotExist:
+                raise CommandError(f"User not found: {options['username']}")
+        rows = rebuild_block_progress(user)
+        self.stdout.write(self.style.SUCCESS(f'Block progress rebuilt: {rows} rows'))
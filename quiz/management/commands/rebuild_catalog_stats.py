@@ -0,0 +1,20 @@
+"""
+Management command to rebuild the per-block catalog statistics
+(question/answered/explained counts and last-modified times) from the
+Question table. The stats are normally kept current by the Question
+signals; run this after bulk changes made outside the ORM.
+"""
+from django.core.management.base import BaseCommand
+
+from quiz.catalog import rebuild_catalog_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-block catalog statistics from the Question table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subject', type=str, help='Only rebuild this subject')
+
+    def handle(self, *args, **options):
+        rows = rebuild_catalog_stats(options.get('subject'))
+        self.stdout.write(self.style.SUCCESS(f'Catalog stats rebuilt: {rows} blocks'))
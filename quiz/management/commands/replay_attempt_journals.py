@@ -0,0 +1,29 @@
+"""
+Management command to insert the write-behind attempt journals left by
+workers that exited without flushing (crash, SIGKILL, OOM).
+
+Workers already replay orphaned journals when they start (gr2quiz/wsgi.py);
+run this after stopping the application for good, or from a deploy script.
+Journals still locked by a running worker are left alone.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from quiz.attempt_journal import replay_journals
+
+
+class Command(BaseCommand):
+    help = 'Insert BlockAttempt rows from orphaned write-behind journals'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dir', type=str,
+            help='Journal directory (default: QUIZ_ATTEMPT_JOURNAL_DIR)',
+        )
+
+    def handle(self, *args, **options):
+        directory = options.get('dir') or settings.QUIZ_ATTEMPT_JOURNAL_DIR
+        if not directory:
+            raise CommandError('Write-behind attempts are disabled; set DJANGO_QUIZ_ATTEMPT_JOURNAL_DIR or pass --dir.')
+        replayed = replay_journals(directory)
+        self.stdout.write(self.style.SUCCESS(f'Replayed {replayed} attempts from {directory}'))
@@ -0,0 +1,48 @@
+"""
+Management command to re-scan static/img and refresh the image metadata
+stored on each Question (has_image, image_url, option image flags/URLs).
+
+Run it after deploying new or renamed images:
+
+    python manage.py rescan_images
+    python manage.py rescan_images --subject electrotehnica
+"""
+from django.core.management.base import BaseCommand
+
+from quiz.block_cache import bump_content_version
+from quiz.image_manifest import rebuild_image_manifest
+from quiz.page_cache import purge_subject_pages
+from quiz.models import Question
+
+
+class Command(BaseCommand):
+    help = 'Re-scan static/img and refresh per-question image metadata'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subject', type=str, help='Only re-scan questions of this subject')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per bulk update')
+
+    def handle(self, *args, **options):
+        manifest = rebuild_image_manifest()
+        self.stdout.write(f"Indexed {len(manifest)} image files")
+
+        questions = Question.objects.order_by('subject', 'qid')
+        if options.get('subject'):
+            questions = questions.filter(subject=options['subject'])
+
+        changed = []
+        scanned = 0
+        for question in questions.iterator(chunk_size=options['batch_size']):
+            scanned += 1
+            if question.refresh_image_metadata(manifest):
+                changed.append(question)
+
+        Question.objects.bulk_update(changed, Question.IMAGE_FIELDS, batch_size=options['batch_size'])
+        # bulk_update sends no signals; drop the cached bundles and pages ourselves
+        for subject in {question.subject for question in changed}:
+            bump_content_version(subject)
+            purge_subject_pages(subject)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Re-scan complete: {scanned} questions checked, {len(changed)} updated'
+        ))
@@ -0,0 +1,54 @@
+"""
+Management command to watch quiz_data/ and import changed subjects.
+
+Pages are served from the database, so a corrected JSON dropped into
+quiz_data/ is only visible once imported; run this once per server, next to
+the workers: with --import every changed subject is imported on its own
+(``import_questions --subject <id>``, diff-based, unchanged files and
+questions skipped) and the shared quiz cache is invalidated for all
+workers. Stop with Ctrl+C / SIGTERM.
+"""
+import signal
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from quiz.exporter import get_quiz_data_dir
+from quiz.watcher import QuizDataWatcher
+
+
+class Command(BaseCommand):
+    help = 'Watch quiz_data/ for changed subjects and optionally import them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--import', action='store_true', dest='run_import',
+            help='Run the diff-based database import for each changed subject',
+        )
+        parser.add_argument(
+            '--poll', action='store_true',
+            help='Poll file mtimes instead of using inotify',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=2.0,
+            help='Seconds between two polls (default: 2.0)',
+        )
+
+    def handle(self, *args, **options):
+        run_import = options['run_import']
+
+        def on_change(subject_id):
+            self.stdout.write(f'{subject_id} changed')
+            if run_import:
+                call_command('import_questions', '--subject', subject_id, stdout=self.stdout, stderr=self.stderr)
+
+        watcher = QuizDataWatcher(
+            on_change, quiz_data_dir=get_quiz_data_dir(),
+            poll_interval=options['interval'], use_inotify=not options['poll'],
+        )
+        signal.signal(signal.SIGTERM, lambda signum, frame: watcher.stop())
+        self.stdout.write(f'Watching {watcher.quiz_data_dir}' + (' (importing changes)' if run_import else ''))
+        try:
+            watcher.start(background=False)
+        except KeyboardInterrupt:
+            pass
@@ -1,7 +1,41 @@
 """
-Middleware to enforce authentication on all routes except login/register/static.
+Middleware to enforce authentication on all routes except login/register/static,
+and the sessionless fast path for anonymous requests to public routes.
 """
+import re
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware as BaseAuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.middleware import MessageMiddleware as BaseMessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware as BaseSessionMiddleware
+from django.core.exceptions import MiddlewareNotUsed
+from django.middleware.csrf import CsrfViewMiddleware as BaseCsrfViewMiddleware
 from django.shortcuts import redirect
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from .sitemaps import SITEMAPS
+
+# Routes that render the same for everyone: public learn pages, SEO routes
+# and static files. Paths ending in '/' are prefixes, others exact paths.
+PUBLIC_PATHS = (
+    '/static/',
+    '/learn/',
+    '/sitemap.xml',
+    '/sitemap-index.xml',
+    *(f'/sitemap-{section}.xml' for section in SITEMAPS),
+    '/robots.txt',
+    '/LICENSE',
+)
+
+
+def compile_path_matcher(paths):
+    """
+    Compile paths into one regex match function: entries ending in '/'
+    match as prefixes, the others only exactly.
+    """
+    alternatives = [re.escape(path) + ('' if path.endswith('/') else r'\Z') for path in paths]
+    return re.compile('|'.join(alternatives)).match
 
 
 class AuthenticationRequiredMiddleware:
@@ -12,7 +46,7 @@ class AuthenticationRequiredMiddleware:
     - /accounts/logout/ (POST only, enforced by view decorator)
     - Static files
     - Public learn pages (/learn/)
-    - SEO routes (/sitemap.xml, /robots.txt, /LICENSE)
+    - SEO routes (/sitemap.xml, /sitemap-index.xml and its sections, /robots.txt, /LICENSE)
     """
     def __init__(self, get_response):
         self.get_response = get_response
@@ -20,29 +54,80 @@ class AuthenticationRequiredMiddleware:
         self.exempt_paths = [
             '/accounts/login/',
             '/accounts/register/',
-            '/static/',
-            '/learn/',
-            '/sitemap.xml',
-            '/robots.txt',
-            '/LICENSE',
+            *PUBLIC_PATHS,
         ]
+        # One regex instead of scanning the list (twice) per request
+        self.is_exempt = compile_path_matcher(self.exempt_paths)
 
     def __call__(self, request):
-        # Allow static files
-        if request.path.startswith('/static/'):
-            return self.get_response(request)
-        
-        # Allow exempt paths (login, register, public learn pages, SEO routes)
-        if request.path in self.exempt_paths:
-            return self.get_response(request)
-        
-        # Allow paths that start with exempt prefixes
-        if any(request.path.startswith(path) for path in self.exempt_paths if path.endswith('/')):
+        # Allow exempt paths (login, register, static files, public learn pages, SEO routes)
+        if self.is_exempt(request.path):
             return self.get_response(request)
-        
+
         # Require authentication for all other paths
         if not request.user.is_authenticated:
             return redirect('login')
-        
+
         return self.get_response(request)
 
+
+class PublicFastPathMiddleware:
+    """
+    Serves anonymous GET/HEAD requests to PUBLIC_PATHS without sessions.
+
+    A request without a session cookie is flagged (request.public_fast_path)
+    and gets an AnonymousUser; the session, CSRF, authentication and
+    messages middleware below (the subclasses in this module) then pass it
+    through untouched, so no session is loaded and no cookie is set. The
+    response varies only on Cookie and, with QUIZ_PUBLIC_MAX_AGE, is marked
+    cacheable by shared proxies. Signed-in users keep the full stack.
+
+    Disabled (MiddlewareNotUsed) when QUIZ_PUBLIC_FAST_PATH is off.
+    """
+    def __init__(self, get_response):
+        if not settings.QUIZ_PUBLIC_FAST_PATH:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.is_public = compile_path_matcher(PUBLIC_PATHS)
+        self.max_age = settings.QUIZ_PUBLIC_MAX_AGE
+
+    def __call__(self, request):
+        if (
+            request.method not in ('GET', 'HEAD')
+            or settings.SESSION_COOKIE_NAME in request.COOKIES
+            or not self.is_public(request.path)
+        ):
+            return self.get_response(request)
+
+        request.public_fast_path = True
+        request.user = AnonymousUser()
+        response = self.get_response(request)
+        patch_vary_headers(response, ('Cookie',))
+        if self.max_age and response.status_code == 200 and not response.has_header('Cache-Control'):
+            patch_cache_control(response, public=True, max_age=self.max_age)
+        return response
+
+
+class FastPathSkipMixin:
+    """Pass requests flagged by PublicFastPathMiddleware straight through."""
+
+    def __call__(self, request):
+        if getattr(request, 'public_fast_path', False):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class SessionMiddleware(FastPathSkipMixin, BaseSessionMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(FastPathSkipMixin, BaseCsrfViewMiddleware):
+    pass
+
+
+class AuthenticationMiddleware(FastPathSkipMixin, BaseAuthenticationMiddleware):
+    pass
+
+
+class MessageMiddleware(FastPathSkipMixin, BaseMessageMiddleware):
+    pass
@@ -0,0 +1,56 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0004_blocknote"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="question",
+            name="has_image",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="question",
+            name="image_url",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.AddField(
+            model_name="question",
+            name="has_option_a_image",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="question",
+            name="option_a_image_url",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.AddField(
+            model_name="question",
+            name="has_option_b_image",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="question",
+            name="option_b_image_url",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.AddField(
+            model_name="question",
+            name="has_option_c_image",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="question",
+            name="option_c_image_url",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.AddField(
+            model_name="question",
+            name="images_scanned_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
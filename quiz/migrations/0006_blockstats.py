@@ -0,0 +1,64 @@
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+
+
+def populate_block_stats(apps, schema_editor):
+    Question = apps.get_model("quiz", "Question")
+    BlockStats = apps.get_model("quiz", "BlockStats")
+    rows = (
+        Question.objects.order_by()
+        .values("subject", "block_number")
+        .annotate(
+            question_count=Count("id"),
+            answered_count=Count("id", filter=Q(correct__isnull=False) & ~Q(correct="")),
+            explained_count=Count("id", filter=~Q(explanation="")),
+            last_modified=Max("edited_at"),
+        )
+    )
+    BlockStats.objects.bulk_create([BlockStats(**row) for row in rows])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0005_question_image_metadata"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BlockStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "subject",
+                    models.CharField(
+                        max_length=50,
+                        choices=[
+                            ("electrotehnica", "Electrotehnică"),
+                            ("legislatie-gr-2", "Legislație GR. 2"),
+                            ("norme-tehnice-gr-2", "Norme Tehnice GR. 2"),
+                        ],
+                    ),
+                ),
+                ("block_number", models.PositiveIntegerField()),
+                ("question_count", models.PositiveIntegerField(default=0)),
+                ("answered_count", models.PositiveIntegerField(default=0)),
+                ("explained_count", models.PositiveIntegerField(default=0)),
+                ("last_modified", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "ordering": ["subject", "block_number"],
+                "unique_together": {("subject", "block_number")},
+                "verbose_name_plural": "block stats",
+            },
+        ),
+        migrations.RunPython(populate_block_stats, migrations.RunPython.noop),
+    ]
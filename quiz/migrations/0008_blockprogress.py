@@ -0,0 +1,103 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def color_class_for(score, total):
+    if score == total:
+        return "block-green"
+    if score >= total - 2:
+        return "block-yellow"
+    return "block-red"
+
+
+def populate_block_progress(apps, schema_editor):
+    BlockAttempt = apps.get_model("quiz", "BlockAttempt")
+    BlockProgress = apps.get_model("quiz", "BlockProgress")
+    progress = {}
+    for attempt in BlockAttempt.objects.order_by("taken_at", "id").iterator(chunk_size=2000):
+        key = (attempt.user_id, attempt.subject, attempt.block_number)
+        row = progress.get(key)
+        if row is None:
+            row = progress[key] = BlockProgress(
+                user_id=key[0], subject=key[1], block_number=key[2],
+            )
+        row.attempt_count += 1
+        row.best_score = max(row.best_score, attempt.score)
+        # Ordered by taken_at: the last one seen is the latest
+        row.last_score = attempt.score
+        row.last_total = attempt.total
+        row.last_percentage = attempt.percentage
+        row.last_taken_at = attempt.taken_at
+        row.color_class = color_class_for(attempt.score, attempt.total)
+    BlockProgress.objects.bulk_create(progress.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("quiz", "0007_blockattempt_journal_id"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BlockProgress",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "subject",
+                    models.CharField(
+                        max_length=50,
+                        choices=[
+                            ("electrotehnica", "Electrotehnică"),
+                            ("legislatie-gr-2", "Legislație GR. 2"),
+                            ("norme-tehnice-gr-2", "Norme Tehnice GR. 2"),
+                        ],
+                    ),
+                ),
+                ("block_number", models.PositiveIntegerField()),
+                ("last_score", models.PositiveIntegerField(default=0)),
+                ("last_total", models.PositiveIntegerField(default=0)),
+                ("last_percentage", models.FloatField(default=0.0)),
+                ("last_taken_at", models.DateTimeField(blank=True, null=True)),
+                ("best_score", models.PositiveIntegerField(default=0)),
+                ("attempt_count", models.PositiveIntegerField(default=0)),
+                (
+                    "color_class",
+                    models.CharField(
+                        max_length=20,
+                        choices=[
+                            ("block-white", "Not attempted"),
+                            ("block-green", "All correct"),
+                            ("block-yellow", "At most 2 wrong"),
+                            ("block-red", "More than 2 wrong"),
+                        ],
+                        default="block-white",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="block_progress",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "block progress",
+                "ordering": ["user", "subject", "block_number"],
+                "unique_together": {("user", "subject", "block_number")},
+            },
+        ),
+        migrations.RunPython(populate_block_progress, migrations.RunPython.noop),
+    ]
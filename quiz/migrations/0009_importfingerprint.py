@@ -0,0 +1,32 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0008_blockprogress"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportFingerprint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("path", models.CharField(max_length=255, unique=True)),
+                ("sha256", models.CharField(max_length=64)),
+                ("question_count", models.PositiveIntegerField(default=0)),
+                ("imported_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ["path"],
+            },
+        ),
+    ]
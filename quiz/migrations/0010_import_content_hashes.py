@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0009_importfingerprint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="importfingerprint",
+            name="size",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="importfingerprint",
+            name="mtime_ns",
+            field=models.BigIntegerField(default=0),
+        ),
+        # Left empty here; the next import_questions run fills it in
+        migrations.AddField(
+            model_name="question",
+            name="content_hash",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+    ]
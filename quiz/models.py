@@ -1,14 +1,16 @@
+import hashlib
+import json
+
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+from .subjects import SUBJECTS
 
 
 class Question(models.Model):
     """Stores quiz questions in the database."""
-    SUBJECT_CHOICES = [
-        ('electrotehnica', 'Electrotehnică'),
-        ('legislatie-gr-2', 'Legislație GR. 2'),
-        ('norme-tehnice-gr-2', 'Norme Tehnice GR. 2'),
-    ]
+    SUBJECT_CHOICES = [(subject.id, subject.title) for subject in SUBJECTS]
     
     CORRECT_CHOICES = [
         ('a', 'A'),
@@ -28,6 +30,29 @@ class Question(models.Model):
     image_base = models.CharField(max_length=255, blank=True, default="")
     edited_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='edited_questions')
     edited_at = models.DateTimeField(null=True, blank=True)
+    # Denormalized image metadata, filled by import_questions / rescan_images
+    has_image = models.BooleanField(default=False)
+    image_url = models.CharField(max_length=255, blank=True, default="")
+    has_option_a_image = models.BooleanField(default=False)
+    option_a_image_url = models.CharField(max_length=255, blank=True, default="")
+    has_option_b_image = models.BooleanField(default=False)
+    option_b_image_url = models.CharField(max_length=255, blank=True, default="")
+    has_option_c_image = models.BooleanField(default=False)
+    option_c_image_url = models.CharField(max_length=255, blank=True, default="")
+    images_scanned_at = models.DateTimeField(null=True, blank=True)
+    # SHA-256 of CONTENT_FIELDS, kept by save() and import_questions
+    content_hash = models.CharField(max_length=64, blank=True, default="")
+
+    # Fields that come from quiz_data/ (see content_hash_of)
+    CONTENT_FIELDS = ('block_number', 'text', 'option_a', 'option_b', 'option_c', 'correct', 'explanation')
+
+    IMAGE_FIELDS = [
+        'has_image', 'image_url',
+        'has_option_a_image', 'option_a_image_url',
+        'has_option_b_image', 'option_b_image_url',
+        'has_option_c_image', 'option_c_image_url',
+        'images_scanned_at',
+    ]
 
     class Meta:
         ordering = ['subject', 'qid']
@@ -39,6 +64,121 @@ class Question(models.Model):
     def __str__(self):
         return f"{self.subject} Q{self.qid} (Block {self.block_number})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored block so signals can purge the old block's pages
+        instance._loaded_block_number = instance.__dict__.get('block_number')
+        return instance
+
+    @classmethod
+    def content_hash_of(cls, values):
+        """SHA-256 of the CONTENT_FIELDS in values (a dict of field values)."""
+        data = [values[field] or None for field in cls.CONTENT_FIELDS]
+        return hashlib.sha256(json.dumps(data, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    def compute_content_hash(self):
+        return self.content_hash_of({field: getattr(self, field) for field in self.CONTENT_FIELDS})
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or set(update_fields) & set(self.CONTENT_FIELDS):
+            self.content_hash = self.compute_content_hash()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'content_hash'}
+        super().save(*args, **kwargs)
+
+    def refresh_image_metadata(self, manifest=None):
+        """
+        Resolve the main and option images against the image manifest and
+        store the result on the instance (does not save).
+        Returns True if any image field changed.
+        """
+        from .image_manifest import get_image_manifest
+        from .utils import get_image_base
+
+        manifest = manifest or get_image_manifest()
+        base = get_image_base(self, self.subject)
+        resolved = {
+            'image_url': manifest.lookup(self.subject, base) or "",
+            'option_a_image_url': manifest.lookup(self.subject, base, 1) or "",
+            'option_b_image_url': manifest.lookup(self.subject, base, 2) or "",
+            'option_c_image_url': manifest.lookup(self.subject, base, 3) or "",
+        }
+        resolved['has_image'] = bool(resolved['image_url'])
+        resolved['has_option_a_image'] = bool(resolved['option_a_image_url'])
+        resolved['has_option_b_image'] = bool(resolved['option_b_image_url'])
+        resolved['has_option_c_image'] = bool(resolved['option_c_image_url'])
+
+        changed = self.images_scanned_at is None
+        for field, value in resolved.items():
+            if getattr(self, field) != value:
+                setattr(self, field, value)
+                changed = True
+        if changed:
+            self.images_scanned_at = timezone.now()
+        return changed
+
+    def image_context(self):
+        """
+        Image flags and URLs in the shape the quiz and learn templates expect.
+        Questions that were never scanned are resolved on the fly.
+        """
+        if self.images_scanned_at is None:
+            self.refresh_image_metadata()
+        return {
+            'question_img_exists': self.has_image,
+            'question_img_url': self.image_url or None,
+            'option_a_exists': self.has_option_a_image,
+            'option_a_url': self.option_a_image_url or None,
+            'option_b_exists': self.has_option_b_image,
+            'option_b_url': self.option_b_image_url or None,
+            'option_c_exists': self.has_option_c_image,
+            'option_c_url': self.option_c_image_url or None,
+        }
+
+
+class BlockStats(models.Model):
+    """
+    Denormalized per-block catalog statistics.
+    Maintained from the Question save/delete signals; rebuild with
+    `manage.py rebuild_catalog_stats`.
+    """
+    subject = models.CharField(max_length=50, choices=Question.SUBJECT_CHOICES)
+    block_number = models.PositiveIntegerField()
+    question_count = models.PositiveIntegerField(default=0)
+    answered_count = models.PositiveIntegerField(default=0)
+    explained_count = models.PositiveIntegerField(default=0)
+    last_modified = models.DateTimeField(null=True, blank=True)  # latest Question.edited_at
+
+    class Meta:
+        ordering = ['subject', 'block_number']
+        unique_together = [['subject', 'block_number']]
+        verbose_name_plural = 'block stats'
+
+    def __str__(self):
+        return f"{self.subject} Block {self.block_number}: {self.question_count} questions"
+
+
+class ImportFingerprint(models.Model):
+    """
+    Size, mtime and SHA-256 of a quiz_data source file as of its last
+    successful import, so import_questions can skip files that have not
+    changed since (matching size and mtime: without reading them).
+    """
+    path = models.CharField(max_length=255, unique=True)  # relative to QUIZ_DATA_DIR
+    size = models.PositiveBigIntegerField(default=0)
+    mtime_ns = models.BigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64)
+    question_count = models.PositiveIntegerField(default=0)
+    imported_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['path']
+
+    def __str__(self):
+        return f"{self.path} ({self.sha256[:12]})"
+
 
 class BlockAttempt(models.Model):
     """Stores quiz attempt results for each block."""
@@ -48,7 +188,11 @@ class BlockAttempt(models.Model):
     score = models.PositiveIntegerField()
     total = models.PositiveIntegerField()  # total questions in block
     percentage = models.FloatField()
-    taken_at = models.DateTimeField(auto_now_add=True)
+    # Set when the attempt is created, not when it is inserted: write-behind
+    # attempts (quiz/attempt_journal.py) reach the database later.
+    taken_at = models.DateTimeField(default=timezone.now, editable=False)
+    # Idempotency key for write-behind attempts, so a replayed journal never duplicates rows
+    journal_id = models.UUIDField(null=True, blank=True, unique=True, editable=False)
 
     class Meta:
         ordering = ['-taken_at']
@@ -60,6 +204,39 @@ class BlockAttempt(models.Model):
         return f"{self.user.username} - {self.subject} Block {self.block_number}: {self.score}/{self.total}"
 
 
+class BlockProgress(models.Model):
+    """
+    Per-user progress summary of one block: the latest attempt, the best
+    score and the attempt count. Updated with every BlockAttempt insert
+    (see quiz/progress.py); rebuild with `manage.py rebuild_block_progress`.
+    """
+    COLOR_CHOICES = [
+        ('block-white', 'Not attempted'),
+        ('block-green', 'All correct'),
+        ('block-yellow', 'At most 2 wrong'),
+        ('block-red', 'More than 2 wrong'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='block_progress')
+    subject = models.CharField(max_length=50, choices=Question.SUBJECT_CHOICES)
+    block_number = models.PositiveIntegerField()
+    last_score = models.PositiveIntegerField(default=0)
+    last_total = models.PositiveIntegerField(default=0)
+    last_percentage = models.FloatField(default=0.0)
+    last_taken_at = models.DateTimeField(null=True, blank=True)
+    best_score = models.PositiveIntegerField(default=0)
+    attempt_count = models.PositiveIntegerField(default=0)
+    color_class = models.CharField(max_length=20, choices=COLOR_CHOICES, default='block-white')
+
+    class Meta:
+        unique_together = [['user', 'subject', 'block_number']]
+        ordering = ['user', 'subject', 'block_number']
+        verbose_name_plural = 'block progress'
+
+    def __str__(self):
+        return f"{self.user.username} - {self.subject} Block {self.block_number}: {self.last_score}/{self.last_total} ({self.attempt_count} attempts)"
+
+
 class BlockNote(models.Model):
     """
     Personal note per user / subject / block.
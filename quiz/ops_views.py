@@ -0,0 +1,24 @@
+"""
+Operational status endpoint for monitoring.
+Superuser-only; returns JSON with runtime counters of this worker process.
+"""
+from django.http import Http404, JsonResponse
+
+from .attempt_journal import get_attempt_journal_status
+from .exporter import get_export_status
+from .page_cache import get_page_cache_stats
+
+
+def ops_status(request):
+    """
+    Runtime status as JSON.
+    URL: /ops/status/
+    """
+    if not request.user.is_superuser:
+        raise Http404()
+
+    return JsonResponse({
+        'page_cache': get_page_cache_stats(),
+        'attempt_journal': get_attempt_journal_status(),
+        'json_export': get_export_status(),
+    })
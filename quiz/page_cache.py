@@ -0,0 +1,140 @@
+"""
+Full-page response cache for the public /learn/ pages.
+
+Every cached page belongs to a logical page (the subject list, a subject,
+a block or a question). Each logical page has its own generation counter in
+the quiz cache and the generation is part of the response key, so editing
+question X only purges X's page, its block page, its subject page and the
+subject list (see quiz/signals.py).
+"""
+import hashlib
+from functools import wraps
+
+from .block_cache import bump_version, get_quiz_cache, get_version
+
+PAGE_TIMEOUT = 60 * 60 * 24
+GENERATION_KEY = 'quiz:page-gen:{page}'
+PAGE_KEY = 'quiz:page:{page}:g{generation}:{path}'
+STATS_KEY = 'quiz:page-stats:{counter}'
+
+
+def subject_list_page():
+    return 'list'
+
+
+def subject_page(subject_id):
+    return f'subject:{subject_id}'
+
+
+def block_page(subject_id, block_number):
+    return f'block:{subject_id}:{block_number}'
+
+
+def question_page(subject_id, block_number, qid):
+    return f'question:{subject_id}:{block_number}:{qid}'
+
+
+def _page_key(page, path):
+    generation = get_version(GENERATION_KEY.format(page=page))
+    path_hash = hashlib.md5(path.encode('utf-8')).hexdigest()
+    return PAGE_KEY.format(page=page, generation=generation, path=path_hash)
+
+
+def _count(counter):
+    cache = get_quiz_cache()
+    key = STATS_KEY.format(counter=counter)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def cache_learn_page(page_for_request):
+    """
+    Cache successful GET/HEAD responses of a learn view.
+
+    page_for_request(request, *args, **kwargs) returns the logical page the
+    request renders, or None when it should not be cached (e.g. bad slug).
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+
+            page = page_for_request(request, *args, **kwargs)
+            if page is None:
+                return view_func(request, *args, **kwargs)
+
+            cache = get_quiz_cache()
+            key = _page_key(page, request.path)
+            response = cache.get(key)
+            if response is not None:
+                _count('hits')
+                response['X-Cache'] = 'HIT'
+                return response
+
+            _count('misses')
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200 and not response.cookies and not response.streaming:
+                cache.set(key, response, PAGE_TIMEOUT)
+            response['X-Cache'] = 'MISS'
+            return response
+
+        return wrapper
+    return decorator
+
+
+def purge_pages(*pages):
+    """Invalidate the given logical pages by bumping their generations."""
+    for page in set(pages):
+        bump_version(GENERATION_KEY.format(page=page))
+
+
+def purge_question_pages(subject_id, block_number, qid, previous_block_number=None):
+    """
+    Purge everything that renders a question: its own page, its block page,
+    its subject page and the subject list. If the question moved between
+    blocks, the old block and old question pages are purged as well.
+    """
+    pages = [
+        question_page(subject_id, block_number, qid),
+        block_page(subject_id, block_number),
+        subject_page(subject_id),
+        subject_list_page(),
+    ]
+    if previous_block_number is not None and previous_block_number != block_number:
+        pages.append(question_page(subject_id, previous_block_number, qid))
+        pages.append(block_page(subject_id, previous_block_number))
+    purge_pages(*pages)
+
+
+def purge_subject_pages(subject_id):
+    """Purge every cached page of a subject (used after bulk updates)."""
+    from .models import Question
+
+    pages = [subject_page(subject_id), subject_list_page()]
+    for block_number, qid in Question.objects.filter(subject=subject_id).values_list('block_number', 'qid'):
+        pages.append(block_page(subject_id, block_number))
+        pages.append(question_page(subject_id, block_number, qid))
+    purge_pages(*pages)
+
+
+def get_page_cache_stats():
+    """Return hit/miss counters of the learn page cache."""
+    cache = get_quiz_cache()
+    counters = cache.get_many([STATS_KEY.format(counter=c) for c in ('hits', 'misses')])
+    hits = counters.get(STATS_KEY.format(counter='hits'), 0)
+    misses = counters.get(STATS_KEY.format(counter='misses'), 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else None,
+    }
+
+
+def reset_page_cache_stats():
+    """Reset the hit/miss counters."""
+    get_quiz_cache().delete_many([STATS_KEY.format(counter=c) for c in ('hits', 'misses')])
@@ -0,0 +1,140 @@
+"""
+Per-user block progress summaries (BlockProgress).
+
+Every BlockAttempt insert also folds the attempt into the user's
+BlockProgress row, in the same transaction: synchronous submissions via
+quiz.attempt_journal.record_attempt(), write-behind ones when the journal
+is flushed. Updates are single UPDATE statements with F()/Case expressions,
+so concurrent workers never lose an increment, and an attempt older than
+the stored one (late journal replay) only counts towards best score and
+attempt count.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Greatest
+
+from .models import BlockAttempt, BlockProgress
+
+NO_ATTEMPT_CLASS = 'block-white'
+
+
+def color_class_for(score, total):
+    """Dashboard tile colour of an attempt: all correct, at most 2 wrong, or worse."""
+    if score == total:
+        return 'block-green'
+    if score >= total - 2:
+        return 'block-yellow'
+    return 'block-red'
+
+
+def apply_attempt(progress, attempt):
+    """Fold one attempt into a BlockProgress instance in memory (does not save)."""
+    progress.attempt_count += 1
+    progress.best_score = max(progress.best_score, attempt.score)
+    if progress.last_taken_at is None or attempt.taken_at > progress.last_taken_at:
+        progress.last_score = attempt.score
+        progress.last_total = attempt.total
+        progress.last_percentage = attempt.percentage
+        progress.last_taken_at = attempt.taken_at
+        progress.color_class = color_class_for(attempt.score, attempt.total)
+    return progress
+
+
+def _summaries(attempts):
+    """Group attempts by block: {(user_id, subject, block): (count, best score, latest attempt)}."""
+    summaries = {}
+    for attempt in attempts:
+        key = (attempt.user_id, attempt.subject, attempt.block_number)
+        count, best, latest = summaries.get(key, (0, 0, None))
+        if latest is None or attempt.taken_at > latest.taken_at:
+            latest = attempt
+        summaries[key] = (count + 1, max(best, attempt.score), latest)
+    return summaries
+
+
+def _update(key, count, best, latest):
+    user_id, subject, block_number = key
+    newer = Q(last_taken_at__isnull=True) | Q(last_taken_at__lt=latest.taken_at)
+
+    def if_newer(value, field):
+        output_field = BlockProgress._meta.get_field(field)
+        return Case(When(newer, then=Value(value)), default=F(field), output_field=output_field)
+
+    return BlockProgress.objects.filter(
+        user_id=user_id, subject=subject, block_number=block_number,
+    ).update(
+        attempt_count=F('attempt_count') + count,
+        best_score=Greatest(F('best_score'), Value(best), output_field=BlockProgress._meta.get_field('best_score')),
+        last_score=if_newer(latest.score, 'last_score'),
+        last_total=if_newer(latest.total, 'last_total'),
+        last_percentage=if_newer(latest.percentage, 'last_percentage'),
+        color_class=if_newer(color_class_for(latest.score, latest.total), 'color_class'),
+        last_taken_at=if_newer(latest.taken_at, 'last_taken_at'),
+    )
+
+
+def record_progress(attempts):
+    """Fold newly inserted attempts into their BlockProgress rows (one UPDATE per block)."""
+    with transaction.atomic():
+        for key, (count, best, latest) in _summaries(attempts).items():
+            if _update(key, count, best, latest):
+                continue
+            user_id, subject, block_number = key
+            try:
+                with transaction.atomic():
+                    BlockProgress.objects.create(
+                        user_id=user_id,
+                        subject=subject,
+                        block_number=block_number,
+                        last_score=latest.score,
+                        last_total=latest.total,
+                        last_percentage=latest.percentage,
+                        last_taken_at=latest.taken_at,
+                        best_score=best,
+                        attempt_count=count,
+                        color_class=color_class_for(latest.score, latest.total),
+                    )
+            except IntegrityError:
+                # Created concurrently by another worker
+                _update(key, count, best, latest)
+
+
+def overlay_attempts(progress_by_block, user, attempts):
+    """
+    Overlay attempts not yet in the database (write-behind journal) on a
+    {(subject, block_number): BlockProgress} dict. Only attempts newer than
+    the stored latest one are applied, so a just-flushed attempt is not
+    counted twice.
+    """
+    for attempt in sorted(attempts, key=lambda a: a.taken_at):
+        key = (attempt.subject, attempt.block_number)
+        progress = progress_by_block.get(key)
+        if progress is None:
+            progress = BlockProgress(user=user, subject=attempt.subject, block_number=attempt.block_number)
+            progress_by_block[key] = progress
+        elif progress.last_taken_at and attempt.taken_at <= progress.last_taken_at:
+            continue
+        apply_attempt(progress, attempt)
+    return progress_by_block
+
+
+@transaction.atomic
+def rebuild_block_progress(user=None):
+    """Rebuild BlockProgress from BlockAttempt (all users, or one). Returns the row count."""
+    attempts = BlockAttempt.objects.order_by('taken_at', 'id')
+    rows = BlockProgress.objects.all()
+    if user is not None:
+        attempts = attempts.filter(user=user)
+        rows = rows.filter(user=user)
+    rows.delete()
+
+    progress = {}
+    for attempt in attempts.only(
+        'user_id', 'subject', 'block_number', 'score', 'total', 'percentage', 'taken_at'
+    ).iterator(chunk_size=2000):
+        key = (attempt.user_id, attempt.subject, attempt.block_number)
+        if key not in progress:
+            progress[key] = BlockProgress(user_id=key[0], subject=key[1], block_number=key[2])
+        apply_attempt(progress[key], attempt)
+    created = BlockProgress.objects.bulk_create(progress.values(), batch_size=500)
+    return len(created)
@@ -1,91 +1,241 @@
 """
 Rate limiting decorators for authentication endpoints.
 Prevents brute-force attacks on login and registration.
+
+Attempts are counted by a token bucket per client (capacity max_attempts,
+refilled at max_attempts per window) kept in a small SQLite database shared
+by all worker processes (settings.QUIZ_RATE_LIMIT_DB): taking a token is
+one BEGIN IMMEDIATE transaction, so concurrent requests from any worker
+cannot race past the limit. Two in-process fast paths keep the database
+off the hot path:
+    - a client that was refused is refused locally until its next token is
+      due, without asking the database again;
+    - for large limits, a client with a nearly full bucket takes a few
+      tokens at once and spends them locally for up to LEASE_SECONDS.
 """
+import math
+import os
+import sqlite3
+import threading
+import time
 from functools import wraps
-from django.core.cache import cache
-from django.http import HttpResponse
+
 from django.conf import settings
-import time
+from django.http import HttpResponse
+
+# How long tokens taken ahead stay usable in one process
+LEASE_SECONDS = 1.0
+# Take tokens ahead only for limits of at least this many attempts
+LEASE_MIN_CAPACITY = 20
+# Expired-bucket cleanup runs every CLEANUP_EVERY takes
+CLEANUP_EVERY = 1000
+# Local (per-process) state is pruned when it grows past this many keys
+LOCAL_MAX_KEYS = 10000
+
+
+class SQLiteBucketStore:
+    """Token buckets in a SQLite database, safe across threads and processes."""
+
+    def __init__(self, path, timeout=10.0):
+        self.path = str(path)
+        self.timeout = timeout
+        self._local = threading.local()
+        self._takes = 0
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS buckets ('
+                'key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+            )
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def take(self, key, capacity, rate, count=1, keep=0.0):
+        """
+        Atomically take count tokens from the bucket if at least count + keep
+        are available, else one token if available. Returns (taken,
+        retry_after): taken is 0 when the bucket is empty, and retry_after
+        the seconds until the next token.
+        """
+        conn = self._connection()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+            tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+            if tokens >= count + keep:
+                taken = count
+            elif tokens >= 1:
+                taken = 1
+            else:
+                taken = 0
+            tokens -= taken
+            conn.execute(
+                'INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated',
+                (key, tokens, now),
+            )
+            self._takes += 1
+            if self._takes % CLEANUP_EVERY == 0:
+                # Buckets that refilled completely carry no information
+                conn.execute('DELETE FROM buckets WHERE tokens + (? - updated) * ? >= ?', (now, rate, capacity))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        retry_after = 0.0 if taken else (1 - tokens) / rate
+        return taken, retry_after
+
+    def reset(self, key):
+        """Refill the bucket (forget the client)."""
+        self._connection().execute('DELETE FROM buckets WHERE key = ?', (key,))
+
+    def clear(self):
+        self._connection().execute('DELETE FROM buckets')
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_rate_limit_store():
+    """Return the process-wide store of settings.QUIZ_RATE_LIMIT_DB."""
+    path = str(settings.QUIZ_RATE_LIMIT_DB)
+    store = _stores.get(path)
+    if store is None:
+        with _stores_lock:
+            store = _stores.setdefault(path, SQLiteBucketStore(path))
+    return store
+
+
+class TokenBucketLimiter:
+    """
+    Allows capacity attempts per client, refilled at capacity per
+    window_seconds, counted in a shared store (default: the
+    QUIZ_RATE_LIMIT_DB store).
+    """
+
+    def __init__(self, capacity, window_seconds, store=None):
+        self.capacity = capacity
+        self.rate = capacity / window_seconds
+        self.store = store
+        self.lease = capacity // 10 if capacity >= LEASE_MIN_CAPACITY else 0
+        self._lock = threading.Lock()
+        self._blocked_until = {}  # key -> time.time() of the next token
+        self._leases = {}  # key -> [tokens, expires]
+
+    def _get_store(self):
+        return self.store if self.store is not None else get_rate_limit_store()
+
+    def _prune(self, now):
+        if len(self._blocked_until) > LOCAL_MAX_KEYS:
+            self._blocked_until = {k: t for k, t in self._blocked_until.items() if t > now}
+        if len(self._leases) > LOCAL_MAX_KEYS:
+            self._leases = {k: lease for k, lease in self._leases.items() if lease[1] > now}
+
+    def acquire(self, key):
+        """Take one attempt for key. Returns (allowed, retry_after seconds)."""
+        now = time.time()
+        with self._lock:
+            blocked_until = self._blocked_until.get(key)
+            if blocked_until is not None:
+                if blocked_until > now:
+                    return False, blocked_until - now
+                del self._blocked_until[key]
+            lease = self._leases.get(key)
+            if lease is not None:
+                if lease[0] > 0 and lease[1] > now:
+                    lease[0] -= 1
+                    return True, 0.0
+                del self._leases[key]
+
+        # Take the lease's tokens too while the bucket stays at least half full
+        count = 1 + self.lease
+        taken, retry_after = self._get_store().take(key, self.capacity, self.rate, count, keep=self.capacity / 2)
+        with self._lock:
+            self._prune(now)
+            if not taken:
+                self._blocked_until[key] = now + retry_after
+                return False, retry_after
+            if taken > 1:
+                self._leases[key] = [taken - 1, now + LEASE_SECONDS]
+        return True, 0.0
+
+    def reset(self, key):
+        """Forget key's attempts, here and in the shared store."""
+        with self._lock:
+            self._blocked_until.pop(key, None)
+            self._leases.pop(key, None)
+        self._get_store().reset(key)
+
+    def clear_local(self):
+        """Drop this process's fast-path state."""
+        with self._lock:
+            self._blocked_until.clear()
+            self._leases.clear()
+
+
+def get_client_ip(request):
+    """Return the client IP address used as the rate limiting key."""
+    # Security: Only trust X-Forwarded-For if we're behind a known proxy
+    # Otherwise use REMOTE_ADDR to prevent spoofing
+    use_forwarded = getattr(settings, 'DJANGO_USE_X_FORWARDED_PROTO', False)
+    if use_forwarded:
+        # Behind proxy - trust first IP in X-Forwarded-For (proxy should sanitize)
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    # Direct connection - use REMOTE_ADDR (cannot be spoofed)
+    return request.META.get('REMOTE_ADDR', 'unknown')
 
 
 def rate_limit(max_attempts=5, window_seconds=300, key_prefix='rate_limit'):
     """
     Rate limiting decorator for authentication endpoints.
     Only counts failed attempts (not successful ones).
-    
+
     Args:
         max_attempts: Maximum number of failed attempts allowed
-        window_seconds: Time window in seconds (default: 5 minutes)
-        key_prefix: Prefix for cache key
-    
+        window_seconds: Time in which the attempts are refilled (default: 5 minutes)
+        key_prefix: Prefix for the client key
+
     Returns:
         Decorated function that enforces rate limiting
     """
+    limiter = TokenBucketLimiter(max_attempts, window_seconds)
+
     def decorator(view_func):
         @wraps(view_func)
         def wrapper(request, *args, **kwargs):
-            # Get client identifier (IP address)
-            # Security: Only trust X-Forwarded-For if we're behind a known proxy
-            # Otherwise use REMOTE_ADDR to prevent spoofing
-            use_forwarded = getattr(settings, 'DJANGO_USE_X_FORWARDED_PROTO', False)
-            if use_forwarded:
-                # Behind proxy - trust first IP in X-Forwarded-For (proxy should sanitize)
-                forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
-                if forwarded:
-                    client_ip = forwarded.split(',')[0].strip()
-                else:
-                    client_ip = request.META.get('REMOTE_ADDR', 'unknown')
-            else:
-                # Direct connection - use REMOTE_ADDR (cannot be spoofed)
-                client_ip = request.META.get('REMOTE_ADDR', 'unknown')
-            
-            # Build cache key
-            cache_key = f"{key_prefix}:{client_ip}"
-            
-            # Get current failed attempts
-            attempts_data = cache.get(cache_key, {'count': 0, 'first_attempt': time.time()})
-            
-            # Check if window has expired
-            elapsed = time.time() - attempts_data['first_attempt']
-            if elapsed > window_seconds:
-                # Reset window
-                attempts_data = {'count': 0, 'first_attempt': time.time()}
-            
-            # Check if limit exceeded (only for POST requests)
-            if request.method == 'POST' and attempts_data['count'] >= max_attempts:
-                remaining = int(window_seconds - elapsed)
+            # Only POST requests (login/registration attempts) are limited
+            if request.method != 'POST':
+                return view_func(request, *args, **kwargs)
+
+            key = f"{key_prefix}:{get_client_ip(request)}"
+            # Every attempt takes a token up front (atomically), so concurrent
+            # attempts cannot all pass the check; a successful one refills it.
+            allowed, retry_after = limiter.acquire(key)
+            if not allowed:
                 return HttpResponse(
-                    f"Prea multe încercări eșuate. Te rugăm să încerci din nou în {remaining} secunde.",
+                    f"Prea multe încercări eșuate. Te rugăm să încerci din nou în {math.ceil(retry_after)} secunde.",
                     status=429,
                     content_type='text/plain; charset=utf-8'
                 )
-            
-            # Call the view
+
             response = view_func(request, *args, **kwargs)
-            
-            # Only count failed attempts (POST requests that didn't result in authentication)
-            if request.method == 'POST':
-                # Check if authentication was successful
-                is_successful = False
-                if hasattr(response, 'status_code'):
-                    # Successful login/registration results in redirect (302) with authenticated user
-                    if response.status_code == 302:
-                        # Check if user is authenticated after the view
-                        # Note: login() sets user in request, so we check after view execution
-                        if request.user.is_authenticated:
-                            is_successful = True
-                
-                if is_successful:
-                    # Successful authentication - reset counter
-                    cache.delete(cache_key)
-                else:
-                    # Failed attempt - increment counter
-                    attempts_data['count'] += 1
-                    cache.set(cache_key, attempts_data, window_seconds)
-            
+
+            # Successful login/registration results in redirect (302) with authenticated user
+            # Note: login() sets user in request, so we check after view execution
+            if getattr(response, 'status_code', None) == 302 and request.user.is_authenticated:
+                limiter.reset(key)
+
             return response
-        
+
+        wrapper.limiter = limiter
         return wrapper
     return decorator
-
@@ -17,7 +17,8 @@ def robots_txt(request):
     if not domain:
         # Fallback only for development
         domain = request.get_host()
-    sitemap_url = f"https://{domain}/sitemap.xml"
+    # The index lists one sitemap per section; /sitemap.xml (all sections) stays available
+    sitemap_url = f"https://{domain}/sitemap-index.xml"
     
     content = f"""User-agent: *
 Allow: /learn/
@@ -29,6 +30,7 @@ Disallow: /register/
 Disallow: /dashboard/
 Disallow: /subject/
 Disallow: /question/
+Disallow: /ops/
 
 Sitemap: {sitemap_url}
 """
@@ -0,0 +1,99 @@
+"""
+Precompiled slug routing table for the public learn URLs.
+
+Built once per process from the subject registry (quiz.subjects):
+    subject slug  -> subject
+    legacy slug   -> subject   (e.g. 'legislatie-gr-2-legislatie-gr-2')
+    block slug    -> (subject_id, block_number)
+
+The path converters below resolve slugs during URL matching, so learn
+views receive SubjectRef/BlockRef objects instead of raw strings.
+"""
+import re
+from collections import namedtuple
+from functools import lru_cache
+from types import MappingProxyType
+
+from django.utils.text import slugify
+
+from .subjects import get_subject_registry
+
+# subject: the quiz.subjects.Subject record; slug: the slug as it appeared in the URL
+SubjectRef = namedtuple('SubjectRef', 'subject slug')
+BlockRef = namedtuple('BlockRef', 'subject_id block_number slug')
+
+
+class RoutingTable:
+    """Immutable slug lookup tables. Use get_routing_table()."""
+    __slots__ = ('subjects', 'canonical_slugs', '_slugs', '_legacy_re', '_block_re')
+
+    def __init__(self, registry):
+        slugs = {}
+        for subject in registry:
+            slugs[registry.slugs[subject.id]] = subject
+            slugs[subject.id] = subject
+            # Legacy format: slugified title always followed by the id
+            slugs.setdefault(f"{slugify(subject.title)}-{subject.id}", subject)
+
+        self.subjects = registry.by_id
+        self.canonical_slugs = registry.slugs
+        self._slugs = MappingProxyType(slugs)
+
+        # Longest ids first so the most specific suffix wins
+        ids = '|'.join(re.escape(s) for s in sorted(self.subjects, key=len, reverse=True))
+        self._legacy_re = re.compile(rf'(?:^|-)({ids})$') if ids else None
+        self._block_re = re.compile(rf'^bloc-(\d+)-({ids})$') if ids else None
+
+    def subject_for_slug(self, slug):
+        """Return the subject for a current or legacy subject slug, or None."""
+        subject = self._slugs.get(slug)
+        if subject is not None:
+            return subject
+        # Any other '<something>-<subject_id>' legacy slug
+        match = self._legacy_re.search(slug) if self._legacy_re else None
+        return self.subjects[match.group(1)] if match else None
+
+    def parse_block_slug(self, slug):
+        """Return (subject_id, block_number) for 'bloc-<n>-<subject_id>', or (None, None)."""
+        match = self._block_re.match(slug) if self._block_re else None
+        if not match:
+            return None, None
+        return match.group(2), int(match.group(1))
+
+
+@lru_cache(maxsize=None)
+def get_routing_table():
+    """Return the process-wide routing table, building it on first use."""
+    return RoutingTable(get_subject_registry())
+
+
+class SubjectSlugConverter:
+    """Path converter: subject slug -> SubjectRef."""
+    regex = '[^/]+'
+
+    def to_python(self, value):
+        subject = get_routing_table().subject_for_slug(value)
+        if subject is None:
+            raise ValueError(f"Unknown subject slug: {value}")
+        return SubjectRef(subject, value)
+
+    def to_url(self, value):
+        if isinstance(value, SubjectRef):
+            return value.slug
+        return str(value)
+
+
+class BlockSlugConverter:
+    """Path converter: 'bloc-<n>-<subject_id>' -> BlockRef."""
+    regex = 'bloc-[0-9]+-[^/]+'
+
+    def to_python(self, value):
+        subject_id, block_number = get_routing_table().parse_block_slug(value)
+        if subject_id is None or not block_number:
+            raise ValueError(f"Unknown block slug: {value}")
+        return BlockRef(subject_id, block_number, value)
+
+    def to_url(self, value):
+        if isinstance(value, BlockRef):
+            return value.slug
+        return str(value)
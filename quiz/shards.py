@@ -0,0 +1,181 @@
+"""
+Sharded question bank layout in quiz_data/.
+
+    quiz_data/<subject>/manifest.json
+    quiz_data/<subject>/block-001.json
+    quiz_data/<subject>/block-002.json
+    ...
+
+Each shard is one compact JSON document holding the questions of one
+block. manifest.json records the subject metadata (title, blockSize) and,
+per block, the shard file name, its SHA-256 and its question count, so
+writers only rewrite shards whose content changed and readers only parse
+shards whose hash they have not seen yet.
+
+The legacy single-file format (quiz_data/<subject>.json) stays readable
+everywhere and is still available as an export format. When both exist,
+readers use whichever was modified last (see current_source): the shards
+after an export, a corrected legacy file dropped in afterwards until the
+next export rewrites the shards.
+"""
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+SHARD_NAME = 'block-{block_number:03d}.json'
+
+EXPORT_FORMATS = ('sharded', 'legacy', 'both')
+
+
+@contextmanager
+def atomic_writer(path, mode='wb', **kwargs):
+    """
+    Open a temp file next to path for writing; it replaces path when the
+    block exits without error and is removed otherwise.
+    """
+    tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    try:
+        with open(tmp_path, mode, **kwargs) as f:
+            yield f
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def write_atomic(path, data):
+    """Write bytes or text to path via a temp file in the same directory and rename."""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    with atomic_writer(path) as f:
+        f.write(data)
+
+
+def subject_dir(quiz_data_dir, subject_id):
+    """Directory holding a subject's shards."""
+    return Path(quiz_data_dir) / subject_id
+
+
+def read_manifest(directory):
+    """Return the parsed manifest of a shard directory, or None if there is none."""
+    path = Path(directory) / MANIFEST_NAME
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return None
+
+
+def current_source(quiz_data_dir, subject):
+    """
+    Return (path, stat) of the file a subject is read from: its shard
+    manifest, unless the legacy quiz_data/<subject>.json is newer. None
+    when neither exists.
+    """
+    current = None
+    for path in (subject_dir(quiz_data_dir, subject.id) / MANIFEST_NAME, Path(quiz_data_dir) / subject.data_file):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        if current is None or stat.st_mtime_ns > current[1].st_mtime_ns:
+            current = (path, stat)
+    return current
+
+
+def read_current_manifest(quiz_data_dir, subject):
+    """Return the subject's manifest if the shards are its current source (see current_source), else None."""
+    source = current_source(quiz_data_dir, subject)
+    if source is None or source[0].name != MANIFEST_NAME:
+        return None
+    return read_manifest(source[0].parent)
+
+
+def encode_shard(subject_id, block_number, questions):
+    """Compact, deterministic JSON bytes of one block shard."""
+    return json.dumps(
+        {'subject': subject_id, 'block': block_number, 'questions': questions},
+        ensure_ascii=False,
+        separators=(',', ':'),
+    ).encode('utf-8')
+
+
+def load_shard(directory, entry):
+    """Return the question dicts of the shard described by a manifest entry."""
+    data = json.loads((Path(directory) / entry['file']).read_bytes())
+    return data.get('questions', [])
+
+
+def shard_entries(manifest):
+    """Return [(block_number, entry)] of a manifest, ordered by block."""
+    return sorted((int(block), entry) for block, entry in manifest.get('shards', {}).items())
+
+
+def write_shards(directory, subject_id, title, block_size, questions):
+    """
+    Write a subject's questions (export dicts with a 'block' key, ordered
+    by id) as block shards. See write_block_shards().
+    """
+    by_block = {}
+    for question in questions:
+        by_block.setdefault(question['block'], []).append(question)
+    return write_block_shards(
+        directory, subject_id, title, block_size,
+        ((block_number, by_block[block_number]) for block_number in sorted(by_block)),
+    )
+
+
+def write_block_shards(directory, subject_id, title, block_size, blocks):
+    """
+    Write a subject's blocks as shards, rewriting only shards whose SHA-256
+    changed and removing shards of blocks that no longer exist. blocks is
+    an iterable of (block_number, questions) pairs, so callers can stream
+    one block at a time.
+
+    Returns (written, unchanged, removed) shard counts.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    previous = read_manifest(directory) or {}
+    previous_shards = previous.get('shards', {})
+
+    shards = {}
+    written = unchanged = question_count = 0
+    for block_number, block_questions in blocks:
+        data = encode_shard(subject_id, block_number, block_questions)
+        digest = hashlib.sha256(data).hexdigest()
+        name = SHARD_NAME.format(block_number=block_number)
+        old = previous_shards.get(str(block_number))
+        if old and old['sha256'] == digest and (directory / name).exists():
+            unchanged += 1
+        else:
+            write_atomic(directory / name, data)
+            written += 1
+        shards[str(block_number)] = {
+            'file': name,
+            'sha256': digest,
+            'questions': len(block_questions),
+        }
+        question_count += len(block_questions)
+
+    removed = 0
+    for block, entry in previous_shards.items():
+        if block not in shards:
+            (directory / entry['file']).unlink(missing_ok=True)
+            removed += 1
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'subject': subject_id,
+        'title': title,
+        'blockSize': block_size,
+        'questionCount': question_count,
+        'shards': shards,
+    }
+    if manifest != previous:
+        write_atomic(directory / MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True))
+    return written, unchanged, removed
@@ -1,15 +1,19 @@
 """
 Django signals for automatic JSON synchronization.
-Automatically exports questions to JSON files when they are saved.
+Queues a debounced background export of the subject's JSON file when a
+question is saved (quiz/exporter.py), keeps the catalog stats current and
+invalidates the cached block bundles and learn pages it affects.
 Uses transaction.on_commit to avoid SQLite lock errors.
 """
-import json
-from pathlib import Path
+import logging
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.db import transaction
-from django.conf import settings
 from .models import Question
+from .block_cache import bump_content_version
+from .catalog import refresh_block_stats
+from .exporter import export_subject, schedule_export
+from .page_cache import purge_question_pages
 
 
 # Thread-local storage to track if we're in a bulk import
@@ -30,78 +34,56 @@ def get_skip_auto_export():
 
 def export_subject_to_json(subject_id):
     """
-    Export a single subject's questions to JSON file.
-    This is the same logic as export_questions command but for one subject.
+    Export a single subject's questions to JSON file, synchronously.
+    Saves and deletes use the debounced background worker instead
+    (quiz.exporter.schedule_export).
     """
     try:
-        base_dir = Path(settings.BASE_DIR)
-        quiz_data_dir = base_dir / 'quiz_data'
-        
-        mapping = {
-            "electrotehnica": "electrotehnica.json",
-            "legislatie-gr-2": "legislatie-gr-2.json",
-            "norme-tehnice-gr-2": "norme-tehnice-gr-2.json",
-        }
-        
-        if subject_id not in mapping:
-            return
-        
-        filename = mapping[subject_id]
-        out_path = quiz_data_dir / filename
-        
-        # Try to preserve existing top-level metadata (title, blockSize, etc.)
-        base_data = {}
-        if out_path.exists():
-            try:
-                base_data = json.loads(out_path.read_text(encoding="utf-8"))
-            except Exception:
-                base_data = {}
-        
-        title = base_data.get("title") or subject_id.replace("-", " ").title()
-        block_size = base_data.get("blockSize", 20)
-        
-        # Get all questions for this subject
-        questions_qs = (
-            Question.objects.filter(subject=subject_id)
-            .order_by("qid")
-        )
-        
-        questions = []
-        for q in questions_qs:
-            questions.append({
-                "id": q.qid,
-                "question": q.text,
-                "options": {
-                    "a": q.option_a,
-                    "b": q.option_b,
-                    "c": q.option_c,
-                },
-                "correct": q.correct,
-                "explanation": q.explanation or "",
-                "block": q.block_number,
-                "image_base": q.image_base or None,
-            })
-        
-        export_data = {
-            "title": title,
-            "subject": subject_id,
-            "blockSize": block_size,
-            "questionCount": len(questions),
-            "questions": questions,
-        }
-        
-        # Write to file
-        out_path.write_text(
-            json.dumps(export_data, ensure_ascii=False, indent=2),
-            encoding="utf-8",
-        )
+        export_subject(subject_id)
     except Exception as e:
-        # Log error but don't break the save operation
-        import logging
+        # Log error but don't break the calling operation
         logger = logging.getLogger('quiz.signals')
         logger.error(f"Failed to auto-export {subject_id} to JSON: {e}", exc_info=True)
 
 
+def invalidate_subject_cache(subject_id):
+    """
+    Bump the subject's content version so cached block bundles are rebuilt.
+    Bumped immediately (the current request sees its own write) and again
+    after commit (discards bundles rebuilt from pre-commit data meanwhile).
+    """
+    bump_content_version(subject_id)
+    transaction.on_commit(lambda: bump_content_version(subject_id))
+
+
+def invalidate_question_pages(instance):
+    """
+    Purge the cached learn pages showing this question (its page, block,
+    subject and the subject list), now and again after commit.
+    """
+    args = (
+        instance.subject,
+        instance.block_number,
+        instance.qid,
+        getattr(instance, '_loaded_block_number', None),
+    )
+    purge_question_pages(*args)
+    transaction.on_commit(lambda: purge_question_pages(*args))
+
+
+def update_block_stats(instance):
+    """
+    Recompute the catalog stats of the question's block (and of its previous
+    block if it moved). Skipped during bulk imports, which rebuild at the end.
+    """
+    if get_skip_auto_export():
+        return
+    refresh_block_stats(instance.subject, instance.block_number)
+    previous_block_number = getattr(instance, '_loaded_block_number', None)
+    if previous_block_number is not None and previous_block_number != instance.block_number:
+        refresh_block_stats(instance.subject, previous_block_number)
+
+
 @receiver(post_save, sender=Question)
 def auto_export_question(sender, instance, created, **kwargs):
     """
@@ -109,16 +91,20 @@ def auto_export_question(sender, instance, created, **kwargs):
     Skips during bulk imports to avoid performance issues.
     Uses transaction.on_commit to avoid SQLite lock errors.
     """
+    invalidate_subject_cache(instance.subject)
+    invalidate_question_pages(instance)
+    update_block_stats(instance)
+    instance._loaded_block_number = instance.block_number
+    
     # Skip if we're in a bulk import operation
     if get_skip_auto_export():
         return
     
-    # Export only the affected subject
+    # Queue a debounced background export of the affected subject
     # Use transaction.on_commit to avoid SQLite lock errors
     # This ensures the export happens after the transaction commits
-    transaction.on_commit(
-        lambda: export_subject_to_json(instance.subject)
-    )
+    subject_id = instance.subject
+    transaction.on_commit(lambda: schedule_export(subject_id))
 
 
 @receiver(post_delete, sender=Question)
@@ -127,13 +113,15 @@ def auto_export_question_delete(sender, instance, **kwargs):
     Automatically export when a question is deleted.
     Uses transaction.on_commit to avoid SQLite lock errors.
     """
-    if get_skip_auto_export():
-        return
-    
     # Store subject_id before instance is deleted
     subject_id = instance.subject
     
-    transaction.on_commit(
-        lambda: export_subject_to_json(subject_id)
-    )
+    invalidate_subject_cache(subject_id)
+    invalidate_question_pages(instance)
+    update_block_stats(instance)
+    
+    if get_skip_auto_export():
+        return
+    
+    transaction.on_commit(lambda: schedule_export(subject_id))
 
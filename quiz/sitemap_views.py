@@ -0,0 +1,75 @@
+"""
+Sitemap views: the whole sitemap (/sitemap.xml), a sitemap index
+(/sitemap-index.xml) and one sitemap per section (/sitemap-<section>.xml).
+
+Rendered sitemaps are kept in the quiz cache under the catalog version
+(bumped by every question edit and import, see quiz/catalog.py), so they
+are rebuilt only after the catalog changed. Responses are gzip-compressed
+for clients that accept it.
+"""
+from functools import wraps
+
+from django.contrib.sitemaps import views as sitemap_views
+from django.http import HttpResponse
+from django.views.decorators.gzip import gzip_page
+
+from .block_cache import get_quiz_cache, get_version
+from .catalog import CATALOG_VERSION_KEY
+from .sitemaps import SITEMAPS
+
+SITEMAP_TIMEOUT = 60 * 60 * 24
+SITEMAP_KEY = 'quiz:sitemap:v{version}:{scheme}:{name}:{page}'
+CACHED_HEADERS = ('Content-Type', 'Last-Modified', 'X-Robots-Tag')
+
+
+def cache_sitemap(name):
+    """Cache the rendered GET/HEAD responses of a sitemap view per catalog version and page."""
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            page = request.GET.get('p', '1')
+            if request.method not in ('GET', 'HEAD') or not page.isdigit():
+                return view_func(request, *args, **kwargs)
+            key = SITEMAP_KEY.format(
+                version=get_version(CATALOG_VERSION_KEY), scheme=request.scheme,
+                name=name.format(**kwargs), page=page,
+            )
+            cache = get_quiz_cache()
+            cached = cache.get(key)
+            if cached is not None:
+                content, headers = cached
+                response = HttpResponse(content)
+                for header, value in headers.items():
+                    response[header] = value
+                return response
+
+            response = view_func(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+            if response.status_code == 200:
+                headers = {header: response[header] for header in CACHED_HEADERS if header in response}
+                cache.set(key, (response.content, headers), SITEMAP_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
+
+
+@gzip_page
+@cache_sitemap('all')
+def sitemap(request):
+    """All sections in one sitemap. URL: /sitemap.xml"""
+    return sitemap_views.sitemap(request, sitemaps=SITEMAPS)
+
+
+@gzip_page
+@cache_sitemap('index')
+def sitemap_index(request):
+    """Sitemap index with one entry per section. URL: /sitemap-index.xml"""
+    return sitemap_views.index(request, sitemaps=SITEMAPS, sitemap_url_name='sitemap-section')
+
+
+@gzip_page
+@cache_sitemap('section:{section}')
+def sitemap_section(request, section):
+    """One section's sitemap. URL: /sitemap-<section>.xml"""
+    return sitemap_views.sitemap(request, sitemaps=SITEMAPS, section=section)
@@ -1,102 +1,142 @@
 """
 Sitemap configuration for public learn pages.
+
+Items come from the catalog statistics (quiz/catalog.py: the per-block
+aggregates of BlockStats, cached), so lastmod needs no query per item and
+subjects/blocks need no query at all on a warm cache. Locations are looked
+up in a URL table built once per sitemap from the subject slugs. Questions
+are read as (subject, block_number, qid, edited_at) tuples only.
+
+The sitemaps are served whole at /sitemap.xml and per section below
+/sitemap-index.xml (see quiz/sitemap_views.py).
 """
 from django.contrib.sitemaps import Sitemap
+
+from .catalog import get_catalog_stats
 from .models import Question
-from .subjects import list_subjects
-from .utils import get_subject_slug, get_block_slug
+from .subjects import get_subject_registry
+from .utils import get_block_slug
+
+
+class LearnUrls:
+    """Learn page paths of the current subjects and blocks."""
+
+    def __init__(self, stats):
+        slugs = get_subject_registry().slugs
+        self.subjects = {subject_id: f'/learn/{slug}/' for subject_id, slug in slugs.items()}
+        self.blocks = {
+            (subject_id, block.block_number): f'{prefix}{get_block_slug(subject_id, block.block_number)}/'
+            for subject_id, prefix in self.subjects.items()
+            for block in stats.blocks(subject_id)
+        }
+
+    def block(self, subject_id, block_number):
+        path = self.blocks.get((subject_id, block_number))
+        if path is None:
+            # Block added since the catalog snapshot
+            prefix = self.subjects.get(subject_id)
+            if prefix is None:
+                return '/learn/'  # Fallback to learn page
+            path = f'{prefix}{get_block_slug(subject_id, block_number)}/'
+        return path
 
 
-class SubjectSitemap(Sitemap):
+class CatalogSitemap(Sitemap):
+    """Base class: one catalog snapshot and URL table per sitemap instance."""
+
+    def __init__(self):
+        self._catalog_stats = None
+        self._learn_urls = None
+
+    @property
+    def stats(self):
+        if self._catalog_stats is None:
+            self._catalog_stats = get_catalog_stats()
+        return self._catalog_stats
+
+    @property
+    def urls(self):
+        if self._learn_urls is None:
+            self._learn_urls = LearnUrls(self.stats)
+        return self._learn_urls
+
+    def get_latest_lastmod(self):
+        return self.stats.total().last_modified
+
+
+class SubjectSitemap(CatalogSitemap):
     """Sitemap for subject list and detail pages."""
     changefreq = 'weekly'
     priority = 0.8
-    
+
     def items(self):
-        """Return all subjects."""
-        subjects = list_subjects()
-        return [(s['id'], s['title']) for s in subjects]
-    
+        """Return the SubjectSummary of every subject."""
+        return [self.stats.subject(s.id) for s in get_subject_registry()]
+
     def location(self, item):
         """Return URL for subject detail page."""
-        subject_id, subject_title = item
-        slug = get_subject_slug(subject_id, subject_title)
-        return f'/learn/{slug}/'
-    
+        return self.urls.subjects[item.subject]
+
     def lastmod(self, item):
-        """Return last modification time based on questions in subject."""
-        subject_id, _ = item
-        latest_question = Question.objects.filter(subject=subject_id).order_by('-edited_at').first()
-        if latest_question and latest_question.edited_at:
-            return latest_question.edited_at
-        return None
+        """Return the latest edit of any question in the subject."""
+        return item.last_modified
 
 
 class SubjectListSitemap(Sitemap):
     """Sitemap for subject list page."""
     changefreq = 'weekly'
     priority = 0.9
-    
+
     def items(self):
         return [True]  # Single item for the list page
-    
+
     def location(self, item):
         return '/learn/'
 
 
-class BlockSitemap(Sitemap):
+class BlockSitemap(CatalogSitemap):
     """Sitemap for block detail pages."""
     changefreq = 'monthly'
     priority = 0.7
-    
+
     def items(self):
-        """Return all (subject_id, block_number) tuples."""
-        blocks = Question.objects.values_list('subject', 'block_number').distinct()
-        return list(blocks)
-    
+        """Return the BlockSummary (subject, block_number, ...) of every block."""
+        return [block for s in get_subject_registry() for block in self.stats.blocks(s.id)]
+
     def location(self, item):
         """Return URL for block detail page."""
-        subject_id, block_number = item
-        subject_info = next((s for s in list_subjects() if s['id'] == subject_id), None)
-        if not subject_info:
-            return '/learn/'  # Fallback to learn page
-        subject_slug = get_subject_slug(subject_id, subject_info['title'])
-        block_slug = get_block_slug(subject_id, block_number)
-        return f'/learn/{subject_slug}/{block_slug}/'
-    
+        return self.urls.block(item.subject, item.block_number)
+
     def lastmod(self, item):
-        """Return last modification time for block."""
-        subject_id, block_number = item
-        latest_question = Question.objects.filter(
-            subject=subject_id,
-            block_number=block_number
-        ).order_by('-edited_at').first()
-        if latest_question and latest_question.edited_at:
-            return latest_question.edited_at
-        return None
-
-
-class QuestionSitemap(Sitemap):
+        """Return the latest edit of any question in the block."""
+        return item.last_modified
+
+
+class QuestionSitemap(CatalogSitemap):
     """Sitemap for individual question pages."""
     changefreq = 'monthly'
     priority = 0.6
-    
+
     def items(self):
-        """Return all questions that have correct answer and explanation."""
+        """Return (subject, block_number, qid, edited_at) of questions with answer and explanation."""
         return Question.objects.filter(
             correct__isnull=False
-        ).exclude(explanation='').select_related()
-    
+        ).exclude(explanation='').values_list(
+            'subject', 'block_number', 'qid', 'edited_at', named=True,
+        )
+
     def location(self, question):
         """Return URL for question detail page."""
-        subject_info = next((s for s in list_subjects() if s['id'] == question.subject), None)
-        if not subject_info:
-            return '/learn/'  # Fallback to learn page
-        subject_slug = get_subject_slug(question.subject, subject_info['title'])
-        block_slug = get_block_slug(question.subject, question.block_number)
-        return f'/learn/{subject_slug}/{block_slug}/{question.qid}/'
-    
+        return f'{self.urls.block(question.subject, question.block_number)}{question.qid}/'
+
     def lastmod(self, question):
         """Return last modification time for question."""
         return question.edited_at if question.edited_at else None
 
+
+SITEMAPS = {
+    'subject-list': SubjectListSitemap,
+    'subjects': SubjectSitemap,
+    'blocks': BlockSitemap,
+    'questions': QuestionSitemap,
+}
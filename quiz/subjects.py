@@ -1,38 +1,91 @@
 """
 Centralized subject metadata.
-Single source of truth for subject IDs, titles, and slugs.
-Prevents duplication and ensures consistency across the application.
+Single source of truth for subject IDs, titles, slugs, image prefixes and
+data files. Prevents duplication and ensures consistency across the application.
+
+Adding a subject means adding one entry to SUBJECTS (plus its JSON file in
+quiz_data/ and its images in static/img/<id>/).
 """
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
 from typing import List, Dict, Optional
 
 
+@dataclass(frozen=True)
+class Subject:
+    """Read-only subject record."""
+    __slots__ = ('id', 'title', 'image_prefix', 'data_file')
+
+    id: str
+    title: str
+    image_prefix: str  # e.g. 'qe' -> static/img/electrotehnica/qe23.png
+    data_file: str     # file name in quiz_data/
+
+
+SUBJECTS = (
+    Subject('electrotehnica', 'Electrotehnică', 'qe', 'electrotehnica.json'),
+    Subject('legislatie-gr-2', 'Legislație GR. 2', 'ql', 'legislatie-gr-2.json'),
+    Subject('norme-tehnice-gr-2', 'Norme Tehnice GR. 2', 'qn', 'norme-tehnice-gr-2.json'),
+)
+
+
+class SubjectRegistry:
+    """Immutable subject indexes. Use get_subject_registry()."""
+    __slots__ = ('subjects', 'by_id', 'by_slug', 'by_image_prefix', 'slugs')
+
+    def __init__(self, subjects):
+        from .utils import get_subject_slug
+
+        self.subjects = tuple(subjects)
+        self.by_id = MappingProxyType({s.id: s for s in self.subjects})
+        self.slugs = MappingProxyType({s.id: get_subject_slug(s.id, s.title) for s in self.subjects})
+        self.by_slug = MappingProxyType({self.slugs[s.id]: s for s in self.subjects})
+        self.by_image_prefix = MappingProxyType({s.image_prefix: s for s in self.subjects})
+
+    def __iter__(self):
+        return iter(self.subjects)
+
+    def __contains__(self, subject_id):
+        return subject_id in self.by_id
+
+    def get(self, subject_id):
+        """Return the Subject with this id, or None."""
+        return self.by_id.get(subject_id)
+
+    def choices(self):
+        """Return (id, title) pairs for model/form choices."""
+        return [(s.id, s.title) for s in self.subjects]
+
+
+@lru_cache(maxsize=None)
+def get_subject_registry() -> SubjectRegistry:
+    """Return the process-wide subject registry, building it on first use."""
+    return SubjectRegistry(SUBJECTS)
+
+
 def list_subjects() -> List[Dict[str, str]]:
     """
     Returns list of subject IDs and titles.
     This is the single source of truth for subject metadata.
-    
+
     Returns:
         List of dicts with 'id' and 'title' keys
     """
-    return [
-        {'id': 'electrotehnica', 'title': 'Electrotehnică'},
-        {'id': 'legislatie-gr-2', 'title': 'Legislație GR. 2'},
-        {'id': 'norme-tehnice-gr-2', 'title': 'Norme Tehnice GR. 2'},
-    ]
+    return [{'id': s.id, 'title': s.title} for s in get_subject_registry()]
 
 
 def get_subject_by_id(subject_id: str) -> Optional[Dict[str, str]]:
     """
     Get subject metadata by ID.
-    
+
     Args:
         subject_id: Subject identifier
-        
+
     Returns:
         Subject dict with 'id' and 'title', or None if not found
     """
-    for subject in list_subjects():
-        if subject['id'] == subject_id:
-            return subject
-    return None
-
+    subject = get_subject_registry().get(subject_id)
+    if subject is None:
+        return None
+    return {'id': subject.id, 'title': subject.title}
@@ -0,0 +1,33 @@
+"""
+Test runner that keeps the test suite off the shared quiz cache.
+
+settings.CACHES['quiz'] is a cache shared with the running site (Redis or
+a file-based cache directory); many tests clear it in setUp. The runner
+swaps it for a per-process LocMem cache for the whole run, so tests never
+wipe the live cache and no state carries over between runs.
+"""
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'quiz': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'quiz-tests',
+    },
+}
+
+
+class QuizTestRunner(DiscoverRunner):
+    """DiscoverRunner running every test with TEST_CACHES."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._cache_override = override_settings(CACHES=TEST_CACHES)
+        self._cache_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._cache_override.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,200 @@
+"""
+Tests for quiz attempt recording (write-behind journal) and block progress.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import attempt_journal
+from .attempt_journal import AttemptJournal, pending_attempts, record_attempt, replay_journals
+from .block_cache import get_quiz_cache
+from .models import BlockAttempt, BlockNote, BlockProgress, Question
+
+
+class AttemptJournalTestCase(TestCase):
+    """Test write-behind BlockAttempt inserts and journal replay."""
+
+    def setUp(self):
+        get_quiz_cache().clear()
+        self.user = User.objects.create_user('journal', password='pass12345')
+        Question.objects.create(
+            subject='electrotehnica', qid=1, block_number=1, text='Journal question?',
+            option_a='A', option_b='B', option_c='C', correct='a',
+        )
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def start_journal(self):
+        """Install a journal for this process whose flushing the test drives."""
+        journal = AttemptJournal(self.directory, interval=60, fsync=False)
+        journal.start(background=False)
+        self.addCleanup(setattr, attempt_journal, '_journal', None)
+        attempt_journal._journal = journal
+        return journal
+
+    def attempt_fields(self, score=1):
+        return dict(user=self.user, subject='electrotehnica', block_number=1,
+                    score=score, total=1, percentage=score * 100.0)
+
+    def test_synchronous_without_journal(self):
+        """Test that attempts are inserted directly when write-behind is disabled."""
+        attempt = record_attempt(**self.attempt_fields())
+        self.assertIsNotNone(attempt.pk)
+        self.assertEqual(BlockAttempt.objects.count(), 1)
+
+    def test_submit_is_read_your_writes(self):
+        """Test that a journaled attempt shows on the dashboard before and after the flush."""
+        with override_settings(QUIZ_ATTEMPT_JOURNAL_DIR=self.directory):
+            journal = self.start_journal()
+            self.client.force_login(self.user)
+            response = self.client.post('/subject/electrotehnica/block/1/submit/', {'question_1': 'a'})
+            self.assertContains(response, 'Scor: 1/1')
+            self.assertEqual(BlockAttempt.objects.count(), 0)
+            self.assertEqual(len(pending_attempts(self.user)), 1)
+            self.assertContains(self.client.get('/dashboard/'), 'block-green')
+
+            self.assertEqual(journal.flush(), 1)
+            self.assertEqual(BlockAttempt.objects.count(), 1)
+            self.assertEqual(pending_attempts(self.user), [])
+            self.assertContains(self.client.get('/dashboard/'), 'block-green')
+            self.assertEqual(os.listdir(self.directory), [journal._path.name])
+
+    def test_concurrent_pending_updates_keep_every_attempt(self):
+        """Test that threads journaling and flushing the same user never drop pending entries."""
+        with override_settings(QUIZ_ATTEMPT_JOURNAL_DIR=self.directory):
+            journal = self.start_journal()
+            self.addCleanup(sys.setswitchinterval, sys.getswitchinterval())
+            sys.setswitchinterval(1e-6)  # switch threads inside the read-modify-write
+            flushed = [record_attempt(**self.attempt_fields()) for _ in range(20)]
+            journal._rotate()
+            records = attempt_journal._read_records(journal._sealed[0][0])
+            threads = [
+                threading.Thread(target=lambda: [record_attempt(**self.attempt_fields()) for _ in range(20)])
+                for _ in range(4)
+            ]
+            threads.append(threading.Thread(target=attempt_journal._clear_pending, args=(self.directory, records)))
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            pending = {attempt.journal_id for attempt in pending_attempts(self.user)}
+        self.assertEqual(len(pending), 80)
+        self.assertFalse(pending & {attempt.journal_id for attempt in flushed})
+
+    def test_replay_orphaned_journal(self):
+        """Test that a dead worker's journal is replayed exactly once."""
+        with override_settings(QUIZ_ATTEMPT_JOURNAL_DIR=self.directory):
+            journal = self.start_journal()
+            record_attempt(**self.attempt_fields())
+            record_attempt(**self.attempt_fields(score=0))
+            # Journal still locked by its (live) owner
+            self.assertEqual(replay_journals(), 0)
+            path = journal._path
+            with open(path, 'rb') as f:
+                lines = f.read()
+            # Simulate a crash: lock released, file left behind; replay twice
+            os.close(journal._fd)
+            copy = path.with_name('attempts-copy.jsonl')
+            copy.write_bytes(lines)
+            self.assertEqual(replay_journals(), 4)
+            self.assertEqual(BlockAttempt.objects.count(), 2)
+            self.assertEqual(os.listdir(self.directory), [])
+
+
+class BlockProgressTestCase(TestCase):
+    """Test the per-user block progress summaries."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('progress', password='pass12345')
+
+    def record(self, score, total=20, taken_at=None):
+        return record_attempt(
+            user=self.user, subject='electrotehnica', block_number=1,
+            score=score, total=total, percentage=score / total * 100,
+            taken_at=taken_at or timezone.now(),
+        )
+
+    def test_attempts_update_progress(self):
+        """Test latest, best and count, with a late older attempt not becoming the latest."""
+        now = timezone.now()
+        self.record(12, taken_at=now - timedelta(hours=2))
+        self.record(20, taken_at=now - timedelta(hours=1))
+        self.record(19, taken_at=now)
+        self.record(5, taken_at=now - timedelta(days=1))
+        progress = BlockProgress.objects.get(user=self.user, subject='electrotehnica', block_number=1)
+        self.assertEqual((progress.last_score, progress.last_total), (19, 20))
+        self.assertEqual(progress.best_score, 20)
+        self.assertEqual(progress.attempt_count, 4)
+        self.assertEqual(progress.color_class, 'block-yellow')
+
+    def test_rebuild_matches_incremental(self):
+        """Test that the backfill command rebuilds the same summary."""
+        for score in (3, 20, 18):
+            self.record(score)
+        BlockProgress.objects.all().delete()
+        BlockAttempt.objects.create(
+            user=self.user, subject='legislatie-gr-2', block_number=2,
+            score=1, total=20, percentage=5.0,
+        )
+        out = StringIO()
+        call_command('rebuild_block_progress', stdout=out)
+        self.assertIn('2 rows', out.getvalue())
+        progress = BlockProgress.objects.get(subject='electrotehnica', block_number=1)
+        self.assertEqual((progress.last_score, progress.best_score, progress.attempt_count), (18, 20, 3))
+        self.assertEqual(BlockProgress.objects.get(subject='legislatie-gr-2').color_class, 'block-red')
+
+    def test_dashboard_reads_progress(self):
+        """Test that the dashboard shows the latest score from the summary."""
+        for score in (3, 20):
+            self.record(score)
+        self.client.force_login(self.user)
+        Question.objects.create(
+            subject='electrotehnica', qid=1, block_number=1, text='Progress question?',
+            option_a='A', option_b='B', option_c='C', correct='a',
+        )
+        response = self.client.get('/dashboard/')
+        self.assertContains(response, '20/20')
+        self.assertContains(response, 'block-green')
+
+
+class DashboardQueryBudgetTestCase(TestCase):
+    """Test that the dashboard query count does not grow with subjects or history."""
+
+    def setUp(self):
+        get_quiz_cache().clear()
+        self.user = User.objects.create_user('budget', password='pass12345')
+        for subject in ('electrotehnica', 'legislatie-gr-2', 'norme-tehnice-gr-2'):
+            for block_number in (1, 2):
+                Question.objects.create(
+                    subject=subject, qid=block_number, block_number=block_number,
+                    text='Budget question?', option_a='A', option_b='B', option_c='C', correct='a',
+                )
+                BlockNote.objects.create(
+                    user=self.user, subject=subject, block_number=block_number,
+                    note=f'Note {subject} {block_number}',
+                )
+                for score in (1, 0, 1):
+                    record_attempt(
+                        user=self.user, subject=subject, block_number=block_number,
+                        score=score, total=1, percentage=score * 100.0,
+                    )
+        self.client.force_login(self.user)
+
+    def test_query_budget(self):
+        """Session, user, catalog stats (cold), notes and progress: 5 queries."""
+        with self.assertNumQueries(5):
+            response = self.client.get('/dashboard/')
+        self.assertContains(response, 'Note norme-tehnice-gr-2 2')
+        self.assertContains(response, 'block-green', count=6)
+        # Warm catalog stats: one query less
+        with self.assertNumQueries(4):
+            self.client.get('/dashboard/')
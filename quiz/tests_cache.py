@@ -0,0 +1,365 @@
+"""
+Tests for the versioned block bundle cache, the learn page cache,
+conditional GET handling, the catalog stats and the grading engine.
+"""
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from .block_cache import get_block_bundle, get_cached_block_bundle, get_quiz_cache
+from .catalog import get_catalog_stats
+from .grading import AnswerKey, get_answer_key, grade_many
+from .models import BlockStats, Question
+from .page_cache import get_page_cache_stats, reset_page_cache_stats
+from .utils import get_block_slug, get_subject_slug
+
+
+class BlockBundleCacheTestCase(TestCase):
+    """Test that block pages are served from the cached bundle."""
+
+    def setUp(self):
+        get_quiz_cache().clear()
+        self.question = Question.objects.create(
+            subject='electrotehnica',
+            qid=1,
+            block_number=1,
+            text='Cached question?',
+            option_a='A',
+            option_b='B',
+            option_c='C',
+            correct='b',
+            explanation='Because B.',
+        )
+        subject_slug = get_subject_slug('electrotehnica', 'Electrotehnică')
+        block_slug = get_block_slug('electrotehnica', 1)
+        self.block_url = f'/learn/{subject_slug}/{block_slug}/'
+        self.question_url = f'{self.block_url}1/'
+
+    def test_bundle_contents(self):
+        """Test that the bundle carries questions, answer key and images."""
+        bundle = get_block_bundle('electrotehnica', 1)
+        self.assertEqual(bundle['answer_key'], {1: 'b'})
+        self.assertEqual(bundle['questions'][0]['text'], 'Cached question?')
+        self.assertIn('question_img_exists', bundle['questions'][0]['images'])
+        self.assertIsNone(get_block_bundle('electrotehnica', 99))
+
+    def test_tests_use_a_private_quiz_cache(self):
+        """Test that the test runner swaps the shared quiz cache for LocMem."""
+        from django.core.cache.backends.locmem import LocMemCache
+
+        self.assertIsInstance(get_quiz_cache(), LocMemCache)
+
+    def test_warm_learn_pages_run_no_queries(self):
+        """Test that warm learn block and question pages issue zero SQL queries."""
+        self.client.get(self.block_url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.block_url)
+        self.assertContains(response, 'Cached question?')
+        with self.assertNumQueries(0):
+            response = self.client.get(self.question_url)
+        self.assertContains(response, 'Because B.')
+
+    def test_save_invalidates_bundle(self):
+        """Test that saving a question bumps the version and refreshes the bundle."""
+        self.client.get(self.block_url)
+        self.question.text = 'Edited question?'
+        self.question.save()
+        response = self.client.get(self.block_url)
+        self.assertContains(response, 'Edited question?')
+        self.assertNotContains(response, 'Cached question?')
+
+    def test_delete_invalidates_bundle(self):
+        """Test that deleting the last question of a block makes it 404."""
+        self.client.get(self.block_url)
+        self.question.delete()
+        self.assertEqual(self.client.get(self.block_url).status_code, 404)
+
+    def test_block_submit_grades_from_bundle(self):
+        """Test that block_submit grades against the cached answer key."""
+        user = User.objects.create_user('student', password='pass12345')
+        self.client.force_login(user)
+        response = self.client.post(
+            '/subject/electrotehnica/block/1/submit/',
+            {'question_1': 'b'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '1/1')
+
+
+class LearnPageCacheTestCase(TestCase):
+    """Test the full-page cache for /learn/ and its fine-grained purging."""
+
+    def setUp(self):
+        get_quiz_cache().clear()
+        reset_page_cache_stats()
+        self.questions = [
+            Question.objects.create(
+                subject='electrotehnica',
+                qid=qid,
+                block_number=1,
+                text=f'Question {qid}?',
+                option_a='A',
+                option_b='B',
+                option_c='C',
+                correct='a',
+                explanation=f'Explanation {qid}.',
+            )
+            for qid in (1, 2)
+        ]
+        subject_slug = get_subject_slug('electrotehnica', 'Electrotehnică')
+        block_slug = get_block_slug('electrotehnica', 1)
+        self.block_url = f'/learn/{subject_slug}/{block_slug}/'
+
+    def test_second_request_is_a_hit(self):
+        """Test that a repeated request is served from the page cache."""
+        self.assertEqual(self.client.get('/learn/')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/learn/')['X-Cache'], 'HIT')
+        self.assertEqual(get_page_cache_stats()['hits'], 1)
+        self.assertEqual(get_page_cache_stats()['misses'], 1)
+
+    def test_edit_purges_only_related_pages(self):
+        """Test that editing question 1 keeps question 2's page cached."""
+        urls = ['/learn/', self.block_url, f'{self.block_url}1/', f'{self.block_url}2/']
+        for url in urls:
+            self.client.get(url)
+
+        self.questions[0].explanation = 'Updated explanation.'
+        self.questions[0].save()
+
+        self.assertEqual(self.client.get(f'{self.block_url}2/')['X-Cache'], 'HIT')
+        for url in urls[:3]:
+            self.assertEqual(self.client.get(url)['X-Cache'], 'MISS', url)
+        self.assertContains(self.client.get(f'{self.block_url}1/'), 'Updated explanation.')
+
+    def test_not_found_is_not_cached(self):
+        """Test that 404 responses are not stored."""
+        url = '/learn/electrotehnica/bloc-9-electrotehnica/'
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(get_page_cache_stats()['hits'], 0)
+
+    def test_ops_status_requires_superuser(self):
+        """Test that cache counters are exposed to superusers only."""
+        user = User.objects.create_user('student', password='pass12345')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get('/ops/status/').status_code, 404)
+        admin = User.objects.create_superuser('admin', password='pass12345')
+        self.client.force_login(admin)
+        response = self.client.get('/ops/status/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('hits', response.json()['page_cache'])
+
+
+class ConditionalGetTestCase(TestCase):
+    """Test ETag validators and 304 responses."""
+
+    def setUp(self):
+        get_quiz_cache().clear()
+        self.question = Question.objects.create(
+            subject='electrotehnica',
+            qid=1,
+            block_number=1,
+            text='Conditional question?',
+            option_a='A',
+            option_b='B',
+            option_c='C',
+            correct='a',
+            explanation='Explanation.',
+            edited_at=timezone.now(),
+        )
+        subject_slug = get_subject_slug('electrotehnica', 'Electrotehnică')
+        block_slug = get_block_slug('electrotehnica', 1)
+        self.block_url = f'/learn/{subject_slug}/{block_slug}/'
+
+    def test_learn_block_answers_304(self):
+        """Test that a matching If-None-Match gets an empty 304."""
+        response = self.client.get(self.block_url)
+        self.assertIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
+        response = self.client.get(self.block_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_edit_changes_etag(self):
+        """Test that editing a question invalidates the validator."""
+        etag = self.client.get(self.block_url)['ETag']
+        self.question.explanation = 'New explanation.'
+        self.question.edited_at = timezone.now()
+        self.question.save()
+        response = self.client.get(self.block_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_import_changes_etag(self):
+        """Test that an import, which bulk-updates rows without touching edited_at, invalidates the validators."""
+        from .image_manifest import rebuild_image_manifest
+        from .importer import import_subject
+
+        subject_url = f"/learn/{get_subject_slug('electrotehnica', 'Electrotehnică')}/"
+        etags = {url: self.client.get(url)['ETag'] for url in (self.block_url, subject_url)}
+        record = {'id': 1, 'question': 'Imported question?', 'options': {'a': 'A', 'b': 'B', 'c': 'C'}, 'block': 1}
+        _, stats = import_subject('electrotehnica', [record], rebuild_image_manifest())
+        self.assertEqual(stats.updated, 1)
+        for url, etag in etags.items():
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(self.client.get(self.block_url), 'Imported question?')
+
+    def test_if_modified_since_never_answers_304(self):
+        """Test that date-only revalidation gets 200, since imports do not move edited_at."""
+        from django.utils.http import http_date
+
+        response = self.client.get(self.block_url, HTTP_IF_MODIFIED_SINCE=http_date())
+        self.assertEqual(response.status_code, 200)
+
+    def test_block_take_etag_is_per_user(self):
+        """Test that block_take validators differ between users."""
+        url = '/subject/electrotehnica/block/1/'
+        first = User.objects.create_user('first', password='pass12345')
+        second = User.objects.create_user('second', password='pass12345')
+        self.client.force_login(first)
+        self.client.get(url)  # first render sets the CSRF cookie
+        response = self.client.get(url)
+        self.assertIn('private', response['Cache-Control'])
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.client.force_login(second)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class CatalogStatsTestCase(TestCase):
+    """Test the incrementally maintained catalog statistics."""
+
+    def setUp(self):
+        get_quiz_cache().clear()
+
+    def create_question(self, qid, block_number, **fields):
+        return Question.objects.create(
+            subject='electrotehnica',
+            qid=qid,
+            block_number=block_number,
+            text=f'Question {qid}?',
+            option_a='A',
+            option_b='B',
+            option_c='C',
+            **fields,
+        )
+
+    def test_signals_maintain_block_stats(self):
+        """Test that save/move/delete keep BlockStats in sync."""
+        question = self.create_question(1, 1, correct='a', explanation='Because.')
+        self.create_question(2, 1)
+        stats = BlockStats.objects.get(subject='electrotehnica', block_number=1)
+        self.assertEqual(
+            (stats.question_count, stats.answered_count, stats.explained_count),
+            (2, 1, 1),
+        )
+
+        question.block_number = 2
+        question.save()
+        self.assertEqual(BlockStats.objects.get(block_number=1).question_count, 1)
+        self.assertEqual(BlockStats.objects.get(block_number=2).answered_count, 1)
+
+        question.delete()
+        self.assertFalse(BlockStats.objects.filter(block_number=2).exists())
+
+    def test_catalog_is_read_once(self):
+        """Test that a cached catalog snapshot costs no queries."""
+        self.create_question(1, 1)
+        self.create_question(2, 2, correct='b')
+        with self.assertNumQueries(1):
+            catalog = get_catalog_stats()
+        with self.assertNumQueries(0):
+            catalog = get_catalog_stats()
+        summary = catalog.subject('electrotehnica')
+        self.assertEqual((summary.block_count, summary.question_count, summary.answered_count), (2, 2, 1))
+        self.assertEqual([b.block_number for b in catalog.blocks('electrotehnica')], [1, 2])
+
+    def test_rebuild_command(self):
+        """Test that rebuild_catalog_stats restores deleted rows."""
+        self.create_question(1, 1)
+        BlockStats.objects.all().delete()
+        call_command('rebuild_catalog_stats', stdout=StringIO())
+        self.assertEqual(get_catalog_stats().subject('electrotehnica').question_count, 1)
+
+    def test_subject_detail_uses_catalog(self):
+        """Test that the subject page lists blocks from the catalog."""
+        for qid in range(1, 4):
+            self.create_question(qid, qid)
+        slug = get_subject_slug('electrotehnica', 'Electrotehnică')
+        get_catalog_stats()
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/learn/{slug}/')
+        self.assertContains(response, 'bloc-3-electrotehnica')
+
+
+class GradingTestCase(TestCase):
+    """Test the packed answer keys and the grading engine."""
+
+    def setUp(self):
+        get_quiz_cache().clear()
+        for qid, correct in ((1, 'a'), (2, 'b'), (3, None)):
+            Question.objects.create(
+                subject='electrotehnica', qid=qid, block_number=1,
+                text=f'Question {qid}?', option_a='A', option_b='B', option_c='C',
+                correct=correct, explanation=f'Explanation {qid}.',
+            )
+
+    def test_answer_key_layout(self):
+        """Test that the key packs letters and a gradable mask."""
+        answer_key = get_answer_key('electrotehnica', 1)
+        self.assertEqual(answer_key.qids, (1, 2, 3))
+        self.assertEqual(answer_key.letters, b'ab\x00')
+        self.assertEqual(answer_key.gradable, 0b011)
+        self.assertEqual(answer_key.total, 2)
+        self.assertIsNone(get_answer_key('electrotehnica', 99))
+
+    def test_blank_correct_answer_is_gradable(self):
+        """Test that a blank correct answer counts, as before, and only a blank answer matches it."""
+        answer_key = AnswerKey('electrotehnica', 1, [(1, ''), (2, None)])
+        self.assertEqual(answer_key.total, 1)
+        self.assertEqual(answer_key.correct_answer(0), '')
+        self.assertEqual(answer_key.grade({'question_1': 'a'}).correct, (False, None))
+        self.assertEqual(answer_key.grade({'question_1': ''}).score, 1)
+
+    def test_grade_and_batch(self):
+        """Test single and batched grading with a warm key and no queries."""
+        answer_key = get_answer_key('electrotehnica', 1)
+        with self.assertNumQueries(0):
+            result = answer_key.grade({'question_1': 'a', 'question_2': 'c', 'question_3': 'a'})
+            batch = grade_many([
+                ('electrotehnica', 1, {'question_1': 'a', 'question_2': 'b'}),
+                ('electrotehnica', 1, {}),
+            ])
+        self.assertEqual((result.score, result.total, result.percentage), (1, 2, 50.0))
+        self.assertEqual(result.correct, (True, False, None))
+        self.assertEqual([r.score for r in batch], [2, 0])
+        self.assertEqual(grade_many([('electrotehnica', 99, {})]), [None])
+
+    def test_edit_invalidates_key(self):
+        """Test that changing a correct answer rebuilds the key."""
+        get_answer_key('electrotehnica', 1)
+        question = Question.objects.get(qid=3)
+        question.correct = 'c'
+        question.save()
+        self.assertEqual(get_answer_key('electrotehnica', 1).letters, b'abc')
+
+    def test_block_submit_result_page(self):
+        """Test that a cold submit grades and hydrates without loading the bundle."""
+        user = User.objects.create_user('grader', password='pass12345')
+        self.client.force_login(user)
+        with mock.patch('quiz.views.get_block_bundle') as get_bundle:
+            response = self.client.post(
+                '/subject/electrotehnica/block/1/submit/',
+                {'question_1': 'a', 'question_2': 'a'},
+            )
+        get_bundle.assert_not_called()
+        self.assertIsNone(get_cached_block_bundle('electrotehnica', 1))
+        self.assertContains(response, 'Scor: 1/2')
+        self.assertContains(response, 'Question 3?')
+        self.assertContains(response, 'Explanation 2.')
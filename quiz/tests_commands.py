@@ -0,0 +1,335 @@
+"""
+Tests for management commands.
+"""
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+
+from .block_cache import get_quiz_cache
+from .models import ImportFingerprint, Question
+
+
+class PrerenderLearnTestCase(TestCase):
+    """Test the prerender_learn static export."""
+
+    def setUp(self):
+        get_quiz_cache().clear()
+        Question.objects.create(
+            subject='electrotehnica',
+            qid=1,
+            block_number=1,
+            text='Prerendered question?',
+            option_a='A',
+            option_b='B',
+            option_c='C',
+            correct='a',
+            explanation='Prerendered explanation.',
+        )
+        self.output = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.output, ignore_errors=True)
+
+    def prerender(self, *args):
+        out = StringIO()
+        call_command('prerender_learn', '--output', str(self.output), *args, stdout=out)
+        return out.getvalue()
+
+    def test_writes_pages_and_manifest(self):
+        """Test that every sitemap page gets index.html, .gz and a manifest entry."""
+        self.prerender()
+        block_dir = self.output / 'learn' / 'electrotehnica' / 'bloc-1-electrotehnica'
+        self.assertIn('Prerendered question?', (block_dir / 'index.html').read_text(encoding='utf-8'))
+        self.assertTrue((block_dir / 'index.html.gz').exists())
+        self.assertTrue((block_dir / '1' / 'index.html').exists())
+        manifest = json.loads((self.output / 'manifest.json').read_text(encoding='utf-8'))
+        self.assertIn('/learn/electrotehnica/bloc-1-electrotehnica/1/', manifest['pages'])
+
+    def test_rerun_skips_unchanged_pages(self):
+        """Test that a second run rewrites nothing."""
+        self.prerender()
+        self.assertIn('0 written', self.prerender())
+
+    def test_incremental_rewrites_only_edited_blocks(self):
+        """Test that --incremental re-renders edited blocks and leaves other pages untouched."""
+        Question.objects.create(
+            subject='electrotehnica', qid=21, block_number=2, text='Second block?',
+            correct='b', explanation='Second explanation.',
+        )
+        self.prerender()
+        block_1 = self.output / 'learn' / 'electrotehnica' / 'bloc-1-electrotehnica' / 'index.html'
+        block_2 = self.output / 'learn' / 'electrotehnica' / 'bloc-2-electrotehnica' / 'index.html'
+        os.utime(block_1, (1_000_000_000, 1_000_000_000))
+
+        question = Question.objects.get(qid=21)
+        question.text = 'Edited second block?'
+        question.edited_at = timezone.now()
+        question.save()
+        out = self.prerender('--incremental')
+        self.assertIn('Incremental run: 1 blocks edited', out)
+        self.assertEqual(block_1.stat().st_mtime, 1_000_000_000)
+        self.assertIn('Edited second block?', block_2.read_text(encoding='utf-8'))
+
+
+class JsonExportTestCase(TestCase):
+    """Test the atomic JSON export and the debounced export worker."""
+
+    def setUp(self):
+        Question.objects.create(
+            subject='electrotehnica', qid=1, block_number=1, text='Exported question?',
+            option_a='A', option_b='B', option_c='C', correct='a',
+        )
+        self.output = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.output, ignore_errors=True)
+
+    def test_export_command_writes_atomically(self):
+        """Test that export_questions writes every subject and leaves no temp files."""
+        with self.settings(QUIZ_DATA_DIR=self.output):
+            call_command('export_questions', '--format', 'legacy', stdout=StringIO())
+        self.assertEqual(
+            sorted(p.name for p in self.output.iterdir()),
+            ['electrotehnica.json', 'legislatie-gr-2.json', 'norme-tehnice-gr-2.json'],
+        )
+        data = json.loads((self.output / 'electrotehnica.json').read_text(encoding='utf-8'))
+        self.assertEqual(data['questionCount'], 1)
+        self.assertEqual(data['questions'][0]['question'], 'Exported question?')
+
+    def test_streamed_export_matches_indented_dump(self):
+        """Test that the streamed legacy file equals json.dumps(indent=2) and parses when compact."""
+        from .exporter import export_subject, serialize_export_question
+
+        Question.objects.create(
+            subject='electrotehnica', qid=2, block_number=1, text='Ünicode\nquestion?',
+            option_a='A', option_b='B', option_c='C',
+        )
+        export_subject('electrotehnica', self.output, 'legacy', chunk_size=1)
+        expected = json.dumps({
+            'title': 'Electrotehnică',
+            'subject': 'electrotehnica',
+            'blockSize': 20,
+            'questionCount': 2,
+            'questions': [serialize_export_question(q) for q in Question.objects.order_by('qid')],
+        }, ensure_ascii=False, indent=2)
+        self.assertEqual((self.output / 'electrotehnica.json').read_text(encoding='utf-8'), expected)
+
+        export_subject('electrotehnica', self.output, 'legacy', compact=True)
+        compact = (self.output / 'electrotehnica.json').read_text(encoding='utf-8')
+        self.assertNotIn('\n  ', compact)
+        self.assertEqual(json.loads(compact), json.loads(expected))
+
+    def test_empty_subject_exports_valid_json(self):
+        """Test that a subject without questions streams an empty list."""
+        from .exporter import export_subject
+
+        export_subject('legislatie-gr-2', self.output, 'legacy')
+        data = json.loads((self.output / 'legislatie-gr-2.json').read_text(encoding='utf-8'))
+        self.assertEqual((data['questionCount'], data['questions']), (0, []))
+
+    def test_saves_are_coalesced(self):
+        """Test that several committed saves queue one pending export."""
+        from . import exporter
+
+        self.addCleanup(setattr, exporter, '_worker', None)
+        with self.settings(QUIZ_DATA_DIR=self.output, QUIZ_EXPORT_QUIET_PERIOD=3600, QUIZ_EXPORT_MAX_DELAY=3600,
+                           QUIZ_EXPORT_FORMAT='legacy'):
+            question = Question.objects.get(qid=1)
+            for text in ('First edit?', 'Second edit?', 'Third edit?'):
+                question.text = text
+                with self.captureOnCommitCallbacks(execute=True):
+                    question.save()
+            worker = exporter.get_export_worker()
+            self.addCleanup(worker.stop)
+            status = exporter.get_export_status()
+            self.assertEqual(status['pending'], ['electrotehnica'])
+            self.assertEqual(status['scheduled'], 3)
+            self.assertFalse((self.output / 'electrotehnica.json').exists())
+
+            self.assertEqual(worker.flush(), ['electrotehnica'])
+            data = json.loads((self.output / 'electrotehnica.json').read_text(encoding='utf-8'))
+            self.assertEqual(data['questions'][0]['question'], 'Third edit?')
+            self.assertEqual(exporter.get_export_status()['exported'], 1)
+
+
+class ShardedExportTestCase(TestCase):
+    """Test the per-block shard export and the incremental import."""
+
+    def setUp(self):
+        get_quiz_cache().clear()
+        for qid, block_number in ((1, 1), (2, 1), (21, 2)):
+            Question.objects.create(
+                subject='electrotehnica', qid=qid, block_number=block_number,
+                text=f'Question {qid}?', option_a='A', option_b='B', option_c='C', correct='a',
+            )
+        self.output = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.output, ignore_errors=True)
+        self.subject_dir = self.output / 'electrotehnica'
+
+    def export(self):
+        out = StringIO()
+        with self.settings(QUIZ_DATA_DIR=self.output):
+            call_command('export_questions', '--format', 'sharded', stdout=out)
+        return out.getvalue()
+
+    def test_writes_manifest_and_block_shards(self):
+        """Test that each block gets its own shard listed in the manifest."""
+        self.export()
+        manifest = json.loads((self.subject_dir / 'manifest.json').read_text(encoding='utf-8'))
+        self.assertEqual(manifest['questionCount'], 3)
+        self.assertEqual(sorted(manifest['shards']), ['1', '2'])
+        self.assertEqual(manifest['shards']['1']['questions'], 2)
+        shard = json.loads((self.subject_dir / 'block-002.json').read_text(encoding='utf-8'))
+        self.assertEqual([q['id'] for q in shard['questions']], [21])
+        self.assertFalse((self.output / 'electrotehnica.json').exists())
+
+    def test_rewrites_only_changed_shards(self):
+        """Test that an edit rewrites its block's shard and nothing else."""
+        self.export()
+        untouched = (self.subject_dir / 'block-002.json').stat().st_mtime_ns
+        Question.objects.filter(qid=1).update(text='Edited?')
+        self.assertIn('3 questions: 1 files written, 1 unchanged', self.export())
+        self.assertEqual((self.subject_dir / 'block-002.json').stat().st_mtime_ns, untouched)
+
+    def test_parallel_compact_export_matches_serial(self):
+        """Test that --jobs 2 --compact writes the same shards, manifests and data as a serial run."""
+        Question.objects.create(
+            subject='norme-tehnice-gr-2', qid=1, block_number=1, text='Norm question?',
+            option_a='A', option_b='B', option_c='C', correct='b',
+        )
+        parallel = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, parallel, ignore_errors=True)
+        with self.settings(QUIZ_DATA_DIR=self.output):
+            call_command('export_questions', '--format', 'both', stdout=StringIO())
+        with self.settings(QUIZ_DATA_DIR=parallel):
+            call_command('export_questions', '--format', 'both', '--jobs', '2', '--compact', stdout=StringIO())
+
+        serial_files = sorted(p.relative_to(self.output) for p in self.output.rglob('*') if p.is_file())
+        self.assertEqual(sorted(p.relative_to(parallel) for p in parallel.rglob('*') if p.is_file()), serial_files)
+        for path in serial_files:
+            expected = (self.output / path).read_text(encoding='utf-8')
+            actual = (parallel / path).read_text(encoding='utf-8')
+            if path.parent.name:
+                # Shards and manifests are compact either way, so byte-identical
+                self.assertEqual(actual, expected, path)
+            else:
+                self.assertNotIn('\n  ', actual)
+                self.assertEqual(json.loads(actual), json.loads(expected), path)
+        manifest = json.loads((parallel / 'norme-tehnice-gr-2' / 'manifest.json').read_text(encoding='utf-8'))
+        self.assertEqual(manifest['questionCount'], 1)
+
+    def test_import_skips_unchanged_shards(self):
+        """Test that a re-import only parses shards whose hash changed."""
+        self.export()
+        with self.settings(QUIZ_DATA_DIR=self.output):
+            call_command('import_questions', stdout=StringIO())
+            self.assertEqual(ImportFingerprint.objects.count(), 2)
+
+            Question.objects.filter(qid=21).update(text='Stale?')
+            out = StringIO()
+            call_command('import_questions', stdout=out)
+            self.assertIn('2 unchanged files skipped', out.getvalue())
+            self.assertEqual(Question.objects.get(qid=21).text, 'Stale?')
+
+            call_command('import_questions', '--force', stdout=StringIO())
+        self.assertEqual(Question.objects.get(qid=21).text, 'Question 21?')
+
+
+class BulkImportTestCase(TestCase):
+    """Test the diff-based bulk import."""
+
+    def setUp(self):
+        get_quiz_cache().clear()
+        self.output = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.output, ignore_errors=True)
+        questions = [
+            {'id': qid, 'question': f'Question {qid}?', 'options': {'a': 'A', 'b': 'B', 'c': 'C'},
+             'correct': 'a', 'explanation': 'From JSON.', 'block': (qid - 1) // 20 + 1}
+            for qid in range(1, 51)
+        ]
+        (self.output / 'electrotehnica.json').write_text(
+            json.dumps({'title': 'Electrotehnică', 'questions': questions}), encoding='utf-8',
+        )
+
+    def import_questions(self, *args):
+        out = StringIO()
+        with self.settings(QUIZ_DATA_DIR=self.output, QUIZ_EXPORT_FORMAT='legacy'):
+            call_command('import_questions', *args, stdout=out)
+        return out.getvalue()
+
+    def test_creates_in_bulk_and_reports_counts(self):
+        """Test that a fresh import creates every row in a bounded number of queries."""
+        with self.assertNumQueries(26):
+            out = self.import_questions()
+        self.assertIn('electrotehnica: 50 created, 0 updated, 0 unchanged', out)
+        self.assertEqual(Question.objects.filter(subject='electrotehnica').count(), 50)
+
+    def write_source(self, **texts):
+        path = self.output / 'electrotehnica.json'
+        data = json.loads(path.read_text(encoding='utf-8'))
+        for question in data['questions']:
+            question['question'] = texts.get(f"q{question['id']}", question['question'])
+        path.write_text(json.dumps(data), encoding='utf-8')
+
+    def test_preserves_edits_and_diffs(self):
+        """Test that a re-import keeps edited answers and only rewrites changed rows."""
+        self.import_questions()
+        question = Question.objects.get(qid=1)
+        question.correct, question.explanation = 'b', 'Edited.'
+        question.save()
+        self.write_source(q2='New text?')
+        out = self.import_questions()
+        self.assertIn('electrotehnica: 0 created, 1 updated, 49 unchanged (48 by content hash)', out)
+        first, second = Question.objects.filter(qid__in=[1, 2]).order_by('qid')
+        self.assertEqual((first.correct, first.explanation), ('b', 'Edited.'))
+        self.assertEqual(second.text, 'New text?')
+
+    def test_skips_unchanged_files(self):
+        """Test that an unchanged source file is not even read, unless forced."""
+        self.import_questions()
+        Question.objects.filter(qid=2).update(text='Stale?')
+        self.assertIn('electrotehnica: 1 unchanged files skipped', self.import_questions())
+        self.assertEqual(Question.objects.get(qid=2).text, 'Stale?')
+
+        out = self.import_questions('--force')
+        self.assertIn('electrotehnica: 0 created, 1 updated, 49 unchanged (0 by content hash)', out)
+        self.assertEqual(Question.objects.get(qid=2).text, 'Question 2?')
+
+    def test_dry_run_writes_nothing(self):
+        """Test that --dry-run prints the diff and leaves the database alone."""
+        out = self.import_questions('--dry-run')
+        self.assertIn('  + Q1 (block 1)', out)
+        self.assertIn('Dry run: 50 questions would be created, 0 updated', out)
+        self.assertFalse(Question.objects.exists())
+
+    def test_imports_only_the_given_subjects(self):
+        """Test that --subject limits the import to that subject."""
+        out = self.import_questions('--subject', 'legislatie-gr-2')
+        self.assertNotIn('electrotehnica', out)
+        self.assertFalse(Question.objects.exists())
+        with self.assertRaises(CommandError):
+            self.import_questions('--subject', 'unknown')
+
+    def test_legacy_file_edited_after_sharded_export_is_imported(self):
+        """Test that a legacy file modified after the shard manifest is the source read."""
+        from .loader import parse_subject
+        from .subjects import get_subject_registry
+
+        self.import_questions()
+        with self.settings(QUIZ_DATA_DIR=self.output):
+            call_command('export_questions', '--format', 'sharded', stdout=StringIO())
+        manifest = self.output / 'electrotehnica' / 'manifest.json'
+        self.assertIn('50 unchanged (50 by content hash)', self.import_questions())
+
+        self.write_source(q2='Corrected?')
+        legacy = self.output / 'electrotehnica.json'
+        os.utime(legacy, ns=(0, manifest.stat().st_mtime_ns + 1_000_000_000))
+        out = self.import_questions()
+        self.assertIn('electrotehnica: 0 created, 1 updated, 49 unchanged', out)
+        self.assertEqual(Question.objects.get(qid=2).text, 'Corrected?')
+        catalog = parse_subject(self.output, get_subject_registry().get('electrotehnica'))
+        self.assertEqual(catalog.question(2).question, 'Corrected?')
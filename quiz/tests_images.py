@@ -0,0 +1,97 @@
+"""
+Tests for image lookup via the in-memory image manifest.
+"""
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from .image_manifest import get_image_manifest, rebuild_image_manifest
+from .models import Question
+from .utils import check_static_file_exists, get_option_image_url, get_question_image_url
+
+
+class ImageManifestTestCase(SimpleTestCase):
+    """Test the image manifest against the images shipped in static/img/."""
+
+    def setUp(self):
+        self.manifest = rebuild_image_manifest()
+
+    def test_lookup_main_image(self):
+        """Test that a main image resolves to its static URL."""
+        self.assertEqual(
+            self.manifest.lookup('electrotehnica', 'qe110'),
+            '/static/img/electrotehnica/qe110.png',
+        )
+
+    def test_lookup_option_image(self):
+        """Test that option images resolve by option number and by full stem."""
+        url = self.manifest.lookup('electrotehnica', 'qe23', 1)
+        self.assertEqual(url, '/static/img/electrotehnica/qe23_1.png')
+        self.assertEqual(self.manifest.lookup('electrotehnica', 'qe23_1'), url)
+
+    def test_lookup_missing_image(self):
+        """Test that missing images return None."""
+        self.assertIsNone(self.manifest.lookup('electrotehnica', 'qe99999'))
+        self.assertIsNone(self.manifest.lookup('electrotehnica', 'qe110', 1))
+        self.assertIsNone(self.manifest.lookup('unknown-subject', 'qe110'))
+
+    def test_question_helpers_use_manifest(self):
+        """Test that the utils helpers answer without touching the finders."""
+        question = Question(subject='electrotehnica', qid=23, block_number=2)
+        get_image_manifest()
+        with mock.patch('django.contrib.staticfiles.finders.find') as find:
+            self.assertEqual(get_question_image_url(question, 'electrotehnica'), (False, None))
+            self.assertEqual(
+                get_option_image_url(question, 'electrotehnica', 2),
+                (True, '/static/img/electrotehnica/qe23_2.png'),
+            )
+            self.assertEqual(
+                check_static_file_exists('img/electrotehnica/qe110.png'),
+                (True, '/static/img/electrotehnica/qe110.png'),
+            )
+            find.assert_not_called()
+
+    def test_custom_image_base(self):
+        """Test that a custom image_base overrides the subject prefix."""
+        question = Question(subject='electrotehnica', qid=1, block_number=1, image_base='qe110')
+        self.assertEqual(
+            get_question_image_url(question, 'electrotehnica'),
+            (True, '/static/img/electrotehnica/qe110.png'),
+        )
+
+
+class QuestionImageMetadataTestCase(TestCase):
+    """Test the denormalized image metadata stored on Question."""
+
+    def setUp(self):
+        self.question = Question.objects.create(
+            subject='electrotehnica',
+            qid=23,
+            block_number=2,
+            text='Question with option images?',
+            option_a='A',
+            option_b='B',
+            option_c='C',
+        )
+
+    def test_rescan_images_fills_metadata(self):
+        """Test that rescan_images stores option image flags and URLs."""
+        call_command('rescan_images', stdout=StringIO())
+        self.question.refresh_from_db()
+        self.assertIsNotNone(self.question.images_scanned_at)
+        self.assertFalse(self.question.has_image)
+        self.assertTrue(self.question.has_option_a_image)
+        self.assertEqual(self.question.option_c_image_url, '/static/img/electrotehnica/qe23_3.png')
+
+    def test_image_context_uses_stored_metadata(self):
+        """Test that scanned questions render from stored fields only."""
+        self.question.refresh_image_metadata()
+        self.question.save()
+        with mock.patch('quiz.image_manifest.get_image_manifest') as get_manifest:
+            context = self.question.image_context()
+            get_manifest.assert_not_called()
+        self.assertTrue(context['option_b_exists'])
+        self.assertEqual(context['option_b_url'], '/static/img/electrotehnica/qe23_2.png')
+        self.assertIsNone(context['question_img_url'])
@@ -1,10 +1,15 @@
 """
 Tests for public Learn/SEO pages.
 """
+import gzip
+from dataclasses import FrozenInstanceError
+
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth.models import User
+from .block_cache import get_quiz_cache
 from .models import Question
+from .subjects import get_subject_registry
 
 
 class LearnPagesTestCase(TestCase):
@@ -175,6 +180,48 @@ class SitemapTestCase(TestCase):
         content = response.content.decode('utf-8')
         self.assertIn('/learn/', content)
 
+    def test_sitemap_index_lists_sections(self):
+        """Test that /sitemap-index.xml links one sitemap per section."""
+        response = self.client.get('/sitemap-index.xml')
+        self.assertEqual(response.status_code, 200)
+        content = response.content.decode('utf-8')
+        for section in ('subject-list', 'subjects', 'blocks', 'questions'):
+            self.assertIn(f'/sitemap-{section}.xml</loc>', content)
+
+        response = self.client.get('/sitemap-questions.xml')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('/bloc-1-electrotehnica/1/</loc>', response.content.decode('utf-8'))
+
+    def test_sitemap_queries_do_not_grow_with_items(self):
+        """Test that lastmod and locations need no query per item, and none once cached."""
+        for qid in range(2, 42):
+            Question.objects.create(
+                subject='electrotehnica', qid=qid, block_number=(qid - 1) // 20 + 1,
+                text=f'Question {qid}', correct='a', explanation='Explained.',
+            )
+        get_quiz_cache().clear()
+        with self.assertNumQueries(3):  # catalog stats, question count (paginator), question rows
+            response = self.client.get('/sitemap.xml')
+        self.assertEqual(response.content.decode('utf-8').count('<url>'), 1 + 3 + 3 + 41)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/sitemap.xml').content, response.content)
+
+    def test_sitemap_cache_follows_edits(self):
+        """Test that an edit replaces the cached sitemap."""
+        self.client.get('/sitemap-questions.xml')
+        Question.objects.create(
+            subject='electrotehnica', qid=2, block_number=1,
+            text='Question 2', correct='b', explanation='Explained.',
+        )
+        response = self.client.get('/sitemap-questions.xml')
+        self.assertIn('/bloc-1-electrotehnica/2/</loc>', response.content.decode('utf-8'))
+
+    def test_sitemap_is_gzipped(self):
+        """Test that sitemaps are compressed for clients that accept gzip."""
+        response = self.client.get('/sitemap.xml', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.client.get('/sitemap.xml').content)
+
 
 class RobotsTxtTestCase(TestCase):
     """Test robots.txt generation."""
@@ -208,3 +255,110 @@ class RobotsTxtTestCase(TestCase):
         content = response.content.decode('utf-8')
         self.assertIn('Disallow: /admin/', content)
 
+
+class PublicFastPathTestCase(TestCase):
+    """Test the sessionless fast path for anonymous requests to public routes."""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user('student', password='secret')
+
+    def test_anonymous_public_requests_skip_sessions(self):
+        """Test that anonymous learn pages load no session and set no cookies."""
+        response = self.client.get('/learn/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.cookies)
+        self.assertTrue(response.wsgi_request.public_fast_path)
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+        self.assertFalse(hasattr(response.wsgi_request, 'session'))
+        self.assertIn('Cookie', response['Vary'])
+        self.assertNotIn('Cache-Control', response)
+
+    def test_signed_in_users_keep_the_full_stack(self):
+        """Test that requests with a session cookie are not flagged."""
+        self.client.force_login(self.user)
+        response = self.client.get('/learn/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(getattr(response.wsgi_request, 'public_fast_path', False))
+        self.assertTrue(response.wsgi_request.user.is_authenticated)
+
+    def test_private_routes_still_require_login(self):
+        """Test that only exact exempt paths and exempt prefixes pass without login."""
+        self.assertEqual(self.client.get('/robots.txt').status_code, 200)
+        self.assertEqual(self.client.get('/robots.txt.bak').status_code, 302)
+        self.assertEqual(self.client.get('/dashboard/').status_code, 302)
+        response = self.client.get('/accounts/login/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(getattr(response.wsgi_request, 'public_fast_path', False))
+
+    def test_max_age_makes_responses_publicly_cacheable(self):
+        """Test that QUIZ_PUBLIC_MAX_AGE adds Cache-Control: public to fast-path responses."""
+        with self.settings(QUIZ_PUBLIC_MAX_AGE=300):
+            response = Client().get('/robots.txt')
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=300', response['Cache-Control'])
+
+
+class SlugRoutingTestCase(TestCase):
+    """Test the precompiled slug routing table and path converters."""
+    
+    def setUp(self):
+        Question.objects.create(
+            subject='legislatie-gr-2', qid=1, block_number=2,
+            text='Routing question?', option_a='A', option_b='B', option_c='C', correct='a',
+        )
+    
+    def test_parse_current_and_legacy_subject_slugs(self):
+        """Test that current and legacy subject slugs resolve to subject ids."""
+        from .utils import parse_subject_slug
+        self.assertEqual(parse_subject_slug('legislatie-gr-2'), 'legislatie-gr-2')
+        self.assertEqual(parse_subject_slug('legislatie-gr-2-legislatie-gr-2'), 'legislatie-gr-2')
+        self.assertEqual(parse_subject_slug('electrotehnica'), 'electrotehnica')
+        self.assertEqual(parse_subject_slug('old-title-norme-tehnice-gr-2'), 'norme-tehnice-gr-2')
+        self.assertIsNone(parse_subject_slug('unknown'))
+    
+    def test_parse_block_slug(self):
+        """Test that block slugs parse to (subject, block number)."""
+        from .utils import parse_block_slug
+        self.assertEqual(parse_block_slug('bloc-2-legislatie-gr-2'), ('legislatie-gr-2', 2))
+        self.assertEqual(parse_block_slug('bloc-x-legislatie-gr-2'), (None, None))
+        self.assertEqual(parse_block_slug('bloc-2-unknown'), (None, None))
+    
+    def test_unknown_slugs_do_not_match(self):
+        """Test that unknown subject and block slugs return 404."""
+        self.assertEqual(self.client.get('/learn/unknown/').status_code, 404)
+        self.assertEqual(self.client.get('/learn/legislatie-gr-2/bloc-2-unknown/').status_code, 404)
+    
+    def test_block_subject_slug_mismatch_404(self):
+        """Test that a block slug of another subject returns 404."""
+        response = self.client.get('/learn/electrotehnica/bloc-2-legislatie-gr-2/')
+        self.assertEqual(response.status_code, 404)
+    
+    def test_reverse_and_resolve(self):
+        """Test that reversed learn URLs resolve and render."""
+        url = reverse('learn_block_detail', args=['legislatie-gr-2', 'bloc-2-legislatie-gr-2'])
+        self.assertEqual(url, '/learn/legislatie-gr-2/bloc-2-legislatie-gr-2/')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Routing question?')
+
+
+class SubjectRegistryTestCase(TestCase):
+    """Test the subject registry indexes."""
+    
+    def test_indexes(self):
+        """Test that subjects are indexed by image prefix, slug and id."""
+        registry = get_subject_registry()
+        self.assertEqual(registry.by_image_prefix['ql'].id, 'legislatie-gr-2')
+        self.assertEqual(registry.by_slug['electrotehnica'].data_file, 'electrotehnica.json')
+        self.assertEqual(registry.slugs['norme-tehnice-gr-2'], 'norme-tehnice-gr-2')
+        self.assertIn('electrotehnica', registry)
+        self.assertNotIn('unknown', registry)
+        self.assertEqual(Question.SUBJECT_CHOICES, registry.choices())
+    
+    def test_records_are_immutable(self):
+        """Test that subject records are frozen and slotted."""
+        subject = get_subject_registry().get('electrotehnica')
+        with self.assertRaises(FrozenInstanceError):
+            subject.title = 'Other'
+        self.assertFalse(hasattr(subject, '__dict__'))
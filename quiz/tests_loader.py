@@ -0,0 +1,228 @@
+"""
+Tests for the quiz_data catalog in quiz.loader, the compiled question bank
+and the quiz_data watcher.
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from io import StringIO
+from pathlib import Path
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from .bank import BankSubject
+from .loader import QuestionCatalog, QuestionRecord, SubjectCatalog
+from .shards import write_shards
+from .watcher import QuizDataWatcher
+
+
+def make_question(qid, block=None, text=None):
+    question = {
+        'id': qid,
+        'question': text or f'Question {qid}?',
+        'options': {'a': 'A', 'b': 'B', 'c': 'C'},
+        'correct': 'a',
+    }
+    if block is not None:
+        question['block'] = block
+    return question
+
+
+def touch_later(path):
+    # Make the change visible even within the filesystem's mtime granularity
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+class QuestionCatalogTestCase(SimpleTestCase):
+    """Test the indexed, reloadable question catalog."""
+
+    def setUp(self):
+        self.quiz_data_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.quiz_data_dir, ignore_errors=True)
+        self.catalog = QuestionCatalog(self.quiz_data_dir, check_interval=0)
+
+    def write_legacy(self, questions, title='Electrotehnică'):
+        path = self.quiz_data_dir / 'electrotehnica.json'
+        path.write_text(json.dumps({'title': title, 'questions': questions}), encoding='utf-8')
+        touch_later(path)
+
+    def test_indexes_blocks_and_qids(self):
+        """Test the block and qid indexes of a legacy file."""
+        self.write_legacy([make_question(qid, block=(qid - 1) // 2 + 1) for qid in range(1, 6)])
+        subject = self.catalog.subject('electrotehnica')
+        self.assertEqual(subject.block_numbers, (1, 2, 3))
+        self.assertEqual([q.id for q in subject.block_questions(2)], [3, 4])
+        record = subject.question(5)
+        self.assertIsInstance(record, QuestionRecord)
+        self.assertEqual((record['question'], record.get('block'), record['options']['b']), ('Question 5?', 3, 'B'))
+        self.assertIsNone(subject.question(99))
+
+    def test_assigns_blocks_of_twenty(self):
+        """Test that files without block numbers are split into blocks of 20."""
+        self.write_legacy([make_question(qid) for qid in range(1, 26)])
+        self.assertEqual(self.catalog.subject('electrotehnica').block_numbers, (1, 2))
+
+    def test_reloads_when_the_file_changes(self):
+        """Test that a changed file is swapped in while old snapshots stay intact."""
+        self.write_legacy([make_question(1, block=1)])
+        old = self.catalog.subject('electrotehnica')
+        self.assertIs(self.catalog.subject('electrotehnica'), old)
+
+        self.write_legacy([make_question(1, block=1, text='Corrected?')], title='New title')
+        new = self.catalog.subject('electrotehnica')
+        self.assertIsNot(new, old)
+        self.assertEqual((new.title, new.question(1).question), ('New title', 'Corrected?'))
+        self.assertEqual(old.question(1).question, 'Question 1?')
+        self.assertEqual(self.catalog.reloads, 2)
+
+    def test_reuses_unchanged_shards(self):
+        """Test that a reload of the sharded layout only re-parses changed shards."""
+        directory = self.quiz_data_dir / 'electrotehnica'
+        questions = [make_question(1, block=1), make_question(21, block=2)]
+        write_shards(directory, 'electrotehnica', 'Electrotehnică', 20, questions)
+        old = self.catalog.subject('electrotehnica')
+
+        questions[1] = make_question(21, block=2, text='Corrected?')
+        write_shards(directory, 'electrotehnica', 'Electrotehnică', 20, questions)
+        touch_later(directory / 'manifest.json')
+        new = self.catalog.subject('electrotehnica')
+        self.assertIs(new.blocks[1], old.blocks[1])
+        self.assertEqual(new.question(21).question, 'Corrected?')
+
+
+class QuestionBankTestCase(SimpleTestCase):
+    """Test the compiled, memory-mapped question bank."""
+
+    def setUp(self):
+        self.quiz_data_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.quiz_data_dir, ignore_errors=True)
+        self.bank_path = self.quiz_data_dir / 'questions.bank'
+        self.source = self.quiz_data_dir / 'electrotehnica.json'
+        self.source.write_text(json.dumps({
+            'title': 'Electrotehnică',
+            'questions': [make_question(qid, block=(qid - 1) // 20 + 1, text=f'Întrebarea {qid}?')
+                          for qid in range(1, 46)],
+        }), encoding='utf-8')
+        with self.settings(QUIZ_DATA_DIR=self.quiz_data_dir):
+            call_command('compile_question_bank', '--output', str(self.bank_path), stdout=StringIO())
+        self.catalog = QuestionCatalog(self.quiz_data_dir, check_interval=0, bank_path=self.bank_path)
+
+    def test_serves_subjects_from_the_bank(self):
+        """Test that the bank answers like the parsed JSON."""
+        subject = self.catalog.subject('electrotehnica')
+        self.assertIsInstance(subject, BankSubject)
+        parsed = QuestionCatalog(self.quiz_data_dir).subject('electrotehnica')
+        self.assertEqual(subject.block_numbers, parsed.block_numbers)
+        self.assertEqual(
+            [q.as_dict() for q in subject.block_questions(2)],
+            [q.as_dict() for q in parsed.block_questions(2)],
+        )
+        self.assertEqual((subject.question(42).question, subject.question(42).block), ('Întrebarea 42?', 3))
+        self.assertIsNone(subject.question(46))
+        self.assertEqual(subject.block_questions(9), ())
+
+    def test_stale_subjects_fall_back_to_json(self):
+        """Test that a subject changed after compiling is parsed from its JSON."""
+        stat = self.source.stat()
+        os.utime(self.source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.assertIsInstance(self.catalog.subject('electrotehnica'), SubjectCatalog)
+
+    def test_shared_mode_recompiles_stale_banks(self):
+        """Test that shared mode recompiles a stale bank instead of parsing the JSON."""
+        catalog = QuestionCatalog(self.quiz_data_dir, check_interval=0, bank_path=self.bank_path, shared=True)
+        data = json.loads(self.source.read_text(encoding='utf-8'))
+        data['questions'][0]['question'] = 'Corectată?'
+        self.source.write_text(json.dumps(data), encoding='utf-8')
+        touch_later(self.source)
+
+        subject = catalog.subject('electrotehnica')
+        self.assertIsInstance(subject, BankSubject)
+        self.assertEqual(subject.question(1).question, 'Corectată?')
+        # Other workers attach to the recompiled bank
+        self.assertIsInstance(self.catalog.subject('electrotehnica'), BankSubject)
+
+    def test_shared_mode_compiles_a_missing_bank(self):
+        """Test that the first worker in shared mode compiles a missing bank."""
+        self.bank_path.unlink()
+        catalog = QuestionCatalog(self.quiz_data_dir, bank_path=self.bank_path, shared=True)
+        self.assertIsInstance(catalog.subject('electrotehnica'), BankSubject)
+        self.assertTrue(self.bank_path.exists())
+
+    def test_rejects_other_files(self):
+        """Test that a file without the bank header is not used."""
+        self.bank_path.write_bytes(b'not a bank at all, just some bytes')
+        with self.assertLogs('quiz.loader', 'WARNING'):
+            self.assertIsInstance(self.catalog.subject('electrotehnica'), SubjectCatalog)
+
+
+class QuizDataWatcherTestCase(SimpleTestCase):
+    """Test the quiz_data watcher behind watch_quiz_data."""
+
+    def setUp(self):
+        self.quiz_data_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.quiz_data_dir, ignore_errors=True)
+        self.source = self.quiz_data_dir / 'electrotehnica.json'
+        self.write([make_question(1, block=1)])
+        self.changed = []
+
+    def write(self, questions):
+        self.source.write_text(json.dumps({'questions': questions}), encoding='utf-8')
+
+    def test_polling_reports_changed_subjects(self):
+        """Test that polling reports each changed subject once."""
+        watcher = QuizDataWatcher(self.changed.append, self.quiz_data_dir, use_inotify=False)
+        self.assertEqual(watcher.poll_once(), [])
+
+        self.write([make_question(1, block=1, text='Corrected?')])
+        touch_later(self.source)
+        write_shards(self.quiz_data_dir / 'legislatie-gr-2', 'legislatie-gr-2', 'Legislație', 20,
+                     [make_question(1, block=1)])
+        self.assertEqual(watcher.poll_once(), ['electrotehnica', 'legislatie-gr-2'])
+        self.assertEqual(watcher.poll_once(), [])
+        self.assertEqual(self.changed, ['electrotehnica', 'legislatie-gr-2'])
+        self.assertEqual(watcher.status()['changes'], 2)
+
+    def test_reload_swaps_the_changed_subject(self):
+        """Test that a watcher reload swaps only the changed subject into the catalog."""
+        catalog = QuestionCatalog(self.quiz_data_dir, check_interval=3600)
+        old = catalog.subject('electrotehnica')
+        watcher = QuizDataWatcher(catalog.reload, self.quiz_data_dir, use_inotify=False)
+
+        self.write([make_question(1, block=1, text='Corrected?')])
+        touch_later(self.source)
+        watcher.poll_once()
+        self.assertEqual(catalog.subject('electrotehnica').question(1).question, 'Corrected?')
+        self.assertEqual(old.question(1).question, 'Question 1?')
+
+    def test_callback_errors_are_reported(self):
+        """Test that a failing reload is logged and kept in the status."""
+        def fail(subject_id):
+            raise ValueError('broken JSON')
+
+        watcher = QuizDataWatcher(fail, self.quiz_data_dir, use_inotify=False)
+        touch_later(self.source)
+        with self.assertLogs('quiz.watcher', 'ERROR'):
+            watcher.poll_once()
+        self.assertEqual(watcher.status()['last_error']['subject'], 'electrotehnica')
+
+    @skipUnless(sys.platform.startswith('linux'), 'inotify is Linux-only')
+    def test_inotify_notices_atomic_replacements(self):
+        """Test that the inotify backend reports a file replaced by rename."""
+        reloaded = threading.Event()
+        watcher = QuizDataWatcher(lambda subject_id: (self.changed.append(subject_id), reloaded.set()),
+                                  self.quiz_data_dir, settle=0.05)
+        watcher.start()
+        self.addCleanup(watcher.stop)
+        self.assertEqual(watcher.backend, 'inotify')
+
+        tmp = self.quiz_data_dir / 'electrotehnica.json.tmp'
+        tmp.write_text(json.dumps({'questions': [make_question(1, block=1, text='Corrected?')]}), encoding='utf-8')
+        os.replace(tmp, self.source)
+        self.assertTrue(reloaded.wait(5))
+        self.assertEqual(self.changed, ['electrotehnica'])
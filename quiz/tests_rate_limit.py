@@ -0,0 +1,135 @@
+"""
+Tests for the shared token-bucket rate limiter behind the login and
+registration rate limits.
+"""
+import multiprocessing
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+
+from .auth_views import login_view
+from .rate_limit import SQLiteBucketStore, TokenBucketLimiter
+
+
+def _hammer(path, attempts, results):
+    limiter = TokenBucketLimiter(50, 3600, store=SQLiteBucketStore(path))
+    results.put(sum(limiter.acquire('client')[0] for _ in range(attempts)))
+
+
+class TokenBucketLimiterTestCase(SimpleTestCase):
+    """Test the token bucket and its SQLite store."""
+
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.path = self.directory / 'ratelimit.sqlite3'
+
+    def limiter(self, capacity=5, window_seconds=300):
+        return TokenBucketLimiter(capacity, window_seconds, store=SQLiteBucketStore(self.path))
+
+    def test_limits_and_refills(self):
+        """Test that a client gets capacity attempts, then one per refill interval."""
+        limiter = self.limiter()
+        with mock.patch('quiz.rate_limit.time.time', return_value=1000.0):
+            self.assertEqual([limiter.acquire('a')[0] for _ in range(6)], [True] * 5 + [False])
+            self.assertTrue(limiter.acquire('b')[0])
+            allowed, retry_after = limiter.acquire('a')
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(retry_after, 60.0)
+        with mock.patch('quiz.rate_limit.time.time', return_value=1060.0):
+            self.assertEqual([limiter.acquire('a')[0] for _ in range(2)], [True, False])
+
+    def test_state_is_shared_between_limiters(self):
+        """Test that limiters of other processes see the same buckets, and reset works."""
+        first, second = self.limiter(capacity=2), self.limiter(capacity=2)
+        self.assertTrue(first.acquire('a')[0])
+        self.assertTrue(second.acquire('a')[0])
+        self.assertFalse(first.acquire('a')[0])
+        second.reset('a')
+        first.clear_local()
+        self.assertTrue(first.acquire('a')[0])
+
+    def test_refused_clients_do_not_reach_the_store(self):
+        """Test the local fast path for clients that are over their limit."""
+        limiter = self.limiter(capacity=1)
+        limiter.acquire('a')
+        limiter.acquire('a')
+        with mock.patch.object(SQLiteBucketStore, 'take') as take:
+            self.assertFalse(limiter.acquire('a')[0])
+        take.assert_not_called()
+
+    def test_large_limits_lease_tokens(self):
+        """Test that clients well under a large limit are served from a local lease."""
+        limiter = self.limiter(capacity=100)
+        with mock.patch.object(SQLiteBucketStore, 'take', wraps=limiter.store.take) as take:
+            self.assertTrue(all(limiter.acquire('a')[0] for _ in range(11)))
+        self.assertEqual(take.call_count, 1)
+
+    def test_threads_never_exceed_the_limit(self):
+        """Test that concurrent threads together get exactly capacity attempts."""
+        store = SQLiteBucketStore(self.path)
+        limiters = [TokenBucketLimiter(50, 3600, store=store) for _ in range(4)]
+        granted = []
+
+        def hammer(limiter):
+            granted.append(sum(limiter.acquire('client')[0] for _ in range(40)))
+
+        threads = [threading.Thread(target=hammer, args=(limiters[i % 4],)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sum(granted), 50)
+
+    def test_processes_never_exceed_the_limit(self):
+        """Test that concurrent worker processes together get exactly capacity attempts."""
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        processes = [context.Process(target=_hammer, args=(str(self.path), 40, results)) for _ in range(4)]
+        for process in processes:
+            process.start()
+        granted = [results.get(timeout=30) for _ in processes]
+        for process in processes:
+            process.join()
+        self.assertEqual(sum(granted), 50)
+
+
+class LoginRateLimitTestCase(TestCase):
+    """Test the rate limit of the login view."""
+
+    def setUp(self):
+        directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        override = self.settings(QUIZ_RATE_LIMIT_DB=str(directory / 'ratelimit.sqlite3'))
+        override.enable()
+        self.addCleanup(override.disable)
+        login_view.limiter.clear_local()
+        self.addCleanup(login_view.limiter.clear_local)
+        User.objects.create_user('student', password='correct-horse')
+
+    def post(self, password):
+        return self.client.post('/accounts/login/', {'username': 'student', 'password': password})
+
+    def test_blocks_after_failed_attempts(self):
+        """Test that the sixth failed login within the window is refused."""
+        # A fixed clock: password hashing must not make the retry time drift
+        with mock.patch('quiz.rate_limit.time.time', return_value=1000.0):
+            for _ in range(5):
+                self.assertEqual(self.post('wrong').status_code, 200)
+            response = self.post('correct-horse')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('în 60 secunde', response.content.decode('utf-8'))
+
+    def test_successful_login_resets_the_counter(self):
+        """Test that a successful login forgets earlier failures."""
+        for _ in range(4):
+            self.post('wrong')
+        self.assertEqual(self.post('correct-horse').status_code, 302)
+        self.client.logout()
+        for _ in range(5):
+            self.assertEqual(self.post('wrong').status_code, 200)
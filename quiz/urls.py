@@ -1,7 +1,12 @@
-from django.urls import path
+from django.urls import path, register_converter
 from . import views
 from . import learn_views
 from . import robots_views
+from . import ops_views
+from .routing import BlockSlugConverter, SubjectSlugConverter
+
+register_converter(SubjectSlugConverter, 'subject_slug')
+register_converter(BlockSlugConverter, 'block_slug')
 
 urlpatterns = [
     path('', views.index, name='index'),
@@ -13,12 +18,15 @@ urlpatterns = [
     
     # Public Learn/SEO routes
     path('learn/', learn_views.learn_subject_list, name='learn_subject_list'),
-    path('learn/<str:subject_slug>/', learn_views.learn_subject_detail, name='learn_subject_detail'),
-    path('learn/<str:subject_slug>/<str:block_slug>/', learn_views.learn_block_detail, name='learn_block_detail'),
-    path('learn/<str:subject_slug>/<str:block_slug>/<int:question_id>/', learn_views.learn_question_detail, name='learn_question_detail'),
+    path('learn/<subject_slug:subject_ref>/', learn_views.learn_subject_detail, name='learn_subject_detail'),
+    path('learn/<subject_slug:subject_ref>/<block_slug:block_ref>/', learn_views.learn_block_detail, name='learn_block_detail'),
+    path('learn/<subject_slug:subject_ref>/<block_slug:block_ref>/<int:question_id>/', learn_views.learn_question_detail, name='learn_question_detail'),
     
     # SEO and legal routes
     path('robots.txt', robots_views.robots_txt, name='robots_txt'),
     path('LICENSE', robots_views.license_view, name='license'),
+    
+    # Monitoring (superuser only)
+    path('ops/status/', ops_views.ops_status, name='ops_status'),
 ]
 
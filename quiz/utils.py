@@ -7,6 +7,9 @@ from django.conf import settings
 from django.contrib.staticfiles.finders import find
 from django.utils.text import slugify
 
+from .image_manifest import IMAGE_EXTENSION, IMAGE_ROOT, get_image_manifest
+from .subjects import get_subject_registry
+
 
 def build_absolute_https_url(request, path=''):
     """
@@ -45,6 +48,9 @@ def check_static_file_exists(relative_path):
     """
     Check if a static file exists and return (exists, url).
     
+    Images under img/<subject>/ are answered from the in-memory image
+    manifest; any other path falls back to probing the staticfiles finders.
+    
     Args:
         relative_path: Relative path from static root, e.g. 'img/electrotehnica/q123.png'
     
@@ -54,6 +60,12 @@ def check_static_file_exists(relative_path):
     # Normalize path separators
     relative_path = relative_path.replace('\\', '/')
     
+    # Fast path: question images are indexed once per process
+    parts = relative_path.split('/', 2)
+    if len(parts) == 3 and parts[0] == IMAGE_ROOT and parts[2].endswith(IMAGE_EXTENSION):
+        url = get_image_manifest().lookup(parts[1], parts[2][:-len(IMAGE_EXTENSION)])
+        return (True, url) if url else (False, None)
+    
     # Try to find the file using Django's staticfiles finders
     found_path = find(relative_path)
     
@@ -81,17 +93,25 @@ def check_static_file_exists(relative_path):
 
 def get_image_prefix(subject):
     """
-    Get the image prefix based on subject.
+    Get the image prefix based on subject (see quiz.subjects.SUBJECTS).
     qe = electrotehnica
     ql = legislatie-gr-2
     qn = norme-tehnice-gr-2
     """
-    prefix_map = {
-        'electrotehnica': 'qe',
-        'legislatie-gr-2': 'ql',
-        'norme-tehnice-gr-2': 'qn',
-    }
-    return prefix_map.get(subject, 'q')
+    subject_info = get_subject_registry().get(subject)
+    return subject_info.image_prefix if subject_info else 'q'
+
+
+def get_image_base(question, subject):
+    """
+    Get the image base name for a question: its custom image_base if set,
+    otherwise the subject prefix followed by the question id (e.g. 'qe23').
+    """
+    if question.image_base:
+        # Custom image base provided
+        return question.image_base
+    # Use subject prefix: qe, ql, or qn
+    return f"{get_image_prefix(subject)}{question.qid}"
 
 
 def get_question_image_url(question, subject):
@@ -101,17 +121,8 @@ def get_question_image_url(question, subject):
     Returns:
         tuple: (exists: bool, url: str or None)
     """
-    if question.image_base:
-        # Custom image base provided
-        base = question.image_base
-    else:
-        # Use subject prefix: qe, ql, or qn
-        prefix = get_image_prefix(subject)
-        base = f"{prefix}{question.qid}"
-    
-    relative_path = f"img/{subject}/{base}.png"
-    exists, url = check_static_file_exists(relative_path)
-    return exists, url if exists else None
+    url = get_image_manifest().lookup(subject, get_image_base(question, subject))
+    return url is not None, url
 
 
 def get_option_image_url(question, subject, option_number):
@@ -122,17 +133,8 @@ def get_option_image_url(question, subject, option_number):
     Returns:
         tuple: (exists: bool, url: str or None)
     """
-    if question.image_base:
-        # Custom image base provided
-        base = question.image_base
-    else:
-        # Use subject prefix: qe, ql, or qn
-        prefix = get_image_prefix(subject)
-        base = f"{prefix}{question.qid}"
-    
-    relative_path = f"img/{subject}/{base}_{option_number}.png"
-    exists, url = check_static_file_exists(relative_path)
-    return exists, url if exists else None
+    url = get_image_manifest().lookup(subject, get_image_base(question, subject), option_number)
+    return url is not None, url
 
 
 def get_subject_slug(subject_id, subject_title):
@@ -163,36 +165,13 @@ def parse_subject_slug(slug):
     Parse a subject slug back to subject_id.
     Returns subject_id or None if invalid.
     
-    Uses exact slug matching against known subjects for reliability.
-    Handles both current format and legacy formats for backward compatibility.
+    Uses the precompiled routing table (quiz.routing): exact match against
+    current and legacy slugs, then the legacy '<anything>-<subject_id>' form.
     """
-    from .subjects import list_subjects
-    
-    subjects = list_subjects()
-    
-    # Build exact slug map for all subjects
-    slug_map = {}
-    for subj in subjects:
-        expected_slug = get_subject_slug(subj['id'], subj['title'])
-        slug_map[expected_slug] = subj['id']
-        # Also map subject_id directly (for simple slugs)
-        slug_map[subj['id']] = subj['id']
-    
-    # Exact match (current format)
-    if slug in slug_map:
-        return slug_map[slug]
+    from .routing import get_routing_table
     
-    # Legacy format fallback: check if slug ends with known subject_id
-    # This handles old format like "legislatie-gr-2-legislatie-gr-2"
-    for subj in subjects:
-        subject_id = subj['id']
-        # Check if slug ends with the subject_id (with or without leading dash)
-        if slug.endswith(f'-{subject_id}') or slug == subject_id:
-            # Verify it's a valid legacy format by checking if it contains the subject_id
-            # Return the subject_id if found
-            return subject_id
-    
-    return None
+    subject = get_routing_table().subject_for_slug(slug)
+    return subject.id if subject else None
 
 
 def parse_block_slug(slug):
@@ -201,29 +180,6 @@ def parse_block_slug(slug):
     Format: bloc-{number}-{subject_id}
     Returns (subject_id, block_number) or (None, None) if invalid.
     """
-    # Block slugs are: bloc-{number}-{subject_id}
-    if not slug.startswith('bloc-'):
-        return None, None
-    
-    # Get valid subject IDs from centralized source
-    from .subjects import list_subjects
-    valid_subjects = [s['id'] for s in list_subjects()]
-    
-    # Remove 'bloc-' prefix
-    remaining = slug[5:]
+    from .routing import get_routing_table
     
-    # Try each valid subject_id to find a match
-    # We need to find where the block number ends and subject_id begins
-    for subject_id in valid_subjects:
-        # Check if slug ends with this subject_id
-        if remaining.endswith(f'-{subject_id}'):
-            # Extract block number (everything before the subject_id)
-            block_part = remaining[:-len(f'-{subject_id}')]
-            try:
-                block_number = int(block_part)
-                return subject_id, block_number
-            except ValueError:
-                continue
-    
-    return None, None
-
+    return get_routing_table().parse_block_slug(slug)
@@ -3,12 +3,19 @@ from django.contrib.auth.decorators import login_required
 from django.http import Http404
 from django.urls import reverse
 from django.views.decorators.http import require_http_methods
+from django.views.decorators.cache import cache_control
+from django.conf import settings
 from django.utils import timezone
 from django.contrib import messages
 
-from .models import BlockAttempt, Question, BlockNote
-from .utils import get_question_image_url, get_option_image_url
-from .subjects import list_subjects
+from .models import BlockProgress, Question, BlockNote
+from .block_cache import get_block_bundle
+from .catalog import get_catalog_stats
+from .attempt_journal import merge_pending_progress, record_attempt
+from .grading import grade_submission, hydrate_results
+from .progress import NO_ATTEMPT_CLASS
+from .conditional import block_stats, conditional_page, make_fingerprint
+from .subjects import get_subject_registry
 
 
 def index(request):
@@ -20,64 +27,47 @@ def index(request):
 
 @login_required
 def dashboard(request):
-    """Display dashboard with all subjects and blocks."""
-    subjects_data = []
+    """
+    Display dashboard with all subjects and blocks.
     
-    for subject_info in list_subjects():
-        subject_id = subject_info['id']
-        subject_title = subject_info['title']
-        
-        # Get blocks from database
-        blocks = Question.objects.filter(subject=subject_id).values_list('block_number', flat=True).distinct().order_by('block_number')
-
-        # Personal notes for this subject / user, indexed by block number
-        notes_qs = BlockNote.objects.filter(user=request.user, subject=subject_id)
-        notes_by_block = {n.block_number: n.note for n in notes_qs}
-        
-        # Get last attempt for each block (optimized: single query with prefetch)
-        block_numbers = list(blocks)
-        if block_numbers:
-            # Get all attempts for this subject/user in one query, ordered by block and taken_at
-            attempts_qs = BlockAttempt.objects.filter(
-                user=request.user,
-                subject=subject_id,
-                block_number__in=block_numbers
-            ).order_by('block_number', '-taken_at')
-            
-            # Group by block_number and take first (latest) for each block
-            attempts_by_block = {}
-            for attempt in attempts_qs:
-                if attempt.block_number not in attempts_by_block:
-                    attempts_by_block[attempt.block_number] = attempt
-        else:
-            attempts_by_block = {}
-        
-        # Build block data
+    Constant number of queries however many subjects or attempts exist:
+    the block catalog (cached catalog stats), the user's notes and the
+    user's block progress (latest attempt per block), one query each.
+    """
+    catalog = get_catalog_stats()
+    
+    # Personal notes of this user, all subjects
+    notes_by_block = {
+        (subject, block_number): note
+        for subject, block_number, note in BlockNote.objects.filter(
+            user=request.user,
+        ).exclude(note='').values_list('subject', 'block_number', 'note')
+    }
+    
+    # Latest attempt, best score and attempt count of every block, all subjects
+    progress_by_block = {
+        (p.subject, p.block_number): p
+        for p in BlockProgress.objects.filter(user=request.user)
+    }
+    # Attempts still waiting in the write-behind journal (read-your-writes)
+    merge_pending_progress(progress_by_block, request.user)
+    
+    subjects_data = []
+    for subject_info in get_subject_registry():
+        subject_id = subject_info.id
         block_data = []
-        for block_num in blocks:
-            last_attempt = attempts_by_block.get(block_num)
-            
-            # Determine color class based on last attempt
-            if last_attempt:
-                if last_attempt.score == last_attempt.total:
-                    color_class = 'block-green'
-                elif last_attempt.score >= last_attempt.total - 2:
-                    color_class = 'block-yellow'
-                else:
-                    color_class = 'block-red'
-            else:
-                color_class = 'block-white'
-            
+        for block in catalog.blocks(subject_id):
+            key = (subject_id, block.block_number)
+            progress = progress_by_block.get(key)
             block_data.append({
-                'number': block_num,
-                'last_attempt': last_attempt,
-                'color_class': color_class,
-                'note': notes_by_block.get(block_num, ""),
+                'number': block.block_number,
+                'progress': progress,
+                'color_class': progress.color_class if progress else NO_ATTEMPT_CLASS,
+                'note': notes_by_block.get(key, ""),
             })
-        
         subjects_data.append({
             'id': subject_id,
-            'title': subject_title,
+            'title': subject_info.title,
             'blocks': block_data,
         })
     
@@ -86,28 +76,45 @@ def dashboard(request):
     })
 
 
+def _block_take_fingerprint(request, subject, block_number):
+    """
+    Per-user validators for block_take: the block fingerprint plus everything
+    user-specific on the page (superuser flag, block note, CSRF cookie).
+    """
+    # Pending flash messages are rendered once; never answer 304 over them
+    if len(messages.get_messages(request)):
+        return None
+    count, last_modified, version = block_stats(subject, block_number)
+    if not count:
+        return None
+    note_updated_at = BlockNote.objects.filter(
+        user=request.user,
+        subject=subject,
+        block_number=block_number,
+    ).values_list('updated_at', flat=True).first()
+    return make_fingerprint(
+        request.path, count, last_modified, version,
+        request.user.pk, request.user.is_superuser, note_updated_at,
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+    )
+
+
 @login_required
+@cache_control(private=True, no_cache=True)
+@conditional_page(_block_take_fingerprint)
 def block_take(request, subject, block_number):
     """Display questions for a specific block."""
     # Validate subject
-    valid_subjects = [s['id'] for s in list_subjects()]
-    if subject not in valid_subjects:
+    if subject not in get_subject_registry():
         raise Http404("Subject not found")
     
-    # Get questions for this block from database
-    questions = Question.objects.filter(
-        subject=subject,
-        block_number=block_number
-    ).order_by('qid')
-    
-    if not questions.exists():
+    # Get questions for this block from the cached block bundle
+    bundle = get_block_bundle(subject, block_number)
+    if bundle is None:
         raise Http404("Block not found")
     
     # Get subject title
-    subject_title = next(
-        (s['title'] for s in list_subjects() if s['id'] == subject),
-        subject
-    )
+    subject_title = get_subject_registry().by_id[subject].title
     
     # Personal note for this block (per user)
     note_obj = BlockNote.objects.filter(
@@ -119,31 +126,19 @@ def block_take(request, subject, block_number):
 
     # Prepare questions with image URLs
     questions_data = []
-    for question in questions:
+    for question in bundle['questions']:
         # Check if question can be edited by this user
-        has_answer = bool(question.correct)
-        has_explanation = bool(question.explanation and question.explanation.strip())
+        has_answer = question['has_answer']
+        has_explanation = question['has_explanation']
         can_edit = (not has_answer or not has_explanation) or request.user.is_superuser
         
-        # Get image URLs
-        question_img_exists, question_img_url = get_question_image_url(question, subject)
-        option_a_exists, option_a_url = get_option_image_url(question, subject, 1)
-        option_b_exists, option_b_url = get_option_image_url(question, subject, 2)
-        option_c_exists, option_c_url = get_option_image_url(question, subject, 3)
-        
+        # Image URLs come from the denormalized image metadata
         questions_data.append({
             'question': question,
             'can_edit': can_edit,
             'has_answer': has_answer,
             'has_explanation': has_explanation,
-            'question_img_exists': question_img_exists,
-            'question_img_url': question_img_url,
-            'option_a_exists': option_a_exists,
-            'option_a_url': option_a_url,
-            'option_b_exists': option_b_exists,
-            'option_b_url': option_b_url,
-            'option_c_exists': option_c_exists,
-            'option_c_url': option_c_url,
+            **question['images'],
         })
     
     return render(request, 'quiz/block_take.html', {
@@ -160,72 +155,29 @@ def block_take(request, subject, block_number):
 def block_submit(request, subject, block_number):
     """Grade and save quiz attempt."""
     # Validate subject
-    valid_subjects = [s['id'] for s in list_subjects()]
-    if subject not in valid_subjects:
+    if subject not in get_subject_registry():
         raise Http404("Subject not found")
     
-    # Get questions for this block from database
-    questions = Question.objects.filter(
-        subject=subject,
-        block_number=block_number
-    ).order_by('qid')
-    
-    if not questions.exists():
+    # Grade against the cached answer key (no ORM access)
+    answer_key, result = grade_submission(subject, block_number, request.POST)
+    if answer_key is None:
         raise Http404("Block not found")
     
-    # Grade the quiz
-    score = 0
-    total_gradable = 0
-    results = []
-    
-    for question in questions:
-        q_id = str(question.qid)
-        user_answer = request.POST.get(f'question_{q_id}')
-        correct_answer = question.correct
-        
-        # Skip ungradable questions (correct is null)
-        if correct_answer is None:
-            results.append({
-                'question': question,
-                'user_answer': user_answer,
-                'correct_answer': None,
-                'is_correct': None,
-                'explanation': question.explanation,
-            })
-            continue
-        
-        total_gradable += 1
-        is_correct = user_answer == correct_answer
-        
-        if is_correct:
-            score += 1
-        
-        results.append({
-            'question': question,
-            'user_answer': user_answer,
-            'correct_answer': correct_answer,
-            'is_correct': is_correct,
-            'explanation': question.explanation,
-        })
-    
-    # Calculate percentage
-    percentage = (score / total_gradable * 100) if total_gradable > 0 else 0.0
-    
-    # Save attempt
-    attempt = BlockAttempt.objects.create(
+    # Save attempt (journaled and inserted later in write-behind mode)
+    attempt = record_attempt(
         user=request.user,
         subject=subject,
         block_number=block_number,
-        score=score,
-        total=total_gradable,
-        percentage=percentage,
+        score=result.score,
+        total=result.total,
+        percentage=result.percentage,
     )
     
+    # Question text and explanations for the result page
+    results = hydrate_results(answer_key, result)
+    
     # Get subject title
-    subject_title = next(
-        (s['title'] for s in list_subjects() if s['id'] == subject),
-        subject
-    )
+    subject_title = get_subject_registry().by_id[subject].title
     
     return render(request, 'quiz/block_result.html', {
         'subject': subject,
@@ -280,7 +232,10 @@ def question_edit(request, pk):
             question.explanation = request.POST.get('explanation', '')
         
         if request.user.is_superuser:
-            question.image_base = request.POST.get('image_base', '').strip()
+            image_base = request.POST.get('image_base', '').strip()
+            if image_base != question.image_base:
+                question.image_base = image_base
+                question.refresh_image_metadata()
         
         question.edited_by = request.user
         question.edited_at = timezone.now()
@@ -311,8 +266,7 @@ def question_edit(request, pk):
 def block_note_save(request, subject, block_number):
     """Save or update personal note for a block (per user)."""
     # Validate subject
-    valid_subjects = [s['id'] for s in list_subjects()]
-    if subject not in valid_subjects:
+    if subject not in get_subject_registry():
         raise Http404("Subject not found")
 
     note_text = request.POST.get('note', '').strip()
@@ -0,0 +1,207 @@
+"""
+Watching quiz_data/ for changed subject files.
+
+A QuizDataWatcher notices changed subject sources (the legacy
+quiz_data/<subject>.json or the shard manifest quiz_data/<subject>/
+manifest.json) and calls its on_change(subject) callback from its own
+thread, once per subject after the writes settle.
+``manage.py watch_quiz_data --import`` runs the diff-based database import
+for that subject only, which is what makes a changed file visible: pages
+are served from the database and the shared quiz cache.
+
+Backends:
+    - inotify (Linux), through ctypes: the thread sleeps in select() until
+      the kernel reports a write or rename in quiz_data/, so an idle
+      watcher costs nothing;
+    - polling elsewhere (or when inotify is unavailable): one stat() per
+      subject every poll_interval seconds.
+"""
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from pathlib import Path
+
+from .loader import _get_quiz_data_path, _source_stamp
+from .shards import MANIFEST_NAME
+from .subjects import get_subject_registry
+
+logger = logging.getLogger('quiz.watcher')
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_ISDIR = 0x40000000
+IN_IGNORED = 0x00008000
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT = struct.Struct('iIII')
+
+
+class Inotify:
+    """Minimal ctypes binding of inotify(7)."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+    def add_watch(self, path, mask=_WATCH_MASK):
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f'inotify_add_watch failed for {path}')
+        return wd
+
+    def read(self, timeout):
+        """Return [(wd, mask, name)] of the events available within timeout seconds."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class QuizDataWatcher:
+    """Calls on_change(subject) when a subject's quiz_data source changes."""
+
+    def __init__(self, on_change, quiz_data_dir=None, poll_interval=2.0, settle=0.5, use_inotify=True):
+        self.on_change = on_change
+        self.quiz_data_dir = Path(quiz_data_dir or _get_quiz_data_path())
+        self.poll_interval = poll_interval
+        self.settle = settle
+        self.use_inotify = use_inotify
+        self.pid = os.getpid()
+        self.backend = None
+        self._stopped = threading.Event()
+        self._thread = None
+        self._stamps = self._current_stamps()
+        self.changes = 0
+        self.last_change = None  # {'subject', 'at', 'seconds'}
+        self.last_error = None
+
+    def _current_stamps(self):
+        return {subject.id: _source_stamp(self.quiz_data_dir, subject) for subject in get_subject_registry()}
+
+    def start(self, background=True):
+        """Start watching; background=False runs the loop in the calling thread until stop()."""
+        target, self.backend = self._run_polling, 'polling'
+        if self.use_inotify:
+            try:
+                inotify = Inotify()
+            except (OSError, AttributeError) as exc:
+                logger.info('inotify unavailable (%s); polling %s', exc, self.quiz_data_dir)
+            else:
+                # Watches are added before start() returns, so no change is missed
+                watches = self._add_watches(inotify)
+                target, self.backend = (lambda: self._run_inotify(inotify, watches)), 'inotify'
+        if background:
+            self._thread = threading.Thread(target=target, name='quiz-data-watcher', daemon=True)
+            self._thread.start()
+        else:
+            target()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + self.settle + 5)
+
+    def _handle(self, subject_ids):
+        for subject_id in sorted(subject_ids):
+            start = time.monotonic()
+            try:
+                self.on_change(subject_id)
+            except Exception as exc:
+                logger.exception('Reloading %s failed', subject_id)
+                self.last_error = {'subject': subject_id, 'error': repr(exc), 'at': time.time()}
+                continue
+            self.changes += 1
+            self.last_change = {
+                'subject': subject_id,
+                'at': time.time(),
+                'seconds': round(time.monotonic() - start, 3),
+            }
+
+    def poll_once(self):
+        """Compare the source stamps with the last seen ones; handle the changed subjects."""
+        stamps = self._current_stamps()
+        changed = [subject_id for subject_id, stamp in stamps.items() if stamp != self._stamps.get(subject_id)]
+        self._stamps = stamps
+        self._handle(changed)
+        return changed
+
+    def _run_polling(self):
+        while not self._stopped.wait(self.poll_interval):
+            self.poll_once()
+
+    def _watch_subject_dir(self, inotify, watches, subject_id):
+        directory = self.quiz_data_dir / subject_id
+        if directory.is_dir():
+            watches[inotify.add_watch(directory)] = subject_id
+
+    def _add_watches(self, inotify):
+        """Watch quiz_data/ and every subject's shard directory; returns {wd: subject or None}."""
+        watches = {inotify.add_watch(self.quiz_data_dir): None}
+        for subject in get_subject_registry():
+            self._watch_subject_dir(inotify, watches, subject.id)
+        return watches
+
+    def _run_inotify(self, inotify, watches):
+        registry = get_subject_registry()
+        by_data_file = {subject.data_file: subject.id for subject in registry}
+        try:
+            while not self._stopped.is_set():
+                pending = set()
+                events = inotify.read(timeout=1.0)
+                while events:
+                    for wd, mask, name in events:
+                        if mask & IN_IGNORED:
+                            watches.pop(wd, None)
+                            continue
+                        directory_subject = watches.get(wd)
+                        if directory_subject is None:
+                            if mask & IN_ISDIR and name in registry:
+                                self._watch_subject_dir(inotify, watches, name)  # shard directory created
+                                pending.add(name)
+                            elif name in by_data_file:
+                                pending.add(by_data_file[name])
+                        elif name == MANIFEST_NAME:
+                            pending.add(directory_subject)
+                    # Let a burst of writes (an export, a copy) settle first
+                    events = inotify.read(timeout=self.settle)
+                if pending:
+                    self._stamps = self._current_stamps()
+                    self._handle(pending)
+        finally:
+            inotify.close()
+
+    def status(self):
+        return {
+            'enabled': True,
+            'backend': self.backend,
+            'pid': self.pid,
+            'changes': self.changes,
+            'last_change': self.last_change,
+            'last_error': self.last_error,
+        }